@@ -1,87 +1,211 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Request
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
 import subprocess
+import threading
 import time
+import uuid
+import os
+
+from control_api.infer_worker import INFER_DEFAULTS, InferWorker
+from rvc.lib.tools.arguments import parse_arguments
 
 app = FastAPI()
 
+# Inference runs on warm models in this process (or a pool of child processes),
+# everything else runs main.py in a subprocess on its own pool, so a long
+# training job never holds up inference
+INFER_MODE = os.environ.get("RVC_API_INFER_MODE", "inprocess")
+INFER_WORKERS = int(os.environ.get("RVC_API_INFER_WORKERS", "1"))
+COMMAND_WORKERS = int(os.environ.get("RVC_API_COMMAND_WORKERS", "2"))
+MAX_FINISHED_JOBS = 1000
+
+infer_worker = InferWorker(mode=INFER_MODE, workers=INFER_WORKERS)
+infer_executor = ThreadPoolExecutor(
+    max_workers=INFER_WORKERS if INFER_MODE == "pool" else 1,
+    thread_name_prefix="infer",
+)
+command_executor = ThreadPoolExecutor(
+    max_workers=COMMAND_WORKERS, thread_name_prefix="command"
+)
+
+jobs = OrderedDict()
+jobs_lock = threading.Lock()
+
 
 # Helper function to execute commands
 def execute_command(command):
     try:
         result = subprocess.run(command, capture_output=True, text=True)
-        return {"output": result.stdout, "error": result.stderr}
+        return {
+            "output": result.stdout,
+            "error": result.stderr,
+            "return_code": result.returncode,
+        }
     except Exception as e:
         return {"error": str(e)}
 
 
+def execute_infer(args):
+    options = {key: getattr(args, key) for key in INFER_DEFAULTS}
+    return_code, error = infer_worker.run(
+        str(args.input_path),
+        str(args.output_path),
+        str(args.pth_path),
+        str(args.index_path),
+        str(args.export_format),
+        **options,
+    )
+    return {
+        "output": args.output_path.replace(".wav", f".{args.export_format.lower()}")
+        if return_code == 0
+        else "",
+        "error": error,
+        "return_code": return_code,
+    }
+
+
+def _update_job(job_id, **fields):
+    with jobs_lock:
+        jobs[job_id].update(fields)
+
+
+def _run_job(job_id, function, *args):
+    _update_job(job_id, status="running", started_at=time.time())
+    try:
+        result = function(*args)
+    except Exception as e:
+        result = {"error": str(e)}
+    status = "finished" if result.get("return_code") == 0 else "failed"
+    _update_job(job_id, status=status, finished_at=time.time(), result=result)
+
+
+def submit_job(mode, executor, function, *args):
+    job_id = uuid.uuid4().hex
+    with jobs_lock:
+        jobs[job_id] = {
+            "job_id": job_id,
+            "mode": mode,
+            "status": "queued",
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+        }
+        # Forget the oldest finished jobs
+        finished = [
+            key
+            for key, job in jobs.items()
+            if job["status"] in ("finished", "failed")
+        ]
+        for key in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del jobs[key]
+
+    executor.submit(_run_job, job_id, function, *args)
+    return {"job_id": job_id, "status": "queued"}
+
+
+async def submit_command(mode, request):
+    command = ["python", "main.py", mode] + await request.json()
+    return submit_job(mode, command_executor, execute_command, command)
+
+
+@app.on_event("startup")
+def warmup():
+    infer_executor.submit(infer_worker.warmup)
+
+
+@app.on_event("shutdown")
+def shutdown():
+    command_executor.shutdown(wait=False, cancel_futures=True)
+    infer_executor.shutdown(wait=False, cancel_futures=True)
+    infer_worker.shutdown()
+
+
 # Infer
 @app.post("/infer")
 async def infer(request: Request):
-    command = ["python", "main.py", "infer"] + await request.json()
-    return execute_command(command)
+    try:
+        args = parse_arguments(["infer"] + await request.json())
+    except SystemExit:
+        raise HTTPException(status_code=400, detail="Invalid infer arguments")
+    return submit_job("infer", infer_executor, execute_infer, args)
 
 
 # Batch Infer
 @app.post("/batch_infer")
 async def batch_infer(request: Request):
-    command = ["python", "main.py", "batch_infer"] + await request.json()
-    return execute_command(command)
+    return await submit_command("batch_infer", request)
 
 
 # TTS
 @app.post("/tts")
 async def tts(request: Request):
-    command = ["python", "main.py", "tts"] + await request.json()
-    return execute_command(command)
+    return await submit_command("tts", request)
 
 
 # Preprocess
 @app.post("/preprocess")
 async def preprocess(request: Request):
-    command = ["python", "main.py", "preprocess"] + await request.json()
-    return execute_command(command)
+    return await submit_command("preprocess", request)
 
 
 # Extract
 @app.post("/extract")
 async def extract(request: Request):
-    command = ["python", "main.py", "extract"] + await request.json()
-    return execute_command(command)
+    return await submit_command("extract", request)
 
 
 # Train
 @app.post("/train")
 async def train(request: Request):
-    command = ["python", "main.py", "train"] + await request.json()
-    return execute_command(command)
+    return await submit_command("train", request)
 
 
 # Index
 @app.post("/index")
 async def index(request: Request):
-    command = ["python", "main.py", "index"] + await request.json()
-    return execute_command(command)
+    return await submit_command("index", request)
 
 
 # Model Information
 @app.post("/model_information")
 async def model_information(request: Request):
-    command = ["python", "main.py", "model_information"] + await request.json()
-    return execute_command(command)
+    return await submit_command("model_information", request)
 
 
 # Model Fusion
 @app.post("/model_fusion")
 async def model_fusion(request: Request):
-    command = ["python", "main.py", "model_fusion"] + await request.json()
-    return execute_command(command)
+    return await submit_command("model_fusion", request)
 
 
 # Download
 @app.post("/download")
 async def download(request: Request):
-    command = ["python", "main.py", "download"] + await request.json()
-    return execute_command(command)
+    return await submit_command("download", request)
+
+
+# Job status
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    with jobs_lock:
+        job = jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return {key: value for key, value in job.items() if key != "result"}
+
+
+# Job result
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    with jobs_lock:
+        job = jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        if job["status"] not in ("finished", "failed"):
+            raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+        return {"job_id": job_id, "status": job["status"], **job["result"]}
 
 
 # Ping endpoint to check latency
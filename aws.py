@@ -1,4 +1,6 @@
 import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 
 import boto3
@@ -19,27 +21,111 @@ session = boto3.Session(
 
 s3 = session.client('s3', endpoint_url='https://s3.ru-1.storage.selcloud.ru')
 
+CHUNK_SIZE = 1024 * 1024
+# os.umask can only be read by setting it, do it once while importing
+UMASK = os.umask(0)
+os.umask(UMASK)
+
 
 class AWSService:
 
     @staticmethod
-    def download_file(file_s3_url: str, path_to_save: str):
+    def get_s3_key(file_s3_url: str) -> str:
         parsed_url = urlparse(file_s3_url)
-        file_s3_key = parsed_url.path.lstrip('/')
+        return parsed_url.path.lstrip('/')
+
+    @staticmethod
+    def head_file(file_s3_url: str) -> dict:
+        return s3.head_object(
+            Bucket=settings.aws_storage_bucket_name,
+            Key=AWSService.get_s3_key(file_s3_url),
+        )
+
+    @staticmethod
+    def _stream_to_file(body, fd: int, offset: int = 0) -> int:
+        for chunk in body.iter_chunks(chunk_size=CHUNK_SIZE):
+            view = memoryview(chunk)
+            while view:
+                written = os.pwrite(fd, view, offset)
+                offset += written
+                view = view[written:]
+        return offset
+
+    @staticmethod
+    def _download_range(file_s3_key: str, etag: str, fd: int, start: int, end: int):
+        response = s3.get_object(
+            Bucket=settings.aws_storage_bucket_name,
+            Key=file_s3_key,
+            Range=f"bytes={start}-{end}",
+            IfMatch=etag,
+        )
+        written = AWSService._stream_to_file(response['Body'], fd, start)
+        if written != end + 1:
+            raise IOError(f"Short read for {file_s3_key} bytes {start}-{end}")
+
+    @staticmethod
+    def _download_ranges(file_s3_key: str, etag: str, fd: int, size: int):
+        part_size = settings.s3_download_part_size
+        os.ftruncate(fd, size)
+
+        with ThreadPoolExecutor(max_workers=settings.s3_download_concurrency) as pool:
+            futures = [
+                pool.submit(
+                    AWSService._download_range,
+                    file_s3_key,
+                    etag,
+                    fd,
+                    start,
+                    min(start + part_size, size) - 1,
+                )
+                for start in range(0, size, part_size)
+            ]
+            for future in futures:
+                future.result()
+
+    @staticmethod
+    def download_file(file_s3_url: str, path_to_save: str) -> str:
+        """Download file to path_to_save, returns ETag of the downloaded object"""
+        file_s3_key = AWSService.get_s3_key(file_s3_url)
         print(f"Downloading {file_s3_key} from {file_s3_url}")
-        get_object_response = s3.get_object(Bucket=settings.aws_storage_bucket_name, Key=file_s3_key)
 
-        file_content = get_object_response['Body'].read()
+        save_dir = os.path.dirname(path_to_save) or "."
+        os.makedirs(save_dir, exist_ok=True)
+
+        # Write next to the target so the final rename stays on one filesystem
+        fd, tmp_path = tempfile.mkstemp(dir=save_dir, prefix=".", suffix=".part")
+        try:
+            head = s3.head_object(Bucket=settings.aws_storage_bucket_name, Key=file_s3_key)
+            size = head['ContentLength']
+            etag = head['ETag']
 
-        os.makedirs(os.path.dirname(path_to_save), exist_ok=True)
+            if size >= settings.s3_download_threshold:
+                AWSService._download_ranges(file_s3_key, etag, fd, size)
+            else:
+                get_object_response = s3.get_object(
+                    Bucket=settings.aws_storage_bucket_name, Key=file_s3_key, IfMatch=etag
+                )
+                AWSService._stream_to_file(get_object_response['Body'], fd)
 
-        with open(path_to_save, 'wb') as file:
-            file.write(file_content)
+            os.fsync(fd)
+            os.close(fd)
+            fd = None
+            # mkstemp creates the file readable by the owner only, give it the
+            # mode open() would have
+            os.chmod(tmp_path, 0o666 & ~UMASK)
+            os.replace(tmp_path, path_to_save)
+        except BaseException:
+            if fd is not None:
+                os.close(fd)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
 
         print(f"File saved to {path_to_save}")
+        return etag
 
     @staticmethod
-    def upload_file_to_s3(local_path: str, s3_path: str):
+    def upload_file_to_s3(local_path: str, s3_path: str) -> bool:
         try:
             s3.upload_file(
                 local_path,
@@ -48,3 +134,5 @@ class AWSService:
             )
         except ClientError as e:
             print(e)
+            return False
+        return True
@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+import tempfile
+
+import numpy as np
+import soundfile as sf
+
+now_dir = os.getcwd()
+sys.path.append(now_dir)
+
+from rvc.lib.utils import load_audio_ffmpeg, load_audio_soundfile
+
+# File layouts seen in datasets and inference inputs
+FORMATS = [
+    ("wav", 16000, 1, "PCM_16"),
+    ("wav", 44100, 2, "PCM_16"),
+    ("wav", 48000, 1, "PCM_24"),
+    ("flac", 44100, 1, "PCM_16"),
+    ("ogg", 48000, 2, "VORBIS"),
+]
+
+
+def speech_like(sampling_rate, seconds, channels, seed=0):
+    """Harmonics of a gliding 100-300 Hz pitch with some noise"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(sampling_rate * seconds)) / sampling_rate
+    f0 = 200 + 100 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / sampling_rate
+    audio = sum(0.2 / k * np.sin(k * phase) for k in range(1, 16))
+    audio += 0.005 * rng.standard_normal(t.shape[0])
+    if channels == 2:
+        audio = np.stack([audio, 0.9 * audio], axis=1)
+    return audio
+
+
+def bench_decode(files=20, seconds=10):
+    print(f"{files} files of {seconds} s per format, decoded to 16 kHz mono")
+    with tempfile.TemporaryDirectory() as directory:
+        for extension, sampling_rate, channels, subtype in FORMATS:
+            audio = speech_like(sampling_rate, seconds, channels)
+            paths = []
+            for i in range(files):
+                path = os.path.join(directory, f"{sampling_rate}_{channels}_{i}.{extension}")
+                sf.write(path, audio, sampling_rate, subtype=subtype)
+                paths.append(path)
+
+            times = {}
+            outputs = {}
+            for name, decode in (
+                ("ffmpeg", load_audio_ffmpeg),
+                ("soundfile", load_audio_soundfile),
+            ):
+                start = time.perf_counter()
+                outputs[name] = [decode(path, 16000) for path in paths]
+                times[name] = time.perf_counter() - start
+
+            # 10 ms at either end are left out, the resamplers start and end differently
+            difference = max(
+                np.abs(a - b)[160:-160].max()
+                for a, b in zip(outputs["soundfile"], outputs["ffmpeg"])
+            )
+            print(
+                f"{extension:>4} {sampling_rate:>5} Hz {channels} ch {subtype:>6}: "
+                f"ffmpeg {files / times['ffmpeg']:6.1f} files/s, "
+                f"soundfile {files / times['soundfile']:6.1f} files/s "
+                f"({times['ffmpeg'] / times['soundfile']:.1f}x), "
+                f"max difference {difference:.1e}"
+            )
+
+
+if __name__ == "__main__":
+    bench_decode()
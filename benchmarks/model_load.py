@@ -0,0 +1,116 @@
+import os
+import sys
+import json
+import time
+import tempfile
+
+now_dir = os.getcwd()
+sys.path.append(now_dir)
+
+import torch
+
+from rvc.configs.config import Config
+from rvc.infer.model_cache import build_synthesizer, load_voice_model
+from rvc.lib.model_file import convert_checkpoint, load_checkpoint
+
+
+def voice_model_checkpoint(version="v2", sample_rate="32000", if_f0=1, seed=0):
+    """A voice model checkpoint like extract_model writes, with random weights"""
+    with open(os.path.join("rvc", "configs", version, f"{sample_rate}.json")) as file:
+        hps = json.load(file)
+    model, data = hps["model"], hps["data"]
+    cpt = {
+        "config": [
+            data["filter_length"] // 2 + 1,
+            32,
+            model["inter_channels"],
+            model["hidden_channels"],
+            model["filter_channels"],
+            model["n_heads"],
+            model["n_layers"],
+            model["kernel_size"],
+            model["p_dropout"],
+            model["resblock"],
+            model["resblock_kernel_sizes"],
+            model["resblock_dilation_sizes"],
+            model["upsample_rates"],
+            model["upsample_initial_channel"],
+            model["upsample_kernel_sizes"],
+            model["spk_embed_dim"],
+            model["gin_channels"],
+            data["sampling_rate"],
+        ],
+        "f0": if_f0,
+        "version": version,
+        "sr": sample_rate,
+    }
+    torch.manual_seed(seed)
+    net_g = build_synthesizer(cpt, is_half=False)
+    del net_g.enc_q
+    cpt["weight"] = {
+        name: tensor.half() for name, tensor in net_g.state_dict().items()
+    }
+    return cpt
+
+
+def evict(path):
+    """Drops the pages of path from the page cache, the next read goes to disk"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def timed(function, path, cold, repeat=5):
+    """Best time of function(path), with path evicted before every run when cold"""
+    times = []
+    for _ in range(repeat):
+        if cold:
+            evict(path)
+        start = time.perf_counter()
+        function(path)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def read_weights(path):
+    """The checkpoint with every tensor read, which is what building net_g does"""
+    cpt = load_checkpoint(path)
+    return sum(float(tensor.view(-1)[-1]) for tensor in cpt["weight"].values())
+
+
+def bench_load(sample_rates=("32000", "48000")):
+    config = Config()
+    steps = (
+        ("metadata", lambda path: load_checkpoint(path, weights=False)),
+        ("weights", read_weights),
+        ("load_voice_model", lambda path: load_voice_model(path, config, backend="torch")),
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for sample_rate in sample_rates:
+            pth_path = os.path.join(directory, f"voice_{sample_rate}.pth")
+            torch.save(voice_model_checkpoint(sample_rate=sample_rate), pth_path)
+            model_file = os.path.join(directory, f"mapped_{sample_rate}.safetensors")
+            convert_checkpoint(pth_path, model_file)
+            print(f"v2 {sample_rate}: .pth {os.path.getsize(pth_path) / 2**20:.1f} MB")
+
+            # Module construction, the part of loading no file format changes
+            cpt = load_checkpoint(model_file, weights=False)
+            build_time = timed(lambda path: build_synthesizer(cpt, is_half=False), None, False)
+            print(f"  {'build_synthesizer':>16}: {build_time * 1000:7.1f} ms for either format")
+
+            for name, function in steps:
+                results = []
+                for path in (pth_path, model_file):
+                    for cold in (True, False):
+                        results.append(timed(function, path, cold) * 1000)
+                print(
+                    f"  {name:>16}: .pth cold {results[0]:7.1f} ms, warm {results[1]:7.1f} ms"
+                    f" | .safetensors cold {results[2]:7.1f} ms, warm {results[3]:7.1f} ms"
+                )
+
+
+if __name__ == "__main__":
+    bench_load()
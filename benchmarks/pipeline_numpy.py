@@ -0,0 +1,116 @@
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+now_dir = os.getcwd()
+sys.path.append(now_dir)
+
+from rvc.infer.pipeline import VC
+
+
+def autotune_f0_loop(self, f0):
+    """VC.autotune_f0 before it was vectorized"""
+    autotuned_f0 = np.zeros_like(f0)
+    for i, freq in enumerate(f0):
+        closest_note = min(self.note_dict, key=lambda x: abs(x - freq))
+        autotuned_f0[i] = closest_note
+    return autotuned_f0
+
+
+def find_split_points_loop(self, audio):
+    """The split point search of VC.pipeline before it moved to find_split_points"""
+    audio_pad = np.pad(audio, (self.window // 2, self.window // 2), mode="reflect")
+    opt_ts = []
+    audio_sum = np.zeros_like(audio)
+    for i in range(self.window):
+        audio_sum += audio_pad[i : i - self.window]
+    for t in range(self.t_center, audio.shape[0], self.t_center):
+        opt_ts.append(
+            t
+            - self.t_query
+            + np.where(
+                np.abs(audio_sum[t - self.t_query : t + self.t_query])
+                == np.abs(audio_sum[t - self.t_query : t + self.t_query]).min()
+            )[0][0]
+        )
+    return opt_ts
+
+
+def pipeline_settings(x_query=6, x_center=38):
+    """The VC attributes the two methods read, for the GPU settings of Config by default"""
+    vc = SimpleNamespace(sr=16000, window=160)
+    vc.t_query = vc.sr * x_query
+    vc.t_center = vc.sr * x_center
+    vc.ref_freqs = [
+        65.41,
+        82.41,
+        110.00,
+        146.83,
+        196.00,
+        246.94,
+        329.63,
+        440.00,
+        587.33,
+        783.99,
+        1046.50,
+    ]
+    vc.note_dict = VC.generate_interpolated_frequencies(vc)
+    return vc
+
+
+def random_audio(seconds, seed=0):
+    """Noise at 0.1 RMS in float32, like the output of load_audio"""
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal(seconds * 16000) * 0.1).astype(np.float32)
+
+
+def random_f0(frames, seed=0):
+    rng = np.random.default_rng(seed)
+    f0 = rng.uniform(50, 1100, frames)
+    f0[rng.random(frames) < 0.2] = 0
+    return f0
+
+
+def best_time(function, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def report(name, loop_time, new_time):
+    print(
+        f"{name}: loop {loop_time * 1000:9.2f} ms, vectorized {new_time * 1000:7.2f} ms "
+        f"({loop_time / new_time:.0f}x), identical"
+    )
+
+
+def bench_autotune(seconds=(10, 60, 300)):
+    vc = pipeline_settings()
+    for duration in seconds:
+        # f0 has 100 frames per second
+        f0 = random_f0(duration * 100)
+        loop_time, expected = best_time(lambda: autotune_f0_loop(vc, f0))
+        new_time, result = best_time(lambda: VC.autotune_f0(vc, f0))
+        assert np.array_equal(result, expected), "autotuned f0 differs"
+        report(f"autotune_f0 {duration:>4} s", loop_time, new_time)
+
+
+def bench_split_points(seconds=(80, 200, 600)):
+    vc = pipeline_settings()
+    for duration in seconds:
+        audio = random_audio(duration)
+        loop_time, expected = best_time(lambda: find_split_points_loop(vc, audio))
+        new_time, result = best_time(lambda: VC.find_split_points(vc, audio))
+        assert result == expected, "split points differ"
+        report(f"find_split_points {duration:>4} s", loop_time, new_time)
+
+
+if __name__ == "__main__":
+    bench_autotune()
+    bench_split_points()
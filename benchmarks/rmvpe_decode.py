@@ -0,0 +1,107 @@
+import os
+import sys
+import time
+import numpy as np
+
+now_dir = os.getcwd()
+sys.path.append(now_dir)
+
+from rvc.lib.rmvpe import RMVPE
+
+
+def to_local_average_cents_loop(self, salience, thred=0.05):
+    """RMVPE.to_local_average_cents before it was vectorized"""
+    center = np.argmax(salience, axis=1)
+    salience = np.pad(salience, ((0, 0), (4, 4)))
+    center += 4
+    todo_salience = []
+    todo_cents_mapping = []
+    starts = center - 4
+    ends = center + 5
+    for idx in range(salience.shape[0]):
+        todo_salience.append(salience[:, starts[idx] : ends[idx]][idx])
+        todo_cents_mapping.append(self.cents_mapping[starts[idx] : ends[idx]])
+    todo_salience = np.array(todo_salience)
+    todo_cents_mapping = np.array(todo_cents_mapping)
+    product_sum = np.sum(todo_salience * todo_cents_mapping, 1)
+    weight_sum = np.sum(todo_salience, 1)
+    devided = product_sum / weight_sum
+    maxx = np.max(salience, axis=1)
+    devided[maxx <= thred] = 0
+    return devided
+
+
+def decoder():
+    """RMVPE with only what decoding needs, no network weights are loaded"""
+    rmvpe = RMVPE.__new__(RMVPE)
+    cents_mapping = 20 * np.arange(360) + 1997.3794084376191
+    rmvpe.cents_mapping = np.pad(cents_mapping, (4, 4))
+    return rmvpe
+
+
+def random_salience(frames, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.random((frames, 360), dtype=np.float32)
+
+
+def best_time(function, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def bench_decode(seconds=(10, 60, 300)):
+    rmvpe = decoder()
+    for duration in seconds:
+        # RMVPE produces 100 frames per second
+        salience = random_salience(duration * 100)
+        loop_time, expected = best_time(
+            lambda: to_local_average_cents_loop(rmvpe, salience, thred=0.03)
+        )
+        new_time, result = best_time(
+            lambda: rmvpe.to_local_average_cents(salience, thred=0.03)
+        )
+        assert np.array_equal(result, expected), "decoded cents differ"
+        print(
+            f"to_local_average_cents {duration:>4} s: loop {loop_time * 1000:8.2f} ms, "
+            f"vectorized {new_time * 1000:7.2f} ms ({loop_time / new_time:.1f}x), identical"
+        )
+
+
+def chunk_boundary_difference(model_path, seconds=90, chunk_frames=3200):
+    """Largest f0 difference in cents between chunked and whole clip inference"""
+    import torch
+
+    rmvpe = RMVPE(model_path, is_half=False, device="cpu")
+    t = np.arange(seconds * 16000) / 16000
+    # A slow vibrato around A3 with some noise, voiced everywhere
+    f0 = 220 * 2 ** (np.sin(2 * np.pi * 0.3 * t) / 12)
+    audio = 0.3 * np.sin(2 * np.pi * np.cumsum(f0) / 16000)
+    audio += 0.003 * np.random.default_rng(0).standard_normal(audio.shape[0])
+    audio = audio.astype(np.float32)
+
+    with torch.no_grad():
+        rmvpe.chunk_frames = None
+        whole = rmvpe.infer_from_audio(audio, thred=0.03)
+        rmvpe.chunk_frames = chunk_frames
+        chunked = rmvpe.infer_from_audio(audio, thred=0.03)
+
+    voiced = (whole > 0) & (chunked > 0)
+    cents = np.abs(1200 * np.log2(chunked[voiced] / whole[voiced]))
+    mismatched_voicing = int(np.sum((whole > 0) != (chunked > 0)))
+    print(
+        f"RMVPE chunks of {chunk_frames} frames on {seconds} s: max f0 difference "
+        f"{cents.max():.2f} cents, {mismatched_voicing} frames with different voicing"
+    )
+    return cents.max(), mismatched_voicing
+
+
+if __name__ == "__main__":
+    bench_decode()
+    if os.path.exists("rmvpe.pt"):
+        chunk_boundary_difference("rmvpe.pt")
+    else:
+        print("rmvpe.pt not found, skipping the chunked inference comparison")
@@ -0,0 +1,195 @@
+import os
+import sys
+import time
+import hashlib
+import tempfile
+import threading
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+now_dir = os.getcwd()
+sys.path.append(now_dir)
+
+# config.settings needs these to import aws, the stub ignores credentials
+for name, value in {
+    "AWS_ACCESS_KEY_ID": "benchmark",
+    "AWS_SECRET_ACCESS_KEY": "benchmark",
+    "AWS_STORAGE_BUCKET_NAME": "benchmark",
+    "QUEUE_NAME": "benchmark",
+    "RMQ_CONNECTION_URL": "amqp://localhost",
+    "CALLBACK_URL": "http://localhost",
+    "SECRET_KEY": "benchmark",
+    "BATCH_SIZE": "6",
+}.items():
+    os.environ.setdefault(name, value)
+
+import boto3
+from botocore.config import Config as BotoConfig
+
+import aws
+from aws import AWSService
+from config import settings
+
+MB = 1024 * 1024
+
+
+class S3Stub(BaseHTTPRequestHandler):
+    """HEAD and GET of objects with Range and If-Match, like S3 path style requests.
+
+    Each response is sent at bytes_per_second, S3 limits single connections
+    in the same way and this is what ranged downloads work around.
+    """
+
+    objects = {}
+    bytes_per_second = 100 * MB
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def find(self):
+        key = self.path.split("?")[0].split("/", 2)[-1]
+        data = self.objects.get(key)
+        if data is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        return key, data
+
+    def send_object_headers(self, data, length):
+        self.send_header("Content-Length", str(length))
+        self.send_header("ETag", self.etag(data))
+        self.send_header("Last-Modified", "Thu, 01 Jan 2026 00:00:00 GMT")
+        self.end_headers()
+
+    @staticmethod
+    def etag(data):
+        return f'"{hashlib.md5(data[: 1 * MB]).hexdigest()}"'
+
+    def do_HEAD(self):
+        _, data = self.find()
+        if data is not None:
+            self.send_response(200)
+            self.send_object_headers(data, len(data))
+
+    def do_GET(self):
+        _, data = self.find()
+        if data is None:
+            return
+        if_match = self.headers.get("If-Match")
+        if if_match is not None and if_match != self.etag(data):
+            self.send_response(412)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        start, end = 0, len(data) - 1
+        byte_range = self.headers.get("Range")
+        if byte_range:
+            start, end = (int(value) for value in byte_range[6:].split("-"))
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        else:
+            self.send_response(200)
+        self.send_object_headers(data, end - start + 1)
+
+        view = memoryview(data)[start : end + 1]
+        chunk_size = MB
+        began = time.perf_counter()
+        for offset in range(0, len(view), chunk_size):
+            self.wfile.write(view[offset : offset + chunk_size])
+            ahead = (offset + chunk_size) / self.bytes_per_second
+            delay = ahead - (time.perf_counter() - began)
+            if delay > 0:
+                time.sleep(delay)
+
+
+def start_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), S3Stub)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def client_for(server):
+    return boto3.client(
+        "s3",
+        endpoint_url=f"http://127.0.0.1:{server.server_address[1]}",
+        aws_access_key_id="benchmark",
+        aws_secret_access_key="benchmark",
+        region_name="us-east-1",
+        config=BotoConfig(
+            s3={"addressing_style": "path"},
+            max_pool_connections=settings.s3_download_concurrency + 2,
+        ),
+    )
+
+
+def download_file_read(file_s3_url, path_to_save):
+    """AWSService.download_file before it streamed, the whole object in memory"""
+    file_s3_key = AWSService.get_s3_key(file_s3_url)
+    response = aws.s3.get_object(Bucket=settings.aws_storage_bucket_name, Key=file_s3_key)
+    file_content = response["Body"].read()
+    os.makedirs(os.path.dirname(path_to_save), exist_ok=True)
+    with open(path_to_save, "wb") as file:
+        file.write(file_content)
+
+
+def measure(download, url, path, trace=False):
+    """Seconds taken and the peak Python allocation in MB when traced"""
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    download(url, path)
+    elapsed = time.perf_counter() - start
+    peak = 0
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1] / MB
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def bench_download(sizes_mb=(16, 128, 512), bytes_per_second=100 * MB):
+    server = start_stub()
+    aws.s3 = client_for(server)
+    S3Stub.bytes_per_second = bytes_per_second
+    print(
+        f"Stub at {bytes_per_second // MB} MB/s per connection, ranged downloads from "
+        f"{settings.s3_download_threshold // MB} MB in "
+        f"{settings.s3_download_part_size // MB} MB parts, "
+        f"{settings.s3_download_concurrency} at a time"
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes_mb:
+            key = f"objects/{size}mb.bin"
+            data = os.urandom(size * MB)
+            S3Stub.objects[key] = data
+            url = f"https://{settings.aws_storage_bucket_name}/{key}"
+
+            results = {}
+            for name, download in (
+                ("read", download_file_read),
+                ("stream", AWSService.download_file),
+            ):
+                path = os.path.join(directory, name, f"{size}mb.bin")
+                elapsed, _ = measure(download, url, path)
+                _, peak = measure(download, url, path, trace=True)
+                with open(path, "rb") as file:
+                    assert file.read() == data, f"{name} download differs"
+                results[name] = elapsed, peak
+                os.remove(path)
+
+            (read_time, read_peak), (new_time, new_peak) = results["read"], results["stream"]
+            print(
+                f"{size:>4} MB: read {read_time:6.2f} s, peak {read_peak:7.1f} MB | "
+                f"download_file {new_time:6.2f} s, peak {new_peak:5.1f} MB "
+                f"({read_time / new_time:.1f}x)"
+            )
+            del S3Stub.objects[key]
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    bench_download()
@@ -15,6 +15,23 @@ class AppSettings(BaseSettings):
     batch_size: str = Field(env='BATCH_SIZE', default=6)
     callback_url: str = Field(env='CALLBACK_URL')
     secret_key: str = Field(env='SECRET_KEY')
+    infer_mode: str = Field(env='INFER_MODE', default='subprocess')
+    infer_workers: int = Field(env='INFER_WORKERS', default=1)
+    model_cache_mb: int = Field(env='MODEL_CACHE_MB', default=2048)
+    consumer_mode: str = Field(env='CONSUMER_MODE', default='blocking')
+    rmq_prefetch_count: int = Field(env='RMQ_PREFETCH_COUNT', default=4)
+    training_workers: int = Field(env='TRAINING_WORKERS', default=1)
+    inference_workers: int = Field(env='INFERENCE_WORKERS', default=2)
+    s3_download_threshold: int = Field(env='S3_DOWNLOAD_THRESHOLD', default=64 * 1024 * 1024)
+    s3_download_part_size: int = Field(env='S3_DOWNLOAD_PART_SIZE', default=16 * 1024 * 1024)
+    s3_download_concurrency: int = Field(env='S3_DOWNLOAD_CONCURRENCY', default=8)
+    delivery_workers: int = Field(env='DELIVERY_WORKERS', default=2)
+    delivery_queue_size: int = Field(env='DELIVERY_QUEUE_SIZE', default=32)
+    delivery_max_attempts: int = Field(env='DELIVERY_MAX_ATTEMPTS', default=8)
+    progress_flush_interval: float = Field(env='PROGRESS_FLUSH_INTERVAL', default=5.0)
+    s3_cache_dir: str = Field(env='S3_CACHE_DIR', default='cache')
+    s3_cache_max_bytes: int = Field(env='S3_CACHE_MAX_BYTES', default=20 * 1024 * 1024 * 1024)
+    metrics_port: Optional[int] = Field(default=None, env='METRICS_PORT')
 
     class Config:
         env_file = '.env'
@@ -0,0 +1,94 @@
+import atexit
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger("rvc_service")
+
+
+class CallbackClient:
+    """Sends events to the callback server over a pooled keep-alive session.
+
+    Progress events are coalesced per key and only the latest one is sent
+    every flush_interval seconds from a background thread, so callers never
+    wait on the network for them. Pending events are flushed at interpreter
+    exit; processes leaving through os._exit must call flush() themselves.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        secret_key: str,
+        retries: int = 5,
+        flush_interval: float = 5.0,
+        pool_size: int = 4,
+        timeout: float = 30.0,
+    ):
+        self.url = url
+        self.secret_key = secret_key
+        self.retries = retries
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._pending = {}
+        self._condition = threading.Condition()
+        self._thread = None
+        atexit.register(self._flush_at_exit)
+
+    def post(self, data: dict, retries: int = None) -> bool:
+        """Send data right away, returns True if the server accepted it"""
+        data = {**data, "secret_key": self.secret_key}
+
+        for _ in range(retries or self.retries):
+            try:
+                response = self.session.post(url=self.url, data=data, timeout=self.timeout)
+            except requests.exceptions.RequestException as ex:
+                logger.error(f"Error while sending callback: {ex}", exc_info=True)
+            else:
+                logger.debug(f"Response from server: {response.text}")
+                if response.status_code == 200:
+                    return True
+
+        return False
+
+    def send_progress(self, key: str, data: dict):
+        """Queue a progress event, replacing any unsent event with the same key"""
+        with self._condition:
+            self._pending[key] = data
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def flush(self, key: str = None):
+        """Send pending progress events (only the one for key, if given) now"""
+        with self._condition:
+            if key is None:
+                pending = list(self._pending.values())
+                self._pending.clear()
+            else:
+                pending = [self._pending.pop(key)] if key in self._pending else []
+
+        for data in pending:
+            self.post(data)
+
+    def _flush_at_exit(self):
+        try:
+            self.flush()
+        except Exception as ex:
+            logger.error(f"Error while flushing progress events: {ex}", exc_info=True)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as ex:
+                logger.error(f"Error while flushing progress events: {ex}", exc_info=True)
@@ -0,0 +1,193 @@
+import os
+import json
+import uuid
+import queue
+import logging
+import threading
+
+from aws import AWSService
+from rvc.lib.metrics import metrics
+
+logger = logging.getLogger("rvc_service")
+
+
+class ResultDelivery:
+    """Uploads conversion results and sends callbacks in background threads.
+
+    Every pending delivery is stored as a json file in store_dir until it
+    succeeds, so deliveries interrupted by a restart are retried on start.
+    The output file belongs to the delivery: it is removed once uploaded.
+    Deliveries that are given up move to store_dir/failed with their file
+    kept, until retry_failed queues them again or clear_failed drops them.
+    """
+
+    def __init__(
+        self,
+        service,
+        store_dir: str = "deliveries",
+        workers: int = 2,
+        queue_size: int = 32,
+        max_attempts: int = 8,
+        backoff: float = 2.0,
+        max_backoff: float = 300.0,
+    ):
+        self.service = service
+        self.store_dir = store_dir
+        self.failed_dir = os.path.join(store_dir, "failed")
+        self.workers = max(1, workers)
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.queue = queue.Queue(maxsize=queue_size)
+        self._started = False
+        self._lock = threading.Lock()
+
+        os.makedirs(self.failed_dir, exist_ok=True)
+
+    def _job_path(self, job: dict, directory: str = None) -> str:
+        return os.path.join(directory or self.store_dir, f"{job['id']}.json")
+
+    def _save(self, job: dict):
+        path = self._job_path(job)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(job, file)
+        os.replace(tmp_path, path)
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+
+        for _ in range(self.workers):
+            threading.Thread(target=self._work, daemon=True).start()
+
+        pending = [
+            name for name in sorted(os.listdir(self.store_dir)) if name.endswith(".json")
+        ]
+        if pending:
+            logger.info(f"Resuming {len(pending)} pending result deliveries")
+
+        for name in pending:
+            try:
+                with open(os.path.join(self.store_dir, name), "r") as file:
+                    job = json.load(file)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.error(f"Could not read pending delivery {name}: {e}")
+                continue
+            # Do not block start on a full queue
+            threading.Thread(target=self.queue.put, args=(job,), daemon=True).start()
+
+    def submit(self, file_id: int, output_path: str, s3_path: str):
+        """Schedule upload of output_path and callback, blocks while the queue is full"""
+        self.start()
+        job = {
+            "id": uuid.uuid4().hex,
+            "file_id": file_id,
+            "output_path": output_path,
+            "s3_path": s3_path,
+            "uploaded": False,
+            "attempts": 0,
+        }
+        self._save(job)
+        self.queue.put(job)
+
+    def _failed_jobs(self, job_id: str = None) -> list:
+        if job_id is not None:
+            names = [f"{job_id}.json"]
+        else:
+            names = [
+                name for name in sorted(os.listdir(self.failed_dir)) if name.endswith(".json")
+            ]
+
+        jobs = []
+        for name in names:
+            try:
+                with open(os.path.join(self.failed_dir, name), "r") as file:
+                    jobs.append(json.load(file))
+            except (OSError, json.JSONDecodeError) as e:
+                logger.error(f"Could not read failed delivery {name}: {e}")
+        return jobs
+
+    def retry_failed(self, job_id: str = None) -> int:
+        """Queue a given up delivery again, or all of them, returns how many"""
+        self.start()
+        jobs = self._failed_jobs(job_id)
+        for job in jobs:
+            job["attempts"] = 0
+            self._save(job)
+            os.remove(self._job_path(job, self.failed_dir))
+            self.queue.put(job)
+        return len(jobs)
+
+    def clear_failed(self, job_id: str = None) -> int:
+        """Drop a given up delivery, or all of them, with their result files"""
+        jobs = self._failed_jobs(job_id)
+        for job in jobs:
+            self._remove_output(job)
+            os.remove(self._job_path(job, self.failed_dir))
+        return len(jobs)
+
+    def _deliver(self, job: dict) -> bool:
+        if not job["uploaded"]:
+            with metrics.timer("upload"):
+                uploaded = AWSService.upload_file_to_s3(
+                    job["output_path"], s3_path=job["s3_path"]
+                )
+            if not uploaded:
+                return False
+            job["uploaded"] = True
+            self._save(job)
+            self._remove_output(job)
+
+        with metrics.timer("callback"):
+            return self.service.send_convert_result(
+                file_id=int(job["file_id"]), s3_path=job["s3_path"], retries=1
+            )
+
+    @staticmethod
+    def _remove_output(job: dict):
+        try:
+            os.remove(job["output_path"])
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Could not remove result file {job['output_path']}: {e}")
+
+    def _work(self):
+        while True:
+            job = self.queue.get()
+            try:
+                delivered = self._deliver(job)
+            except Exception as ex:
+                logger.error(f"Error while delivering result {job['s3_path']}: {ex}", exc_info=True)
+                delivered = False
+
+            try:
+                if delivered:
+                    os.remove(self._job_path(job))
+                    logger.info(f"Result delivered: {job['s3_path']}")
+                else:
+                    self._retry(job)
+            except OSError as e:
+                logger.error(f"Could not update delivery {job['id']}: {e}")
+            finally:
+                self.queue.task_done()
+
+    def _retry(self, job: dict):
+        job["attempts"] += 1
+
+        if job["attempts"] >= self.max_attempts:
+            logger.error(
+                f"Giving up delivery of {job['s3_path']} after {job['attempts']} attempts"
+            )
+            os.replace(self._job_path(job), self._job_path(job, self.failed_dir))
+            return
+
+        self._save(job)
+        delay = min(self.backoff ** job["attempts"], self.max_backoff)
+        logger.warning(f"Delivery of {job['s3_path']} failed, retrying in {delay:.0f}s")
+        timer = threading.Timer(delay, self.queue.put, args=(job,))
+        timer.daemon = True
+        timer.start()
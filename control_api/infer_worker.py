@@ -0,0 +1,176 @@
+import os
+import logging
+import threading
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Tuple
+
+from rvc.lib.metrics import metrics
+
+logger = logging.getLogger("rvc_service")
+
+INFER_MODES = ("subprocess", "inprocess", "pool")
+
+# Same defaults as the 'infer' mode of main.py
+INFER_DEFAULTS = {
+    "f0up_key": "0",
+    "filter_radius": "3",
+    "index_rate": "0.3",
+    "rms_mix_rate": "1",
+    "protect": "0.33",
+    "hop_length": "128",
+    "f0method": "rmvpe",
+    "split_audio": "False",
+    "f0autotune": "False",
+    "clean_audio": "False",
+    "clean_strength": "0.7",
+    "embedder_model": "hubert",
+    "upscale_audio": "False",
+}
+
+
+def _load_infer_module(model_cache_mb=None):
+    from rvc.infer import infer
+
+    if model_cache_mb is not None:
+        infer.model_cache.max_bytes = int(model_cache_mb) * 1024 * 1024
+
+    return infer
+
+
+def run_infer(
+    input_path: str,
+    output_path: str,
+    pth_path: str,
+    index_path: str,
+    export_format: str = "WAV",
+    **options,
+) -> Tuple[int, str]:
+    """Run conversion in the current process, returns (return_code, stderr)"""
+    options = {**INFER_DEFAULTS, **{k: str(v) for k, v in options.items()}}
+    result_path = output_path.replace(".wav", f".{export_format.lower()}")
+
+    try:
+        infer = _load_infer_module()
+
+        if os.path.exists(result_path):
+            os.remove(result_path)
+
+        infer.infer_pipeline(
+            options["f0up_key"],
+            options["filter_radius"],
+            options["index_rate"],
+            options["rms_mix_rate"],
+            options["protect"],
+            options["hop_length"],
+            options["f0method"],
+            input_path,
+            output_path,
+            pth_path,
+            index_path,
+            options["split_audio"],
+            options["f0autotune"],
+            options["clean_audio"],
+            options["clean_strength"],
+            export_format,
+            options["embedder_model"],
+            options["upscale_audio"],
+        )
+    except Exception:
+        return 1, traceback.format_exc()
+
+    # infer_pipeline reports its own errors with print, so a missing result is the only failure signal
+    if not os.path.exists(result_path):
+        return 1, f"Conversion finished without output file: {result_path}"
+
+    return 0, ""
+
+
+def _run_infer_captured(*args, **kwargs):
+    # Stage timings recorded in a pool process are sent back to the parent
+    with metrics.capture() as observations:
+        result = run_infer(*args, **kwargs)
+    return result, observations
+
+
+class InferWorker:
+    """Keeps rvc.infer.infer loaded between conversions.
+
+    'inprocess' runs conversions in the calling process one at a time,
+    'pool' runs them in long-lived child processes.
+    """
+
+    def __init__(
+        self, mode: str = "inprocess", workers: int = 1, model_cache_mb: int = None
+    ):
+        if mode not in INFER_MODES[1:]:
+            raise ValueError(f"Unsupported infer worker mode: {mode}")
+
+        self.mode = mode
+        self.workers = max(1, int(workers))
+        self.model_cache_mb = model_cache_mb
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                logger.info(f"Starting inference pool with {self.workers} workers")
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_load_infer_module,
+                    initargs=(self.model_cache_mb,),
+                )
+            return self._executor
+
+    def warmup(self):
+        """Import the inference module before the first job arrives"""
+        if self.mode == "pool":
+            self._get_executor()
+        else:
+            _load_infer_module(self.model_cache_mb)
+
+    def run(
+        self,
+        input_path: str,
+        output_path: str,
+        pth_path: str,
+        index_path: str,
+        export_format: str = "WAV",
+        **options,
+    ) -> Tuple[int, str]:
+        if self.mode == "pool":
+            future = self._get_executor().submit(
+                _run_infer_captured,
+                input_path,
+                output_path,
+                pth_path,
+                index_path,
+                export_format,
+                **options,
+            )
+            try:
+                result, observations = future.result()
+                metrics.observe_many(observations)
+                return result
+            except Exception:
+                # Child process died (e.g. out of memory), the pool has to be rebuilt
+                with self._lock:
+                    if self._executor is not None:
+                        self._executor.shutdown(wait=False, cancel_futures=True)
+                    self._executor = None
+                return 1, traceback.format_exc()
+
+        # Module level state in rvc.infer.infer is not thread safe
+        with self._lock:
+            return run_infer(
+                input_path, output_path, pth_path, index_path, export_format, **options
+            )
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
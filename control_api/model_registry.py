@@ -0,0 +1,153 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import List, Optional
+
+logger = logging.getLogger("rvc_service")
+
+MODEL_FILE_KINDS = ("pth", "index")
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class ModelRegistry:
+    """Model paths, sizes, hashes and usage times stored in SQLite (WAL mode)"""
+
+    def __init__(self, db_path: str = "models.db", legacy_json_path: str = "models.json"):
+        self.db_path = db_path
+        self._local = threading.local()
+
+        connection = self._connection()
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS models (
+                model_name TEXT PRIMARY KEY,
+                pth_path TEXT,
+                pth_size INTEGER,
+                pth_hash TEXT,
+                index_path TEXT,
+                index_size INTEGER,
+                index_hash TEXT,
+                updated_at REAL,
+                last_used_at REAL
+            )
+            """
+        )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS models_last_used_at ON models (last_used_at)"
+        )
+
+        self._import_json(legacy_json_path)
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _import_json(self, json_path: str):
+        """One time import of the registry previously kept in models.json"""
+        if not os.path.exists(json_path):
+            return
+
+        connection = self._connection()
+        if connection.execute("SELECT COUNT(*) FROM models").fetchone()[0]:
+            return
+
+        try:
+            with open(json_path, "r") as file:
+                data = json.load(file)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Could not import {json_path}: {e}")
+            return
+
+        now = time.time()
+        connection.executemany(
+            "INSERT OR IGNORE INTO models (model_name, pth_path, index_path, updated_at) "
+            "VALUES (?, ?, ?, ?)",
+            [
+                (model_name, model_data.get("pth_path"), model_data.get("index_path"), now)
+                for model_name, model_data in data.items()
+            ],
+        )
+        logger.info(f"Imported {len(data)} models from {json_path}")
+
+    def add_model_info(
+        self, model_name: str, pth_path: str = None, index_path: str = None
+    ):
+        """Insert or update model info"""
+        print(f"Adding model info for {model_name}")
+
+        values = {"updated_at": time.time()}
+        for kind, path in zip(MODEL_FILE_KINDS, (pth_path, index_path)):
+            if path is None:
+                continue
+            values[f"{kind}_path"] = path
+            values[f"{kind}_size"] = None
+            values[f"{kind}_hash"] = None
+            if os.path.exists(path):
+                values[f"{kind}_size"] = os.path.getsize(path)
+                values[f"{kind}_hash"] = file_sha256(path)
+
+        columns = ", ".join(values)
+        placeholders = ", ".join("?" for _ in values)
+        updates = ", ".join(f"{column} = excluded.{column}" for column in values)
+
+        try:
+            self._connection().execute(
+                f"INSERT INTO models (model_name, {columns}) VALUES (?, {placeholders}) "
+                f"ON CONFLICT (model_name) DO UPDATE SET {updates}",
+                (model_name, *values.values()),
+            )
+        except sqlite3.Error as e:
+            logger.error(f"Error while try write model info: {e}")
+
+    def get_model_data(self, model_name: str) -> Optional[dict]:
+        """Returns model info dict"""
+        try:
+            row = (
+                self._connection()
+                .execute("SELECT * FROM models WHERE model_name = ?", (model_name,))
+                .fetchone()
+            )
+        except sqlite3.Error as e:
+            logger.error(f"Error while try to read model info: {e}")
+            return None
+
+        return dict(row) if row is not None else None
+
+    def touch(self, model_name: str):
+        """Mark model as used now"""
+        try:
+            self._connection().execute(
+                "UPDATE models SET last_used_at = ? WHERE model_name = ?",
+                (time.time(), model_name),
+            )
+        except sqlite3.Error as e:
+            logger.error(f"Error while try to update model usage: {e}")
+
+    def least_recently_used(self, limit: int = 10) -> List[dict]:
+        """Models ordered from the longest unused, never used models first"""
+        rows = self._connection().execute(
+            "SELECT * FROM models ORDER BY last_used_at IS NOT NULL, last_used_at LIMIT ?",
+            (limit,),
+        )
+        return [dict(row) for row in rows]
+
+
+model_registry = ModelRegistry()
@@ -1,17 +1,22 @@
 import queue
 import subprocess
+import time
 import logging
-import json
 import threading
+import uuid
 
 import botocore
-import requests
 import os
 from typing import List
-import fcntl
 
 from aws import AWSService
 from config import settings
+from control_api.infer_worker import InferWorker
+from control_api.delivery import ResultDelivery
+from control_api.callback_client import CallbackClient
+from control_api.model_registry import model_registry
+from control_api.s3_cache import S3Cache
+from rvc.lib.metrics import metrics
 
 logger = logging.getLogger("rvc_service")
 logger.setLevel(logging.DEBUG)
@@ -35,12 +40,35 @@ class RVCService:
         self.files_for_process_dir = "files"
         self.logs_dir = logs_dir
         self.batch_size = settings.batch_size
-        self.data_file = "models.json"
         self.callback_url = settings.callback_url
         self.requests_retry = 5
         self.python_command = "python"
         self.main_py_path = "main.py"
         self.s3_results_path = "received_from_rvc"
+        self.callback_client = CallbackClient(
+            url=self.callback_url,
+            secret_key=settings.secret_key,
+            retries=self.requests_retry,
+            flush_interval=settings.progress_flush_interval,
+        )
+        self.s3_cache = S3Cache(
+            root=settings.s3_cache_dir, max_bytes=settings.s3_cache_max_bytes
+        )
+        self.infer_mode = settings.infer_mode
+        self.infer_worker = None
+        self.delivery = ResultDelivery(
+            self,
+            workers=settings.delivery_workers,
+            queue_size=settings.delivery_queue_size,
+            max_attempts=settings.delivery_max_attempts,
+        )
+
+        if self.infer_mode != "subprocess":
+            self.infer_worker = InferWorker(
+                mode=self.infer_mode,
+                workers=settings.infer_workers,
+                model_cache_mb=settings.model_cache_mb,
+            )
 
         for path in (
             self.files_for_process_dir,
@@ -50,94 +78,29 @@ class RVCService:
             if not os.path.exists(path):
                 os.makedirs(path)
 
-        if not os.path.exists(self.data_file):
-            with open(self.data_file, "w") as file:
-                json.dump({}, file)
-
     def add_model_info(
         self, model_name: str, pth_path: str = None, index_path: str = None
     ):
-        """Insert model info in json file"""
-        print(f"Adding model info for {model_name}")
-
-        try:
-            with open(self.data_file, "r+") as file:
-                fcntl.flock(file, fcntl.LOCK_EX)
-
-                try:
-                    data = json.load(file)
-                except (json.JSONDecodeError, FileNotFoundError):
-                    data = {}
-
-                model_data = data.get(model_name, dict())
-
-                if pth_path is not None:
-                    model_data["pth_path"] = pth_path
-
-                if index_path is not None:
-                    model_data["index_path"] = index_path
-
-                data[model_name] = model_data
-
-                file.seek(0)
-                file.truncate()
-
-                json.dump(data, file, indent=4)
-
-        except IOError as e:
-            logger.error(f"Error while try write data to json file: {e}")
+        """Insert model info in model registry"""
+        model_registry.add_model_info(
+            model_name=model_name, pth_path=pth_path, index_path=index_path
+        )
 
     def get_model_data(self, model_name: str):
         """Returns model info dict"""
-        try:
-            with open(self.data_file, "r") as file:
-                fcntl.flock(file, fcntl.LOCK_SH)
-
-                try:
-                    data = json.load(file)
-                except json.JSONDecodeError:
-                    return None
-
-                return data.get(model_name, None)
-        except IOError as e:
-            logger.error(f"Error while try to read data from json file: {e}")
-            return None
+        return model_registry.get_model_data(model_name)
 
-    def send_callback_data(self, data: dict) -> None:
-        """Send data to server"""
-
-        data.update(secret_key=settings.secret_key)
-
-        for _ in range(self.requests_retry):
-            try:
-                response = requests.post(
-                    url=self.callback_url,
-                    data=data,
-                )
-            except requests.exceptions.RequestException as ex:
-                logger.error(f"Error while sending callback: {ex}", exc_info=True)
-            else:
-                logger.debug(f"Response from server: {response.json()}")
-                if response.status_code == 200:
-                    break
+    def send_callback_data(self, data: dict, retries: int = None) -> bool:
+        """Send data to server, returns True if the server accepted it"""
+        return self.callback_client.post(data, retries=retries)
 
     def download_model(
         self, model_name: str, pth_file_s3_path: str, index_file_s3_path: str
     ):
 
-        pth_save_dir = self.logs_dir
-        index_save_dir = os.path.join(self.logs_dir, model_name)
-
-        pth_save_path = os.path.join(pth_save_dir, pth_file_s3_path.split("/")[-1])
-        index_save_path = os.path.join(
-            index_save_dir, index_file_s3_path.split("/")[-1]
-        )
-
-        if not os.path.exists(index_save_dir):
-            os.makedirs(index_save_dir)
         try:
-            AWSService.download_file(pth_file_s3_path, pth_save_path)
-            AWSService.download_file(index_file_s3_path, index_save_path)
+            pth_save_path = self.s3_cache.fetch(pth_file_s3_path)
+            index_save_path = self.s3_cache.fetch(index_file_s3_path)
         except IOError as e:
             logger.error(f"IO error while download model: {e}", exc_info=True)
         except Exception as ex:
@@ -162,9 +125,17 @@ class RVCService:
             "current_epoch": current_epoch,
         }
 
+        # Epoch updates are coalesced and sent in background
+        if model_status is None:
+            self.callback_client.send_progress(model_name, data)
+            return
+
+        # Do not let an older epoch update arrive after the status change, and
+        # send everything else pending since the process may exit right after
+        self.callback_client.flush()
         self.send_callback_data(data)
 
-    def send_convert_result(self, file_id: int, s3_path: str):
+    def send_convert_result(self, file_id: int, s3_path: str, retries: int = None) -> bool:
         """Send converted result to server"""
 
         data = {
@@ -173,7 +144,7 @@ class RVCService:
             "s3_path": s3_path,
         }
 
-        self.send_callback_data(data)
+        return self.send_callback_data(data, retries=retries)
 
     def retrieve_command(self, command_data: dict):
         """Retrieve command from ampq"""
@@ -370,6 +341,15 @@ class RVCService:
         index_path: str,
         export_format: str = "WAV",
     ):
+        if self.infer_worker is not None:
+            return self.infer_worker.run(
+                input_path=input_path,
+                output_path=output_path,
+                pth_path=pth_path,
+                index_path=index_path,
+                export_format=export_format,
+            )
+
         command = [
             self.python_command,
             self.main_py_path,
@@ -470,19 +450,23 @@ class RVCService:
         export_format: str,
     ):
         filename = file_aws_url.rsplit("/", maxsplit=1)[-1]
-        full_path = os.path.join(self.files_for_process_dir, filename)
 
-        filename_with_ext = filename.split(".")[0] + ".wav"
-        output_path = os.path.join(self.results_path, filename_with_ext)
-        s3_path = f"{self.s3_results_path}/{filename_with_ext}"
+        # Results are uploaded in background, so every job writes its own file
+        # and a later job with the same input name cannot replace it before upload
+        result_name = f"{filename.split('.')[0]}_{file_id}_{uuid.uuid4().hex}"
+        output_path = os.path.join(self.results_path, result_name + ".wav")
 
-        logger.info(f"Running inference on {filename_with_ext}")
+        logger.info(f"Running inference on {filename} into {output_path}")
 
-        AWSService.download_file(file_aws_url, full_path)
+        job_started = time.perf_counter()
+        full_path = self.s3_cache.fetch(file_aws_url)
 
         model_data = rvc_service.get_model_data(model_name=model_name)
 
-        if model_data is None:
+        if model_data is None or not all(
+            model_data.get(key) and os.path.exists(model_data[key])
+            for key in ("pth_path", "index_path")
+        ):
             logger.error(f"Model data not found locally: {model_name}")
             try:
                 self.download_model(
@@ -498,6 +482,8 @@ class RVCService:
             else:
                 model_data = rvc_service.get_model_data(model_name=model_name)
 
+        model_registry.touch(model_name)
+
         return_code, stderr = self.run_infer_command(
             input_path=full_path,
             output_path=output_path,
@@ -506,27 +492,22 @@ class RVCService:
             export_format=export_format,
         )
 
+        metrics.observe("inference_job", time.perf_counter() - job_started)
+
         if return_code != 0:
             logger.error(f"File processing failed, stop execution. Errors: {stderr}")
             return
         else:
             logger.info("File processing succeeded")
 
-            try:
-                if export_format != 'WAV':
-                    output_path = output_path.replace(".wav", "." + export_format.lower())
-                    s3_path = output_path.replace(".wav", "." + export_format.lower())
+            if export_format != 'WAV':
+                output_path = output_path.replace(".wav", "." + export_format.lower())
+            s3_path = f"{self.s3_results_path}/{os.path.basename(output_path)}"
 
-                AWSService.upload_file_to_s3(output_path, s3_path=s3_path)
+            try:
+                self.delivery.submit(file_id=file_id, output_path=output_path, s3_path=s3_path)
             except Exception as ex:
-                logger.error(f"Error while trying to upload model info: {ex}", exc_info=True)
-
-            else:
-
-                try:
-                    self.send_convert_result(file_id=int(file_id), s3_path=s3_path)
-                except Exception as ex:
-                    logger.error(f"Error while trying to send convert result: {ex}", exc_info=True)
+                logger.error(f"Error while scheduling result delivery: {ex}", exc_info=True)
 
 
 rvc_service = RVCService(source_save_path="sources", results_path="results")
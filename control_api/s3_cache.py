@@ -0,0 +1,186 @@
+import os
+import time
+import uuid
+import fcntl
+import sqlite3
+import hashlib
+import logging
+import threading
+
+from aws import AWSService
+from control_api.model_registry import file_sha256
+from rvc.lib.metrics import metrics
+
+logger = logging.getLogger("rvc_service")
+
+
+class S3Cache:
+    """Local copies of S3 objects keyed by S3 key and ETag.
+
+    Files are stored once per content hash, so objects with identical
+    content share a single blob. Blobs are evicted least recently used
+    once their total size exceeds max_bytes, except blobs used within the
+    last min_age seconds which may still be read by another worker.
+
+    Inference writes derived files next to the models it loads, like
+    <blob>.safetensors or <blob>.index.vectors.npy. Those companions of a
+    blob count towards max_bytes and are evicted together with it.
+    """
+
+    def __init__(self, root: str = "cache", max_bytes: int = 20 * 1024**3, min_age: float = 600.0):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.min_age = min_age
+        self.blobs_dir = os.path.join(root, "blobs")
+        self.locks_dir = os.path.join(root, "locks")
+        self.tmp_dir = os.path.join(root, "tmp")
+        self.db_path = os.path.join(root, "cache.db")
+        self._local = threading.local()
+
+        for path in (self.blobs_dir, self.locks_dir, self.tmp_dir):
+            os.makedirs(path, exist_ok=True)
+
+        connection = self._connection()
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                s3_key TEXT NOT NULL,
+                etag TEXT NOT NULL,
+                blob TEXT NOT NULL,
+                PRIMARY KEY (s3_key, etag)
+            )
+            """
+        )
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS blobs (
+                blob TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                last_used_at REAL NOT NULL
+            )
+            """
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS entries_blob ON entries (blob)")
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _blob_path(self, blob: str) -> str:
+        return os.path.join(self.blobs_dir, blob)
+
+    def _lookup(self, s3_key: str, etag: str):
+        row = (
+            self._connection()
+            .execute(
+                "SELECT blob FROM entries WHERE s3_key = ? AND etag = ?", (s3_key, etag)
+            )
+            .fetchone()
+        )
+        if row is None or not os.path.exists(self._blob_path(row[0])):
+            return None
+
+        self._connection().execute(
+            "UPDATE blobs SET last_used_at = ? WHERE blob = ?", (time.time(), row[0])
+        )
+        return self._blob_path(row[0])
+
+    def fetch(self, file_s3_url: str) -> str:
+        """Returns local path of the S3 object, downloading it if needed"""
+        s3_key = AWSService.get_s3_key(file_s3_url)
+        etag = AWSService.head_file(file_s3_url)["ETag"]
+
+        path = self._lookup(s3_key, etag)
+        if path is not None:
+            logger.info(f"Using cached {s3_key}")
+            return path
+
+        # Only one worker downloads a given key, the others wait and reuse it
+        key_hash = hashlib.sha1(s3_key.encode()).hexdigest()
+        with open(os.path.join(self.locks_dir, key_hash + ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+            path = self._lookup(s3_key, etag)
+            if path is not None:
+                return path
+
+            extension = os.path.splitext(s3_key)[1].lower()
+            tmp_path = os.path.join(self.tmp_dir, uuid.uuid4().hex + extension)
+            try:
+                with metrics.timer("download"):
+                    etag = AWSService.download_file(file_s3_url, tmp_path)
+                blob = file_sha256(tmp_path) + extension
+                size = os.path.getsize(tmp_path)
+
+                if os.path.exists(self._blob_path(blob)):
+                    logger.info(f"{s3_key} has the same content as a cached file")
+                    os.remove(tmp_path)
+                else:
+                    os.replace(tmp_path, self._blob_path(blob))
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+            connection = self._connection()
+            connection.execute(
+                "INSERT INTO blobs (blob, size, last_used_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (blob) DO UPDATE SET last_used_at = excluded.last_used_at",
+                (blob, size, time.time()),
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO entries (s3_key, etag, blob) VALUES (?, ?, ?)",
+                (s3_key, etag, blob),
+            )
+
+        self.evict()
+        return self._blob_path(blob)
+
+    def _companions(self, blobs: set) -> dict:
+        """Paths and total size of the derived files of every blob, by blob hash"""
+        stems = {blob.partition(".")[0] for blob in blobs}
+        companions = {}
+        with os.scandir(self.blobs_dir) as entries:
+            for entry in entries:
+                stem = entry.name.partition(".")[0]
+                if entry.name in blobs or stem not in stems:
+                    continue
+                try:
+                    size = entry.stat().st_size
+                except FileNotFoundError:
+                    continue
+                paths, total = companions.get(stem, ([], 0))
+                paths.append(entry.path)
+                companions[stem] = (paths, total + size)
+        return companions
+
+    def evict(self):
+        connection = self._connection()
+        sizes = dict(connection.execute("SELECT blob, size FROM blobs").fetchall())
+        companions = self._companions(set(sizes))
+        total = sum(sizes.values()) + sum(size for _, size in companions.values())
+        if total <= self.max_bytes:
+            return
+
+        candidates = connection.execute(
+            "SELECT blob, size FROM blobs WHERE last_used_at < ? ORDER BY last_used_at",
+            (time.time() - self.min_age,),
+        ).fetchall()
+
+        for blob, size in candidates:
+            if total <= self.max_bytes:
+                break
+            connection.execute("DELETE FROM entries WHERE blob = ?", (blob,))
+            connection.execute("DELETE FROM blobs WHERE blob = ?", (blob,))
+            paths, companions_size = companions.get(blob.partition(".")[0], ([], 0))
+            for path in [self._blob_path(blob)] + paths:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total -= size + companions_size
+            logger.info(f"Evicted {blob} from S3 cache")
@@ -1,12 +1,19 @@
 import os
 import sys
-import json
-import argparse
 import subprocess
 
 now_dir = os.getcwd()
 sys.path.append(now_dir)
 
+# In stream mode stdout carries the audio. Keep a private copy of it for the
+# PCM and point fd 1 at stderr before any import can print to it, including
+# Config() below and output of native libraries.
+pcm_output = None
+if len(sys.argv) > 1 and sys.argv[1] == "stream":
+    sys.stdout.flush()
+    pcm_output = os.fdopen(os.dup(1), "wb")
+    os.dup2(2, 1)
+
 from rvc.configs.config import Config
 
 from rvc.lib.tools.prerequisites_download import prequisites_download_pipeline
@@ -15,9 +22,15 @@ from rvc.lib.tools.pretrained_selector import pretrained_selector
 
 from rvc.train.process.model_blender import model_blender
 from rvc.train.process.model_information import model_information
+from rvc.lib.model_file import convert_checkpoints
+from rvc.lib.embedder import convert_embedder, check_embedder
+from rvc.lib.utils import EMBEDDING_MODELS
+from rvc.infer.onnx_backend import check_onnx_parity
+from rvc.infer.quantize import check_quantization
 from rvc.train.process.extract_small_model import extract_small_model
 
-from rvc.infer.infer import infer_pipeline
+from rvc.infer.infer import infer_pipeline, infer_multi_pipeline
+from rvc.infer.stream import stream_pipeline
 
 from rvc.lib.tools.analyzer import analyze_audio
 
@@ -25,16 +38,12 @@ from rvc.lib.tools.launch_tensorboard import launch_tensorboard_pipeline
 
 from rvc.lib.tools.model_download import model_download_pipeline
 
+from rvc.lib.tools.arguments import parse_arguments
+
 config = Config()
 current_script_directory = os.path.dirname(os.path.realpath(__file__))
 logs_path = os.path.join(current_script_directory, "logs")
 
-# Get TTS Voices
-with open(os.path.join("rvc", "lib", "tools", "tts_voices.json"), "r") as f:
-    voices_data = json.load(f)
-
-locales = list({voice["Locale"] for voice in voices_data})
-
 
 # Infer
 def run_infer_script(
@@ -85,6 +94,87 @@ def run_infer_script(
     )
 
 
+# Multi infer
+def run_multi_infer_script(
+    f0up_keys,
+    filter_radius,
+    index_rate,
+    rms_mix_rate,
+    protect,
+    hop_length,
+    f0method,
+    input_path,
+    output_folder,
+    pth_paths,
+    index_paths,
+    f0autotune,
+    export_format,
+    embedder_model,
+):
+    f0autotune = "True" if str(f0autotune) == "True" else "False"
+    if not index_paths:
+        index_paths = [""] * len(pth_paths)
+    if len(f0up_keys) == 1:
+        f0up_keys = f0up_keys * len(pth_paths)
+    if len(index_paths) != len(pth_paths) or len(f0up_keys) != len(pth_paths):
+        message = "Number of index paths and f0up keys must match the number of models."
+        print(message)
+        return message
+
+    output_paths = infer_multi_pipeline(
+        f0up_keys,
+        filter_radius,
+        index_rate,
+        rms_mix_rate,
+        protect,
+        hop_length,
+        f0method,
+        input_path,
+        output_folder,
+        pth_paths,
+        index_paths,
+        f0autotune,
+        export_format,
+        embedder_model,
+    )
+    return f"File {input_path} inferred with {len(output_paths)} models."
+
+
+# Stream infer
+def run_stream_script(
+    f0up_key,
+    filter_radius,
+    index_rate,
+    protect,
+    hop_length,
+    f0method,
+    pth_path,
+    index_path,
+    f0autotune,
+    embedder_model,
+    block_time,
+    context_time,
+    crossfade_time,
+):
+    f0autotune = "True" if str(f0autotune) == "True" else "False"
+    stream_pipeline(
+        f0up_key,
+        filter_radius,
+        index_rate,
+        protect,
+        hop_length,
+        f0method,
+        pth_path,
+        index_path,
+        f0autotune,
+        embedder_model,
+        block_time,
+        context_time,
+        crossfade_time,
+        output=pcm_output,
+    )
+
+
 # Batch infer
 def run_batch_infer_script(
     f0up_key,
@@ -406,6 +496,33 @@ def run_model_blender_script(model_name, pth_path_1, pth_path_2, ratio):
     return message, model_blended
 
 
+# Model convert
+def run_model_convert_script(pth_path):
+    converted = convert_checkpoints(pth_path)
+    return f"{len(converted)} model(s) converted."
+
+
+# Embedder convert
+def run_embedder_convert_script(embedder_model, check):
+    model_path = EMBEDDING_MODELS[embedder_model]
+    convert_embedder(model_path)
+    if check:
+        check_embedder(model_path)
+    return f"Embedder {embedder_model} converted."
+
+
+# ONNX check
+def run_onnx_check_script(input_path, pth_path, embedder_model):
+    result = check_onnx_parity(input_path, pth_path, embedder_model)
+    return "ONNX check passed." if result["passed"] else "ONNX check failed."
+
+
+# Quantize check
+def run_quantize_check_script(input_paths, pth_path, embedder_model, f0method):
+    results = check_quantization(input_paths, pth_path, embedder_model, f0method)
+    return f"Quantization checked on {len(results)} file(s)."
+
+
 # Tensorboard
 def run_tensorboard_script():
     launch_tensorboard_pipeline()
@@ -446,724 +563,6 @@ def run_api_script(ip, port):
     subprocess.run(command)
 
 
-# Parse arguments
-def parse_arguments():
-    parser = argparse.ArgumentParser(
-        description="Run the main.py script with specific parameters."
-    )
-    subparsers = parser.add_subparsers(
-        title="subcommands", dest="mode", help="Choose a mode"
-    )
-
-    # Parser for 'infer' mode
-    infer_parser = subparsers.add_parser("infer", help="Run inference")
-    infer_parser.add_argument(
-        "--f0up_key",
-        type=str,
-        help="Value for f0up_key",
-        choices=[str(i) for i in range(-24, 25)],
-        default="0",
-    )
-    infer_parser.add_argument(
-        "--filter_radius",
-        type=str,
-        help="Value for filter_radius",
-        choices=[str(i) for i in range(11)],
-        default="3",
-    )
-    infer_parser.add_argument(
-        "--index_rate",
-        type=str,
-        help="Value for index_rate",
-        choices=[str(i / 10) for i in range(11)],
-        default="0.3",
-    )
-    infer_parser.add_argument(
-        "--rms_mix_rate",
-        type=str,
-        help="Value for rms_mix_rate",
-        choices=[str(i / 10) for i in range(11)],
-        default="1",
-    )
-    infer_parser.add_argument(
-        "--protect",
-        type=str,
-        help="Value for protect",
-        choices=[str(i / 10) for i in range(6)],
-        default="0.33",
-    )
-    infer_parser.add_argument(
-        "--hop_length",
-        type=str,
-        help="Value for hop_length",
-        choices=[str(i) for i in range(1, 513)],
-        default="128",
-    )
-    infer_parser.add_argument(
-        "--f0method",
-        type=str,
-        help="Value for f0method",
-        choices=[
-            "pm",
-            "harvest",
-            "dio",
-            "crepe",
-            "crepe-tiny",
-            "rmvpe",
-            "fcpe",
-            "hybrid[crepe+rmvpe]",
-            "hybrid[crepe+fcpe]",
-            "hybrid[rmvpe+fcpe]",
-            "hybrid[crepe+rmvpe+fcpe]",
-        ],
-        default="rmvpe",
-    )
-    infer_parser.add_argument("--input_path", type=str, help="Input path")
-    infer_parser.add_argument("--output_path", type=str, help="Output path")
-    infer_parser.add_argument("--pth_path", type=str, help="Path to the .pth file")
-    infer_parser.add_argument(
-        "--index_path",
-        type=str,
-        help="Path to the .index file",
-    )
-    infer_parser.add_argument(
-        "--split_audio",
-        type=str,
-        help="Enable split audio",
-        choices=["True", "False"],
-        default="False",
-    )
-    infer_parser.add_argument(
-        "--f0autotune",
-        type=str,
-        help="Enable autotune",
-        choices=["True", "False"],
-        default="False",
-    )
-    infer_parser.add_argument(
-        "--clean_audio",
-        type=str,
-        help="Enable clean audio",
-        choices=["True", "False"],
-        default="False",
-    )
-    infer_parser.add_argument(
-        "--clean_strength",
-        type=str,
-        help="Value for clean_strength",
-        choices=[str(i / 10) for i in range(11)],
-        default="0.7",
-    )
-    infer_parser.add_argument(
-        "--export_format",
-        type=str,
-        help="Export format",
-        choices=["WAV", "MP3", "FLAC", "OGG", "M4A"],
-        default="WAV",
-    )
-    infer_parser.add_argument(
-        "--embedder_model",
-        type=str,
-        help="Embedder model",
-        choices=["contentvec", "hubert"],
-        default="hubert",
-    )
-    infer_parser.add_argument(
-        "--upscale_audio",
-        type=str,
-        help="Enable audio upscaling",
-        choices=["True", "False"],
-        default="False",
-    )
-
-    # Parser for 'batch_infer' mode
-    batch_infer_parser = subparsers.add_parser(
-        "batch_infer", help="Run batch inference"
-    )
-    batch_infer_parser.add_argument(
-        "--f0up_key",
-        type=str,
-        help="Value for f0up_key",
-        choices=[str(i) for i in range(-24, 25)],
-        default="0",
-    )
-    batch_infer_parser.add_argument(
-        "--filter_radius",
-        type=str,
-        help="Value for filter_radius",
-        choices=[str(i) for i in range(11)],
-        default="3",
-    )
-    batch_infer_parser.add_argument(
-        "--index_rate",
-        type=str,
-        help="Value for index_rate",
-        choices=[str(i / 10) for i in range(11)],
-        default="0.3",
-    )
-    batch_infer_parser.add_argument(
-        "--rms_mix_rate",
-        type=str,
-        help="Value for rms_mix_rate",
-        choices=[str(i / 10) for i in range(11)],
-        default="1",
-    )
-    batch_infer_parser.add_argument(
-        "--protect",
-        type=str,
-        help="Value for protect",
-        choices=[str(i / 10) for i in range(6)],
-        default="0.33",
-    )
-    batch_infer_parser.add_argument(
-        "--hop_length",
-        type=str,
-        help="Value for hop_length",
-        choices=[str(i) for i in range(1, 513)],
-        default="128",
-    )
-    batch_infer_parser.add_argument(
-        "--f0method",
-        type=str,
-        help="Value for f0method",
-        choices=[
-            "pm",
-            "harvest",
-            "dio",
-            "crepe",
-            "crepe-tiny",
-            "rmvpe",
-            "fcpe",
-            "hybrid[crepe+rmvpe]",
-            "hybrid[crepe+fcpe]",
-            "hybrid[rmvpe+fcpe]",
-            "hybrid[crepe+rmvpe+fcpe]",
-        ],
-        default="rmvpe",
-    )
-    batch_infer_parser.add_argument("--input_folder", type=str, help="Input folder")
-    batch_infer_parser.add_argument("--output_folder", type=str, help="Output folder")
-    batch_infer_parser.add_argument(
-        "--pth_path", type=str, help="Path to the .pth file"
-    )
-    batch_infer_parser.add_argument(
-        "--index_path",
-        type=str,
-        help="Path to the .index file",
-    )
-    batch_infer_parser.add_argument(
-        "--split_audio",
-        type=str,
-        help="Enable split audio",
-        choices=["True", "False"],
-        default="False",
-    )
-    batch_infer_parser.add_argument(
-        "--f0autotune",
-        type=str,
-        help="Enable autotune",
-        choices=["True", "False"],
-        default="False",
-    )
-    batch_infer_parser.add_argument(
-        "--clean_audio",
-        type=str,
-        help="Enable clean audio",
-        choices=["True", "False"],
-        default="False",
-    )
-    batch_infer_parser.add_argument(
-        "--clean_strength",
-        type=str,
-        help="Value for clean_strength",
-        choices=[str(i / 10) for i in range(11)],
-        default="0.7",
-    )
-    batch_infer_parser.add_argument(
-        "--export_format",
-        type=str,
-        help="Export format",
-        choices=["WAV", "MP3", "FLAC", "OGG", "M4A"],
-        default="WAV",
-    )
-    batch_infer_parser.add_argument(
-        "--embedder_model",
-        type=str,
-        help="Embedder model",
-        choices=["contentvec", "hubert"],
-        default="hubert",
-    )
-    batch_infer_parser.add_argument(
-        "--upscale_audio",
-        type=str,
-        help="Enable audio upscaling",
-        choices=["True", "False"],
-        default="False",
-    )
-
-    # Parser for 'tts' mode
-    tts_parser = subparsers.add_parser("tts", help="Run TTS")
-    tts_parser.add_argument(
-        "--tts_text",
-        type=str,
-        help="Text to be synthesized",
-    )
-    tts_parser.add_argument(
-        "--tts_voice",
-        type=str,
-        help="Voice to be used",
-        choices=locales,
-    )
-    tts_parser.add_argument(
-        "--f0up_key",
-        type=str,
-        help="Value for f0up_key",
-        choices=[str(i) for i in range(-24, 25)],
-        default="0",
-    )
-    tts_parser.add_argument(
-        "--filter_radius",
-        type=str,
-        help="Value for filter_radius",
-        choices=[str(i) for i in range(11)],
-        default="3",
-    )
-    tts_parser.add_argument(
-        "--index_rate",
-        type=str,
-        help="Value for index_rate",
-        choices=[str(i / 10) for i in range(11)],
-        default="0.3",
-    )
-    tts_parser.add_argument(
-        "--rms_mix_rate",
-        type=str,
-        help="Value for rms_mix_rate",
-        choices=[str(i / 10) for i in range(11)],
-        default="1",
-    )
-    tts_parser.add_argument(
-        "--protect",
-        type=str,
-        help="Value for protect",
-        choices=[str(i / 10) for i in range(6)],
-        default="0.33",
-    )
-    tts_parser.add_argument(
-        "--hop_length",
-        type=str,
-        help="Value for hop_length",
-        choices=[str(i) for i in range(1, 513)],
-        default="128",
-    )
-    tts_parser.add_argument(
-        "--f0method",
-        type=str,
-        help="Value for f0method",
-        choices=[
-            "pm",
-            "harvest",
-            "dio",
-            "crepe",
-            "crepe-tiny",
-            "rmvpe",
-            "fcpe",
-            "hybrid[crepe+rmvpe]",
-            "hybrid[crepe+fcpe]",
-            "hybrid[rmvpe+fcpe]",
-            "hybrid[crepe+rmvpe+fcpe]",
-        ],
-        default="rmvpe",
-    )
-    tts_parser.add_argument("--output_tts_path", type=str, help="Output tts path")
-    tts_parser.add_argument("--output_rvc_path", type=str, help="Output rvc path")
-    tts_parser.add_argument("--pth_path", type=str, help="Path to the .pth file")
-    tts_parser.add_argument(
-        "--index_path",
-        type=str,
-        help="Path to the .index file",
-    )
-    tts_parser.add_argument(
-        "--split_audio",
-        type=str,
-        help="Enable split audio",
-        choices=["True", "False"],
-        default="False",
-    )
-    tts_parser.add_argument(
-        "--f0autotune",
-        type=str,
-        help="Enable autotune",
-        choices=["True", "False"],
-        default="False",
-    )
-    tts_parser.add_argument(
-        "--clean_audio",
-        type=str,
-        help="Enable clean audio",
-        choices=["True", "False"],
-        default="False",
-    )
-    tts_parser.add_argument(
-        "--clean_strength",
-        type=str,
-        help="Value for clean_strength",
-        choices=[str(i / 10) for i in range(11)],
-        default="0.7",
-    )
-    tts_parser.add_argument(
-        "--export_format",
-        type=str,
-        help="Export format",
-        choices=["WAV", "MP3", "FLAC", "OGG", "M4A"],
-        default="WAV",
-    )
-    tts_parser.add_argument(
-        "--embedder_model",
-        type=str,
-        help="Embedder model",
-        choices=["contentvec", "hubert"],
-        default="hubert",
-    )
-    tts_parser.add_argument(
-        "--upscale_audio",
-        type=str,
-        help="Enable audio upscaling",
-        choices=["True", "False"],
-        default="False",
-    )
-
-    # Parser for 'preprocess' mode
-    preprocess_parser = subparsers.add_parser("preprocess", help="Run preprocessing")
-    preprocess_parser.add_argument("--model_name", type=str, help="Name of the model")
-    preprocess_parser.add_argument(
-        "--dataset_path",
-        type=str,
-        help="Path to the dataset",
-    )
-    preprocess_parser.add_argument(
-        "--sampling_rate",
-        type=str,
-        help="Sampling rate",
-        choices=["32000", "40000", "48000"],
-    )
-
-    # Parser for 'extract' mode
-    extract_parser = subparsers.add_parser("extract", help="Run extract")
-    extract_parser.add_argument(
-        "--model_name",
-        type=str,
-        help="Name of the model",
-    )
-    extract_parser.add_argument(
-        "--rvc_version",
-        type=str,
-        help="Version of the model",
-        choices=["v1", "v2"],
-        default="v2",
-    )
-    extract_parser.add_argument(
-        "--f0method",
-        type=str,
-        help="Value for f0method",
-        choices=[
-            "pm",
-            "harvest",
-            "dio",
-            "crepe",
-            "crepe-tiny",
-            "rmvpe",
-        ],
-        default="rmvpe",
-    )
-    extract_parser.add_argument(
-        "--hop_length",
-        type=str,
-        help="Value for hop_length",
-        choices=[str(i) for i in range(1, 513)],
-        default="128",
-    )
-    extract_parser.add_argument(
-        "--sampling_rate",
-        type=str,
-        help="Sampling rate",
-        choices=["32000", "40000", "48000"],
-    )
-    extract_parser.add_argument(
-        "--embedder_model",
-        type=str,
-        help="Embedder model",
-        choices=["contentvec", "hubert"],
-        default="hubert",
-    )
-
-    # Parser for 'train' mode
-    train_parser = subparsers.add_parser("train", help="Run training")
-    train_parser.add_argument(
-        "--model_name",
-        type=str,
-        help="Name of the model",
-    )
-    train_parser.add_argument(
-        "--rvc_version",
-        type=str,
-        help="Version of the model",
-        choices=["v1", "v2"],
-        default="v2",
-    )
-    train_parser.add_argument(
-        "--save_every_epoch",
-        type=str,
-        help="Save every epoch",
-        choices=[str(i) for i in range(1, 101)],
-    )
-    train_parser.add_argument(
-        "--save_only_latest",
-        type=str,
-        help="Save weight only at last epoch",
-        choices=["True", "False"],
-        default="False",
-    )
-    train_parser.add_argument(
-        "--save_every_weights",
-        type=str,
-        help="Save weight every epoch",
-        choices=["True", "False"],
-        default="True",
-    )
-    train_parser.add_argument(
-        "--total_epoch",
-        type=str,
-        help="Total epoch",
-        choices=[str(i) for i in range(1, 10001)],
-        default="1000",
-    )
-    train_parser.add_argument(
-        "--sampling_rate",
-        type=str,
-        help="Sampling rate",
-        choices=["32000", "40000", "48000"],
-    )
-    train_parser.add_argument(
-        "--batch_size",
-        type=str,
-        help="Batch size",
-        choices=[str(i) for i in range(1, 51)],
-        default="8",
-    )
-    train_parser.add_argument(
-        "--gpu",
-        type=str,
-        help="GPU number",
-        default="0",
-    )
-    train_parser.add_argument(
-        "--pitch_guidance",
-        type=str,
-        help="Pitch guidance",
-        choices=["True", "False"],
-        default="True",
-    )
-    train_parser.add_argument(
-        "--pretrained",
-        type=str,
-        help="Pretrained",
-        choices=["True", "False"],
-        default="True",
-    )
-    train_parser.add_argument(
-        "--custom_pretrained",
-        type=str,
-        help="Custom pretrained",
-        choices=["True", "False"],
-        default="False",
-    )
-    train_parser.add_argument(
-        "--g_pretrained_path",
-        type=str,
-        nargs="?",
-        default=None,
-        help="Path to the pretrained G file",
-    )
-    train_parser.add_argument(
-        "--d_pretrained_path",
-        type=str,
-        nargs="?",
-        default=None,
-        help="Path to the pretrained D file",
-    )
-    train_parser.add_argument(
-        "--overtraining_detector",
-        type=str,
-        help="Overtraining detector",
-        choices=["True", "False"],
-        default="False",
-    )
-    train_parser.add_argument(
-        "--overtraining_threshold",
-        type=str,
-        help="Overtraining threshold",
-        choices=[str(i) for i in range(1, 101)],
-        default="50",
-    )
-
-    # Parser for 'index' mode
-    index_parser = subparsers.add_parser("index", help="Generate index file")
-    index_parser.add_argument(
-        "--model_name",
-        type=str,
-        help="Name of the model",
-    )
-    index_parser.add_argument(
-        "--rvc_version",
-        type=str,
-        help="Version of the model",
-        choices=["v1", "v2"],
-        default="v2",
-    )
-
-    # Parser for 'model_extract' mode
-    model_extract_parser = subparsers.add_parser("model_extract", help="Extract model")
-    model_extract_parser.add_argument(
-        "--pth_path",
-        type=str,
-        help="Path to the .pth file",
-    )
-    model_extract_parser.add_argument(
-        "--model_name",
-        type=str,
-        help="Name of the model",
-    )
-    model_extract_parser.add_argument(
-        "--sampling_rate",
-        type=str,
-        help="Sampling rate",
-        choices=["40000", "48000"],
-    )
-    model_extract_parser.add_argument(
-        "--pitch_guidance",
-        type=str,
-        help="Pitch guidance",
-        choices=["True", "False"],
-    )
-    model_extract_parser.add_argument(
-        "--rvc_version",
-        type=str,
-        help="Version of the model",
-        choices=["v1", "v2"],
-        default="v2",
-    )
-    model_extract_parser.add_argument(
-        "--epoch",
-        type=str,
-        help="Epochs of the model",
-        choices=[str(i) for i in range(1, 10001)],
-    )
-    model_extract_parser.add_argument(
-        "--step",
-        type=str,
-        help="Steps of the model",
-    )
-
-    # Parser for 'model_information' mode
-    model_information_parser = subparsers.add_parser(
-        "model_information", help="Print model information"
-    )
-    model_information_parser.add_argument(
-        "--pth_path",
-        type=str,
-        help="Path to the .pth file",
-    )
-
-    # Parser for 'model_blender' mode
-    model_blender_parser = subparsers.add_parser(
-        "model_blender", help="Fuse two models"
-    )
-    model_blender_parser.add_argument(
-        "--model_name",
-        type=str,
-        help="Name of the model",
-    )
-    model_blender_parser.add_argument(
-        "--pth_path_1",
-        type=str,
-        help="Path to the first .pth file",
-    )
-    model_blender_parser.add_argument(
-        "--pth_path_2",
-        type=str,
-        help="Path to the second .pth file",
-    )
-    model_blender_parser.add_argument(
-        "--ratio",
-        type=str,
-        help="Value for blender ratio",
-        choices=[str(i / 10) for i in range(11)],
-        default="0.5",
-    )
-
-    # Parser for 'tensorboard' mode
-    subparsers.add_parser("tensorboard", help="Run tensorboard")
-
-    # Parser for 'download' mode
-    download_parser = subparsers.add_parser("download", help="Download models")
-    download_parser.add_argument(
-        "--model_link",
-        type=str,
-        help="Link of the model",
-    )
-
-    # Parser for 'prerequisites' mode
-    prerequisites_parser = subparsers.add_parser(
-        "prerequisites", help="Install prerequisites"
-    )
-    prerequisites_parser.add_argument(
-        "--pretraineds_v1",
-        type=str,
-        choices=["True", "False"],
-        default="True",
-        help="Download pretrained models for v1",
-    )
-    prerequisites_parser.add_argument(
-        "--pretraineds_v2",
-        type=str,
-        choices=["True", "False"],
-        default="True",
-        help="Download pretrained models for v2",
-    )
-    prerequisites_parser.add_argument(
-        "--models",
-        type=str,
-        choices=["True", "False"],
-        default="True",
-        help="Donwload models",
-    )
-    prerequisites_parser.add_argument(
-        "--exe",
-        type=str,
-        choices=["True", "False"],
-        default="True",
-        help="Download executables",
-    )
-
-    # Parser for 'audio_analyzer' mode
-    audio_analyzer = subparsers.add_parser("audio_analyzer", help="Run audio analyzer")
-    audio_analyzer.add_argument(
-        "--input_path",
-        type=str,
-        help="Path to the input audio file",
-    )
-
-    # Parser for 'api' mode
-    api_parser = subparsers.add_parser("api", help="Run the API")
-    api_parser.add_argument(
-        "--host", type=str, help="Host address", default="127.0.0.1"
-    )
-    api_parser.add_argument("--port", type=str, help="Port", default="8000")
-
-    return parser.parse_args()
-
-
 def main():
     if len(sys.argv) == 1:
         print("Please run the script with '-h' for more information.")
@@ -1193,6 +592,39 @@ def main():
                 str(args.embedder_model),
                 str(args.upscale_audio),
             )
+        elif args.mode == "multi_infer":
+            run_multi_infer_script(
+                [str(key) for key in args.f0up_keys],
+                str(args.filter_radius),
+                str(args.index_rate),
+                str(args.rms_mix_rate),
+                str(args.protect),
+                str(args.hop_length),
+                str(args.f0method),
+                str(args.input_path),
+                str(args.output_folder),
+                [str(path) for path in args.pth_paths],
+                [str(path) for path in args.index_paths],
+                str(args.f0autotune),
+                str(args.export_format),
+                str(args.embedder_model),
+            )
+        elif args.mode == "stream":
+            run_stream_script(
+                str(args.f0up_key),
+                str(args.filter_radius),
+                str(args.index_rate),
+                str(args.protect),
+                str(args.hop_length),
+                str(args.f0method),
+                str(args.pth_path),
+                str(args.index_path),
+                str(args.f0autotune),
+                str(args.embedder_model),
+                str(args.block_time),
+                str(args.context_time),
+                str(args.crossfade_time),
+            )
         elif args.mode == "batch_infer":
             run_batch_infer_script(
                 str(args.f0up_key),
@@ -1297,6 +729,29 @@ def main():
                 str(args.pth_path_2),
                 str(args.ratio),
             )
+        elif args.mode == "model_convert":
+            print(run_model_convert_script(str(args.pth_path)))
+        elif args.mode == "embedder_convert":
+            print(
+                run_embedder_convert_script(
+                    str(args.embedder_model), args.check == "True"
+                )
+            )
+        elif args.mode == "onnx_check":
+            print(
+                run_onnx_check_script(
+                    str(args.input_path), str(args.pth_path), str(args.embedder_model)
+                )
+            )
+        elif args.mode == "quantize_check":
+            print(
+                run_quantize_check_script(
+                    args.input_paths,
+                    str(args.pth_path),
+                    str(args.embedder_model),
+                    str(args.f0method),
+                )
+            )
         elif args.mode == "tensorboard":
             run_tensorboard_script()
         elif args.mode == "download":
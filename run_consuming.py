@@ -1,15 +1,20 @@
 import json
 import logging
+import functools
+from concurrent.futures import ThreadPoolExecutor
 
 import pika
 from pika.exceptions import AMQPConnectionError
 
 from config import settings
 from control_api.rvc_service import rvc_service
+from control_api.metrics_server import start_metrics_server
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+TRAINING_COMMANDS = ("training",)
+
 
 def create_channel():
     parameters = pika.URLParameters(settings.rmq_connection_url)
@@ -28,14 +33,117 @@ def callback(ch, method, properties, body):
         logger.error(e, exc_info=True)
 
 
+def settle_message(channel, delivery_tag, success):
+    """Ack or reject a message, must be called from the connection thread"""
+    if not channel.is_open:
+        logger.warning(f"Channel closed, message {delivery_tag} will be redelivered")
+        return
+
+    if success:
+        channel.basic_ack(delivery_tag=delivery_tag)
+    else:
+        channel.basic_nack(delivery_tag=delivery_tag, requeue=False)
+
+
+def process_training(json_data):
+    """Run an already acked training command, failures go to the callback"""
+    try:
+        rvc_service.retrieve_command(command_data=json_data)
+    except Exception as e:
+        logger.error(e, exc_info=True)
+        rvc_service.send_model_info(
+            model_name=json_data.get("model_name"), model_status="FAILED"
+        )
+
+
+def process_message(connection, channel, delivery_tag, json_data):
+    success = True
+    try:
+        rvc_service.retrieve_command(command_data=json_data)
+    except Exception as e:
+        logger.error(e, exc_info=True)
+        success = False
+
+    try:
+        connection.add_callback_threadsafe(
+            functools.partial(settle_message, channel, delivery_tag, success)
+        )
+    except Exception as e:
+        logger.error(f"Could not settle message {delivery_tag}: {e}")
+
+
+def concurrent_callback(connection, pools, ch, method, properties, body):
+    try:
+        json_data = json.loads(body)
+    except json.JSONDecodeError as e:
+        logger.error(f"Invalid message body: {e}")
+        ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+        return
+
+    logger.info("Received %r", json_data)
+
+    if json_data.get("command") in TRAINING_COMMANDS:
+        # Training runs for hours, longer than the broker's consumer_timeout
+        # allows a message to stay unacked. Holding it would also hold a
+        # prefetch slot, so it is acked on dispatch and failures are reported
+        # through the callback instead of a redelivery.
+        ch.basic_ack(delivery_tag=method.delivery_tag)
+        pools["training"].submit(process_training, json_data)
+        return
+
+    pools["inference"].submit(
+        process_message, connection, ch, method.delivery_tag, json_data
+    )
+
+
+def consume_concurrently(pools):
+    connection, channel = create_channel()
+    channel.basic_qos(prefetch_count=settings.rmq_prefetch_count)
+    channel.basic_consume(
+        queue=settings.queue_name,
+        on_message_callback=functools.partial(concurrent_callback, connection, pools),
+        auto_ack=False,
+    )
+    logger.info(
+        f"Waiting for messages (prefetch {settings.rmq_prefetch_count}, "
+        f"{settings.training_workers} training / {settings.inference_workers} inference workers)"
+    )
+    return connection, channel
+
+
 def main():
+    if settings.metrics_port:
+        start_metrics_server(settings.metrics_port)
+
+    if rvc_service.infer_worker is not None:
+        logger.info(f"Loading inference worker ({rvc_service.infer_mode})")
+        rvc_service.infer_worker.warmup()
+
+    rvc_service.delivery.start()
+
+    pools = None
+    if settings.consumer_mode == "concurrent":
+        pools = {
+            "training": ThreadPoolExecutor(
+                max_workers=settings.training_workers, thread_name_prefix="training"
+            ),
+            "inference": ThreadPoolExecutor(
+                max_workers=settings.inference_workers, thread_name_prefix="inference"
+            ),
+        }
+
     while True:
         try:
-            connection, channel = create_channel()
-            channel.basic_consume(
-                queue=settings.queue_name, on_message_callback=callback, auto_ack=True
-            )
-            logger.info("Waiting for messages")
+            if pools is not None:
+                connection, channel = consume_concurrently(pools)
+            else:
+                connection, channel = create_channel()
+                channel.basic_consume(
+                    queue=settings.queue_name,
+                    on_message_callback=callback,
+                    auto_ack=True,
+                )
+                logger.info("Waiting for messages")
             channel.start_consuming()
         except AMQPConnectionError as e:
             logger.error(f"Connection error: {e}")
@@ -45,6 +153,12 @@ def main():
             connection.close()
             break
 
+    if pools is not None:
+        # Unacked messages of unfinished inference jobs are redelivered by the
+        # broker, training jobs were acked and are not
+        for pool in pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+
 
 if __name__ == "__main__":
     main()
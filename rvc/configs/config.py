@@ -32,7 +32,26 @@ class Config:
         self.json_config = self.load_config_json()
         self.gpu_mem = None
         self.instead = ""
+        self.model_cache_mb = 2048
+        self.index_cache_mb = 1024
+        # On disk f0 cache, 0 disables it. HuBERT features are cached too if enabled
+        self.analysis_cache_mb = 1024
+        self.analysis_cache_features = False
+        # Runtime for the synthesizer and the embedder: "torch", "onnx" to run
+        # exported graphs in onnxruntime, or "int8" for dynamic int8 quantization
+        # on CPU. onnxruntime threads set to 0 are left to onnxruntime
+        self.backend = os.environ.get("RVC_BACKEND", "torch")
+        # HubertEmbedder instead of the fairseq model, the onnx backend needs it
+        self.native_embedder = os.environ.get("RVC_NATIVE_EMBEDDER", "False") == "True"
+        self.onnx_intra_op_threads = int(os.environ.get("RVC_ONNX_INTRA_OP_THREADS", "0"))
+        self.onnx_inter_op_threads = int(os.environ.get("RVC_ONNX_INTER_OP_THREADS", "0"))
+        # Mel frames per RMVPE chunk for long inputs, 0 runs whole clips
+        self.rmvpe_chunk_frames = int(os.environ.get("RVC_RMVPE_CHUNK_FRAMES", "0"))
         self.x_pad, self.x_query, self.x_center, self.x_max = self.device_config()
+        # Memory available to run chunks of long inputs as one batch, 0 runs them
+        # one by one. Batched output differs slightly from sequential chunks
+        # because of padding and batched noise, so batching is opt-in
+        self.batch_memory_mb = int(os.environ.get("RVC_BATCH_MEMORY_MB", "0"))
 
     @staticmethod
     def load_config_json() -> dict:
@@ -0,0 +1,114 @@
+import os
+import uuid
+import hashlib
+import threading
+import numpy as np
+
+
+def audio_hash(audio):
+    """Content hash of a decoded audio array"""
+    audio = np.ascontiguousarray(audio)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(str(audio.dtype).encode())
+    digest.update(audio.tobytes())
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """f0 curves and HuBERT features stored as .npy files on disk.
+
+    Entries are keyed by the content hash of the audio they were computed
+    from plus every setting that changes the result, so they stay valid
+    across processes and are never reused for a changed file. Files are
+    evicted least recently used (by modification time, refreshed on every
+    hit) once their total size exceeds max_bytes.
+
+    The cache directory is scanned on first write only, after that the
+    total size is kept up to date as entries are written. Eviction scans
+    again so it also sees entries written by other processes.
+    """
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.total = None
+
+    def key(self, kind, audio, **settings):
+        parts = [kind, audio_hash(audio)]
+        parts += [f"{name}={settings[name]}" for name in sorted(settings)]
+        return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key + ".npy")
+
+    def get(self, key):
+        if self.max_bytes <= 0:
+            return None
+
+        path = self._path(key)
+        try:
+            value = np.load(path)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return value
+
+    def put(self, key, value):
+        if self.max_bytes <= 0:
+            return
+
+        path = self._path(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as file:
+                np.save(file, value)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as error:
+            print(f"Could not write analysis cache entry {path}: {error}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        with self.lock:
+            if self.total is None:
+                self.total = sum(size for _, size, _ in self._scan())
+            else:
+                self.total += size
+            over_budget = self.total > self.max_bytes
+
+        if over_budget:
+            self.evict()
+
+    def _scan(self):
+        entries = []
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if not name.endswith(".npy"):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        with self.lock:
+            entries = self._scan()
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+            self.total = total
+
+
+analysis_cache = AnalysisCache(os.path.join("cache", "analysis"), 1024 * 1024 * 1024)
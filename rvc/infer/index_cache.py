@@ -0,0 +1,87 @@
+import os
+import uuid
+import faiss
+import numpy as np
+
+from rvc.lib.cache import LRUCache
+
+VECTORS_SUFFIX = ".vectors.npy"
+
+
+def vectors_path(index_path):
+    return index_path + VECTORS_SUFFIX
+
+
+def load_index_vectors(index, index_path):
+    """Vectors of the index, memory mapped from a .npy file next to it.
+
+    The file is written on first use, so worker processes that load the same
+    index share one page cache copy instead of each reconstructing it.
+    """
+    path = vectors_path(index_path)
+
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(index_path):
+        try:
+            big_npy = np.load(path, mmap_mode="r")
+            if big_npy.shape[0] == index.ntotal:
+                return big_npy
+        except (OSError, ValueError) as error:
+            print(f"Could not read {path}: {error}")
+
+    big_npy = index.reconstruct_n(0, index.ntotal)
+
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, "wb") as file:
+            np.save(file, big_npy)
+        os.replace(tmp_path, path)
+    except OSError as error:
+        # Read only model directory, keep the vectors in memory
+        print(f"Could not write {path}: {error}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return big_npy
+
+    return np.load(path, mmap_mode="r")
+
+
+class IndexCache:
+    """FAISS indexes and their vectors keyed by index path and modification time"""
+
+    def __init__(self, max_bytes):
+        self.indexes = LRUCache(max_bytes)
+
+    @property
+    def max_bytes(self):
+        return self.indexes.max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, value):
+        self.indexes.shrink(value)
+
+    def get(self, file_index):
+        """Returns (index, big_npy) for the .index file"""
+        path = os.path.abspath(file_index)
+        key = (path, os.path.getmtime(path))
+
+        with self.indexes.lock:
+            entry = self.indexes.get(key)
+            if entry is not None:
+                return entry
+
+            for stale_key in self.indexes.keys():
+                if stale_key[0] == path:
+                    self.indexes.pop(stale_key)
+
+            index = faiss.read_index(path)
+            big_npy = load_index_vectors(index, path)
+            # Mapped vectors still take page cache, so they count towards the budget
+            size = os.path.getsize(path) + big_npy.nbytes
+            self.indexes.put(key, (index, big_npy), size)
+            return index, big_npy
+
+    def clear(self):
+        self.indexes.clear()
+
+
+index_cache = IndexCache(1024 * 1024 * 1024)
@@ -6,25 +6,23 @@ import logging
 
 import numpy as np
 import soundfile as sf
-import librosa
 
 now_dir = os.getcwd()
 sys.path.append(now_dir)
 
-from rvc.infer.pipeline import VC
-from scipy.io import wavfile
 from audio_upscaler import upscale
 import noisereduce as nr
-from rvc.lib.utils import load_audio
+from rvc.lib.utils import load_audio, encode_audio
 from rvc.lib.tools.split_audio import process_audio, merge_audio
-from rvc.lib.infer_pack.models import (
-    SynthesizerTrnMs256NSFsid,
-    SynthesizerTrnMs256NSFsid_nono,
-    SynthesizerTrnMs768NSFsid,
-    SynthesizerTrnMs768NSFsid_nono,
-)
+from rvc.infer.model_cache import ModelCache
+from rvc.infer.index_cache import index_cache
+from rvc.infer.analysis_cache import analysis_cache
 from rvc.configs.config import Config
-from rvc.lib.utils import load_embedding
+from rvc.lib.utils import load_embedding, EMBEDDING_MODELS
+from rvc.infer.onnx_backend import OnnxEmbedder
+from rvc.infer.quantize import load_quantized_embedder
+from rvc.lib.metrics import metrics
+from rvc.lib.predictors import clear_predictors
 
 logging.getLogger("httpx").setLevel(logging.WARNING)
 logging.getLogger("httpcore").setLevel(logging.WARNING)
@@ -32,6 +30,9 @@ logging.getLogger("httpcore").setLevel(logging.WARNING)
 logger = logging.getLogger("rvc_service")
 
 config = Config()
+model_cache = ModelCache(config, config.model_cache_mb * 1024 * 1024)
+index_cache.max_bytes = config.index_cache_mb * 1024 * 1024
+analysis_cache.max_bytes = config.analysis_cache_mb * 1024 * 1024
 hubert_model = None
 tgt_sr = None
 net_g = None
@@ -43,21 +44,29 @@ n_spk = None
 
 def load_hubert(embedder_model):
     global hubert_model
-    models, _, _ = load_embedding(embedder_model)
-    hubert_model = models[0]
+    hubert_model = load_embedding(
+        embedder_model, native=config.native_embedder or config.backend == "onnx"
+    )
     hubert_model = hubert_model.to(config.device)
     if config.is_half:
         hubert_model = hubert_model.half()
     else:
         hubert_model = hubert_model.float()
     hubert_model.eval()
+    if config.backend == "onnx":
+        hubert_model = OnnxEmbedder(
+            hubert_model, EMBEDDING_MODELS[embedder_model], config
+        )
+    elif config.backend == "int8" and config.device == "cpu":
+        hubert_model = load_quantized_embedder(
+            hubert_model, EMBEDDING_MODELS[embedder_model]
+        )
 
 
-def remove_audio_noise(input_audio_path, reduction_strength=0.7):
+def remove_audio_noise(audio, rate, reduction_strength=0.7):
     try:
-        rate, data = wavfile.read(input_audio_path)
         reduced_noise = nr.reduce_noise(
-            y=data,
+            y=audio,
             sr=rate,
             prop_decrease=reduction_strength,
         )
@@ -67,31 +76,6 @@ def remove_audio_noise(input_audio_path, reduction_strength=0.7):
         return None
 
 
-def convert_audio_format(input_path, output_path, output_format):
-
-    try:
-        if output_format != "WAV":
-            print(f"Converting audio to {output_format} format...")
-            audio, sample_rate = librosa.load(input_path, sr=None)
-            common_sample_rates = [
-                8000,
-                11025,
-                12000,
-                16000,
-                22050,
-                24000,
-                32000,
-                44100,
-                48000,
-            ]
-            target_sr = min(common_sample_rates, key=lambda x: abs(x - sample_rate))
-            audio = librosa.resample(audio, orig_sr=sample_rate, target_sr=target_sr)
-            sf.write(output_path, audio, target_sr, format=output_format.lower())
-        return output_path
-    except Exception as error:
-        print(f"Failed to convert audio to {output_format} format: {error}")
-
-
 def voice_conversion(
     sid=0,
     input_audio_path=None,
@@ -114,7 +98,8 @@ def voice_conversion(
 
     f0_up_key = int(f0_up_key)
     try:
-        audio = load_audio(input_audio_path, 16000)
+        with metrics.timer("decode"):
+            audio = load_audio(input_audio_path, 16000)
         audio_max = np.abs(audio).max() / 0.95
 
         if audio_max > 1:
@@ -199,9 +184,11 @@ def voice_conversion(
                 hop_length,
                 f0autotune,
                 f0_file=f0_file,
+                embedder_model=embedder_model,
             )
         if output_path is not None:
-            sf.write(output_path, audio_opt, tgt_sr, format="WAV")
+            with metrics.timer("encode"):
+                sf.write(output_path, audio_opt, tgt_sr, format="WAV")
 
         return (tgt_sr, audio_opt)
 
@@ -209,62 +196,154 @@ def voice_conversion(
         print(error)
 
 
+def multi_voice_conversion(
+    input_audio_path,
+    targets,
+    f0_method=None,
+    index_rate=None,
+    rms_mix_rate=None,
+    protect=None,
+    hop_length=None,
+    f0autotune=False,
+    filter_radius=None,
+    embedder_model=None,
+    export_format="WAV",
+):
+    """Convert one input with several voices, analysing the input only once.
+
+    targets is a list of (model_path, index_path, f0_up_key, output_path).
+    The decoded audio, the raw f0 curve and the HuBERT features are shared,
+    only the transposition, index blend and synthesis run per voice.
+    """
+    with metrics.timer("decode"):
+        audio = load_audio(input_audio_path, 16000)
+    audio_max = np.abs(audio).max() / 0.95
+    if audio_max > 1:
+        audio /= audio_max
+
+    if not hubert_model:
+        load_hubert(embedder_model)
+
+    analysis = None
+    outputs = []
+    for model_path, file_index, f0_up_key, output_path in targets:
+        model = model_cache.get(model_path)
+        if analysis is None:
+            analysis = model.vc.analyze(
+                audio,
+                input_audio_path,
+                f0_method,
+                filter_radius,
+                hop_length,
+                f0autotune,
+                cache_features=True,
+                embedder_model=embedder_model,
+            )
+
+        file_index = (
+            (file_index or "")
+            .strip(" ")
+            .strip('"')
+            .strip("\n")
+            .strip('"')
+            .strip(" ")
+            .replace("trained", "added")
+        )
+        audio_opt = model.vc.synthesize(
+            hubert_model,
+            model.net_g,
+            0,
+            analysis,
+            int(f0_up_key),
+            file_index,
+            index_rate,
+            model.if_f0,
+            model.tgt_sr,
+            0,
+            rms_mix_rate,
+            model.version,
+            protect,
+        )
+        output_path = output_path.replace(".wav", f".{export_format.lower()}")
+        with metrics.timer("encode"):
+            encode_audio(audio_opt, model.tgt_sr, output_path, export_format)
+        outputs.append(output_path)
+
+    return outputs
+
+
+def infer_multi_pipeline(
+    f0up_keys,
+    filter_radius,
+    index_rate,
+    rms_mix_rate,
+    protect,
+    hop_length,
+    f0method,
+    audio_input_path,
+    output_folder,
+    model_paths,
+    index_paths,
+    f0autotune,
+    export_format,
+    embedder_model,
+):
+    os.makedirs(output_folder, exist_ok=True)
+    input_name = os.path.splitext(os.path.basename(audio_input_path))[0]
+
+    targets = []
+    for model_path, index_path, f0up_key in zip(model_paths, index_paths, f0up_keys):
+        model_name = os.path.splitext(os.path.basename(model_path))[0]
+        output_path = os.path.join(output_folder, f"{input_name}_{model_name}.wav")
+        targets.append((model_path, index_path, f0up_key, output_path))
+
+    start_time = time.time()
+    try:
+        output_paths = multi_voice_conversion(
+            audio_input_path,
+            targets,
+            f0_method=f0method,
+            index_rate=float(index_rate),
+            rms_mix_rate=float(rms_mix_rate),
+            protect=float(protect),
+            hop_length=hop_length,
+            f0autotune=f0autotune,
+            filter_radius=filter_radius,
+            embedder_model=embedder_model,
+            export_format=export_format,
+        )
+    except Exception as error:
+        print(f"Voice conversion failed: {error}")
+        return []
+
+    elapsed_time = time.time() - start_time
+    print(
+        f"Converted '{audio_input_path}' with {len(output_paths)} voices in {elapsed_time:.2f} seconds."
+    )
+    return output_paths
+
+
 def get_vc(weight_root, sid):
     global n_spk, tgt_sr, net_g, vc, cpt, version
     if sid == "" or sid == []:
         global hubert_model
         if hubert_model is not None:
             print("clean_empty_cache")
-            del net_g, n_spk, vc, hubert_model, tgt_sr
-            hubert_model = net_g = n_spk = vc = hubert_model = tgt_sr = None
+            model_cache.clear()
+            index_cache.clear()
+            clear_predictors()
+            hubert_model = net_g = n_spk = vc = cpt = tgt_sr = version = None
             if torch.cuda.is_available():
                 torch.cuda.empty_cache()
+        return
 
-            if_f0 = cpt.get("f0", 1)
-            version = cpt.get("version", "v1")
-            if version == "v1":
-                if if_f0 == 1:
-                    net_g = SynthesizerTrnMs256NSFsid(
-                        *cpt["config"], is_half=config.is_half
-                    )
-                else:
-                    net_g = SynthesizerTrnMs256NSFsid_nono(*cpt["config"])
-            elif version == "v2":
-                if if_f0 == 1:
-                    net_g = SynthesizerTrnMs768NSFsid(
-                        *cpt["config"], is_half=config.is_half
-                    )
-                else:
-                    net_g = SynthesizerTrnMs768NSFsid_nono(*cpt["config"])
-            del net_g, cpt
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
-            cpt = None
-    person = weight_root
-    cpt = torch.load(person, map_location="cpu")
-    tgt_sr = cpt["config"][-1]
-    cpt["config"][-3] = cpt["weight"]["emb_g.weight"].shape[0]
-    if_f0 = cpt.get("f0", 1)
-
-    version = cpt.get("version", "v1")
-    if version == "v1":
-        if if_f0 == 1:
-            net_g = SynthesizerTrnMs256NSFsid(*cpt["config"], is_half=config.is_half)
-        else:
-            net_g = SynthesizerTrnMs256NSFsid_nono(*cpt["config"])
-    elif version == "v2":
-        if if_f0 == 1:
-            net_g = SynthesizerTrnMs768NSFsid(*cpt["config"], is_half=config.is_half)
-        else:
-            net_g = SynthesizerTrnMs768NSFsid_nono(*cpt["config"])
-    del net_g.enc_q
-    net_g.eval().to(config.device)
-    if config.is_half:
-        net_g = net_g.half()
-    else:
-        net_g = net_g.float()
-    vc = VC(tgt_sr, config)
-    n_spk = cpt["config"][-3]
+    model = model_cache.get(weight_root)
+    net_g = model.net_g
+    vc = model.vc
+    cpt = model.cpt
+    tgt_sr = model.tgt_sr
+    version = model.version
+    n_spk = model.n_spk
 
 
 def infer_pipeline(
@@ -297,7 +376,7 @@ def infer_pipeline(
             upscale(audio_input_path, audio_input_path)
 
         start_time = time.time()
-        voice_conversion(
+        result = voice_conversion(
             sid=0,
             input_audio_path=audio_input_path,
             f0_up_key=f0up_key,
@@ -308,30 +387,30 @@ def infer_pipeline(
             rms_mix_rate=float(rms_mix_rate),
             protect=float(protect),
             hop_length=hop_length,
-            output_path=audio_output_path,
+            output_path=None,
             split_audio=split_audio,
             f0autotune=f0autotune,
             filter_radius=filter_radius,
             embedder_model=embedder_model,
         )
+        if not isinstance(result, tuple) or result[1] is None:
+            print(f"Voice conversion failed: {result}")
+            return
+        sample_rate, audio_opt = result
 
         if clean_audio == "True":
-            cleaned_audio = remove_audio_noise(audio_output_path, clean_strength)
+            cleaned_audio = remove_audio_noise(
+                audio_opt, sample_rate, float(clean_strength)
+            )
             if cleaned_audio is not None:
-                sf.write(audio_output_path, cleaned_audio, tgt_sr, format="WAV")
-
-        logger.warning(f"Trying to convert audio to {export_format}")
+                audio_opt = cleaned_audio
 
-        try:
-            output_path_format = audio_output_path.replace(
-                ".wav", f".{export_format.lower()}"
-            )
-            audio_output_path = convert_audio_format(
-                audio_output_path, output_path_format, export_format
-            )
-            print(f"Converting audio to {export_format}. Output path: {audio_output_path}")
-        except Exception as e:
-            logger.error(f"Error while converting audio: {e}", exc_info=True)
+        # The conversion result is encoded straight into the requested format
+        audio_output_path = audio_output_path.replace(
+            ".wav", f".{export_format.lower()}"
+        )
+        with metrics.timer("encode"):
+            encode_audio(audio_opt, sample_rate, audio_output_path, export_format)
 
         end_time = time.time()
         elapsed_time = end_time - start_time
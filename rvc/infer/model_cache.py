@@ -0,0 +1,149 @@
+import os
+import itertools
+import torch
+
+from rvc.infer.pipeline import VC
+from rvc.lib.cache import LRUCache
+from rvc.lib.model_file import resolve_model_file, load_checkpoint
+from rvc.infer.onnx_backend import load_onnx_synthesizer
+from rvc.infer.quantize import load_quantized_synthesizer
+from rvc.lib.infer_pack.models import (
+    SynthesizerTrnMs256NSFsid,
+    SynthesizerTrnMs256NSFsid_nono,
+    SynthesizerTrnMs768NSFsid,
+    SynthesizerTrnMs768NSFsid_nono,
+)
+
+
+class VoiceModel:
+    def __init__(self, net_g, vc, cpt, tgt_sr, if_f0, version, n_spk, size):
+        self.net_g = net_g
+        self.vc = vc
+        self.cpt = cpt
+        self.tgt_sr = tgt_sr
+        self.if_f0 = if_f0
+        self.version = version
+        self.n_spk = n_spk
+        self.size = size
+
+
+def build_synthesizer(cpt, is_half):
+    if_f0 = cpt.get("f0", 1)
+    version = cpt.get("version", "v1")
+    if version == "v1":
+        if if_f0 == 1:
+            return SynthesizerTrnMs256NSFsid(*cpt["config"], is_half=is_half)
+        return SynthesizerTrnMs256NSFsid_nono(*cpt["config"])
+    elif version == "v2":
+        if if_f0 == 1:
+            return SynthesizerTrnMs768NSFsid(*cpt["config"], is_half=is_half)
+        return SynthesizerTrnMs768NSFsid_nono(*cpt["config"])
+    raise ValueError(f"Unsupported model version: {version}")
+
+
+def assign_weights(net_g, weights):
+    """Points the parameters of net_g at the mapped tensors instead of copying them"""
+    for name, tensor in itertools.chain(net_g.named_parameters(), net_g.named_buffers()):
+        # Checkpoints store weight norm parameters under their pre-parametrization names
+        key = name.replace(".parametrizations.weight.original0", ".weight_g").replace(
+            ".parametrizations.weight.original1", ".weight_v"
+        )
+        weight = weights.get(name, weights.get(key))
+        if weight is None:
+            continue
+        if weight.shape != tensor.shape:
+            raise RuntimeError(
+                f"Size mismatch for {name}: {tuple(weight.shape)} in the checkpoint, "
+                f"{tuple(tensor.shape)} in the model"
+            )
+        tensor.data = weight
+
+
+def load_voice_model(weight_root, config, backend=None):
+    mapped = resolve_model_file(weight_root) is not None
+    cpt = load_checkpoint(weight_root)
+    tgt_sr = cpt["config"][-1]
+    cpt["config"][-3] = cpt["weight"]["emb_g.weight"].shape[0]
+
+    net_g = build_synthesizer(cpt, config.is_half)
+    del net_g.enc_q
+    if mapped:
+        # Casting below copies only when the device or dtype differ from the file
+        assign_weights(net_g, cpt["weight"])
+    else:
+        net_g.load_state_dict(cpt["weight"], strict=False)
+    net_g.eval().to(config.device)
+    if config.is_half:
+        net_g = net_g.half()
+    else:
+        net_g = net_g.float()
+
+    backend = backend or config.backend
+    if backend == "onnx":
+        net_g = load_onnx_synthesizer(weight_root, net_g, cpt.get("f0", 1), config)
+        size = net_g.size
+    else:
+        size = sum(
+            tensor.numel() * tensor.element_size()
+            for tensor in net_g.state_dict().values()
+        )
+        # Quantized kernels are CPU only, the fp32 size is an upper bound for the budget
+        if backend == "int8" and config.device == "cpu":
+            net_g = load_quantized_synthesizer(weight_root, net_g)
+    # Weights now live in net_g, keep only the metadata of the checkpoint
+    del cpt["weight"]
+
+    return VoiceModel(
+        net_g=net_g,
+        vc=VC(tgt_sr, config),
+        cpt=cpt,
+        tgt_sr=tgt_sr,
+        if_f0=cpt.get("f0", 1),
+        version=cpt.get("version", "v1"),
+        n_spk=cpt["config"][-3],
+        size=size,
+    )
+
+
+def release_voice_model(key, model):
+    model.net_g = model.vc = None
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+class ModelCache:
+    """Constructed voice models keyed by .pth path and modification time"""
+
+    def __init__(self, config, max_bytes):
+        self.config = config
+        self.models = LRUCache(max_bytes, on_evict=release_voice_model)
+
+    @property
+    def max_bytes(self):
+        return self.models.max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, value):
+        self.models.shrink(value)
+
+    def get(self, weight_root):
+        path = os.path.abspath(weight_root)
+        key = (path, os.path.getmtime(path))
+
+        with self.models.lock:
+            model = self.models.get(key)
+            if model is not None:
+                return model
+
+            # The file was replaced on disk, drop the outdated copy first
+            for stale_key in self.models.keys():
+                if stale_key[0] == path:
+                    self.models.pop(stale_key)
+
+            print(f"Loading voice model {weight_root}")
+            model = load_voice_model(path, self.config)
+            self.models.put(key, model, model.size)
+            return model
+
+    def clear(self):
+        self.models.clear()
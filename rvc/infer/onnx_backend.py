@@ -0,0 +1,335 @@
+import os
+import copy
+import uuid
+import inspect
+import torch
+import torch.nn.functional as F
+from torch.nn.utils import parametrize
+
+from rvc.lib.embedder import HubertEmbedder, feature_length
+
+ONNX_OPSET = 17
+EMBEDDER_OUTPUT_LAYERS = (9, 12)
+# Parity limits: largest embedder feature difference and synthesizer mel distance in dB
+EMBEDDER_TOLERANCE = 1e-3
+MEL_DISTANCE_TOLERANCE = 1.0
+
+
+def onnx_path(source_path, suffix=".onnx"):
+    return os.path.splitext(source_path)[0] + suffix
+
+
+def is_up_to_date(path, source_path):
+    return os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(
+        source_path
+    )
+
+
+def exportable_copy(module):
+    """fp32 CPU copy of module with weight norm folded into plain weights"""
+    module = copy.deepcopy(module).float().cpu().eval()
+    if hasattr(module, "__prepare_scriptable__"):
+        module = module.__prepare_scriptable__()
+    for submodule in list(module.modules()):
+        if parametrize.is_parametrized(submodule, "weight"):
+            parametrize.remove_parametrizations(submodule, "weight")
+    return module
+
+
+def export_onnx(module, args, path, input_names, output_names, dynamic_axes):
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    # Newer torch defaults to the dynamo exporter, keep the TorchScript one
+    options = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        options["dynamo"] = False
+    try:
+        with torch.no_grad():
+            torch.onnx.export(
+                module,
+                args,
+                tmp_path,
+                input_names=input_names,
+                output_names=output_names,
+                dynamic_axes=dynamic_axes,
+                opset_version=ONNX_OPSET,
+                do_constant_folding=True,
+                **options,
+            )
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    print(f"Exported {path}")
+
+
+def create_session(path, config):
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    # 0 lets onnxruntime pick the number of threads
+    options.intra_op_num_threads = config.onnx_intra_op_threads
+    options.inter_op_num_threads = config.onnx_inter_op_threads
+    if config.onnx_inter_op_threads > 0:
+        options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+
+    providers = ["CPUExecutionProvider"]
+    if (
+        str(config.device).startswith("cuda")
+        and "CUDAExecutionProvider" in ort.get_available_providers()
+    ):
+        providers.insert(0, "CUDAExecutionProvider")
+    return ort.InferenceSession(path, sess_options=options, providers=providers)
+
+
+class SynthesizerExport(torch.nn.Module):
+    """net_g.infer with the latent noise as an input, the graph that gets exported"""
+
+    def __init__(self, net_g, if_f0):
+        super().__init__()
+        self.net_g = net_g
+        self.if_f0 = if_f0
+
+    def forward(self, phone, phone_lengths, sid, rnd, pitch=None, pitchf=None):
+        net_g = self.net_g
+        g = net_g.emb_g(sid).unsqueeze(-1)
+        m_p, logs_p, x_mask = net_g.enc_p(phone, pitch, phone_lengths)
+        z_p = (m_p + torch.exp(logs_p) * rnd) * x_mask
+        z = net_g.flow(z_p, x_mask, g=g, reverse=True)
+        if self.if_f0 == 1:
+            return net_g.dec(z * x_mask, pitchf, g=g)
+        return net_g.dec(z * x_mask, g=g)
+
+
+def export_synthesizer(net_g, if_f0, path):
+    """Exports net_g to ONNX with dynamic batch and time axes"""
+    net_g = exportable_copy(net_g)
+    batch_size, frames = 2, 200
+    args = [
+        torch.randn(batch_size, frames, net_g.enc_p.emb_phone.in_features),
+        torch.full((batch_size,), frames, dtype=torch.long),
+        torch.zeros(batch_size, dtype=torch.long),
+        torch.randn(batch_size, net_g.inter_channels, frames),
+    ]
+    input_names = ["phone", "phone_lengths", "sid", "rnd"]
+    dynamic_axes = {
+        "phone": {0: "batch", 1: "frames"},
+        "phone_lengths": {0: "batch"},
+        "sid": {0: "batch"},
+        "rnd": {0: "batch", 2: "frames"},
+        "audio": {0: "batch", 2: "samples"},
+    }
+    if if_f0 == 1:
+        args += [
+            torch.randint(1, 255, (batch_size, frames), dtype=torch.long),
+            torch.rand(batch_size, frames) * 400 + 50,
+        ]
+        input_names += ["pitch", "pitchf"]
+        dynamic_axes["pitch"] = {0: "batch", 1: "frames"}
+        dynamic_axes["pitchf"] = {0: "batch", 1: "frames"}
+
+    export_onnx(
+        SynthesizerExport(net_g, if_f0),
+        tuple(args),
+        path,
+        input_names,
+        ["audio"],
+        dynamic_axes,
+    )
+
+
+class OnnxSynthesizer:
+    """Stands in for net_g, infer runs the exported synthesizer in onnxruntime"""
+
+    def __init__(self, path, net_g, config):
+        self.session = create_session(path, config)
+        self.input_names = {input.name for input in self.session.get_inputs()}
+        self.device = config.device
+        self.inter_channels = net_g.inter_channels
+        # Used by VC to size batches
+        self.upsample_rates = net_g.upsample_rates
+        self.upsample_initial_channel = net_g.upsample_initial_channel
+        self.size = os.path.getsize(path)
+
+    def run(self, phone, phone_lengths, sid, rnd, pitch=None, pitchf=None):
+        inputs = {
+            "phone": phone.float().cpu().numpy(),
+            "phone_lengths": phone_lengths.long().cpu().numpy(),
+            "sid": sid.long().cpu().numpy(),
+            "rnd": rnd.float().cpu().numpy(),
+        }
+        if pitch is not None:
+            inputs["pitch"] = pitch.long().cpu().numpy()
+            inputs["pitchf"] = pitchf.float().cpu().numpy()
+        inputs = {name: value for name, value in inputs.items() if name in self.input_names}
+        (audio,) = self.session.run(["audio"], inputs)
+        return torch.from_numpy(audio)
+
+    def infer(self, phone, phone_lengths, *args):
+        """Same arguments and first output as net_g.infer"""
+        if len(args) == 3:
+            pitch, pitchf, sid = args
+        else:
+            (sid,) = args
+            pitch = pitchf = None
+        rnd = torch.randn(phone.shape[0], self.inter_channels, phone.shape[1]) * 0.66666
+        audio = self.run(phone, phone_lengths, sid, rnd, pitch, pitchf)
+        return audio.to(self.device), None, None
+
+
+def load_onnx_synthesizer(weight_root, net_g, if_f0, config):
+    """OnnxSynthesizer for a voice model, exported next to it on first use"""
+    path = onnx_path(weight_root)
+    if not is_up_to_date(path, weight_root):
+        export_synthesizer(net_g, if_f0, path)
+    return OnnxSynthesizer(path, net_g, config)
+
+
+class EmbedderExport(torch.nn.Module):
+    def __init__(self, embedder, output_layer):
+        super().__init__()
+        self.embedder = embedder
+        self.output_layer = output_layer
+
+    def forward(self, source, padding_mask):
+        return self.embedder.encode(source, padding_mask, self.output_layer)
+
+
+def export_embedder(embedder, output_layer, path):
+    """Exports the embedder up to output_layer with dynamic batch and time axes"""
+    embedder = exportable_copy(embedder)
+    source = torch.randn(2, 16000)
+    padding_mask = torch.zeros(
+        2, embedder.feature_length(source.shape[1]), dtype=torch.bool
+    )
+    export_onnx(
+        EmbedderExport(embedder, output_layer),
+        (source, padding_mask),
+        path,
+        ["source", "padding_mask"],
+        ["features"],
+        {
+            "source": {0: "batch", 1: "samples"},
+            "padding_mask": {0: "batch", 1: "frames"},
+            "features": {0: "batch", 1: "frames"},
+        },
+    )
+
+
+class OnnxEmbedder:
+    """Stands in for the embedder, the encoder runs in onnxruntime.
+
+    One graph is exported per output layer; final_proj stays in torch since
+    it is a single small projection.
+    """
+
+    def __init__(self, embedder, model_path, config):
+        if not isinstance(embedder, HubertEmbedder):
+            raise ValueError(
+                "The onnx backend needs an embedder that loads without fairseq"
+            )
+
+        self.device = config.device
+        self.normalize = embedder.normalize
+        self.conv_feature_layers = embedder.conv_feature_layers
+        self._final_proj = copy.deepcopy(embedder.final_proj).float().to(self.device)
+
+        self.sessions = {}
+        for output_layer in EMBEDDER_OUTPUT_LAYERS:
+            path = onnx_path(model_path, f".layer{output_layer}.onnx")
+            if not is_up_to_date(path, model_path):
+                export_embedder(embedder, output_layer, path)
+            self.sessions[output_layer] = create_session(path, config)
+
+    def extract_features(self, source, padding_mask=None, output_layer=12):
+        if padding_mask is None:
+            padding_mask = torch.zeros(source.shape, dtype=torch.bool)
+        frames = feature_length(self.conv_feature_layers, source.shape[1])
+        padding_mask = HubertEmbedder.frame_padding_mask(padding_mask.cpu(), frames)
+
+        (features,) = self.sessions[output_layer].run(
+            ["features"],
+            {
+                "source": source.float().cpu().numpy(),
+                "padding_mask": padding_mask.numpy(),
+            },
+        )
+        features = torch.from_numpy(features).to(self.device, dtype=source.dtype)
+        return features, padding_mask.to(self.device)
+
+    def final_proj(self, x):
+        return self._final_proj(x.float()).to(x.dtype)
+
+
+def check_onnx_parity(input_path, model_path, embedder_model="contentvec", sid=0):
+    """Compares the onnxruntime backend with the torch path on an audio file.
+
+    Both run in fp32 on the same input. The embedder is compared by its
+    largest feature difference, the synthesizer by the mel distance of its
+    output for the same features, pitch and latent noise; its sine source
+    draws its own noise, so the outputs are close but never identical.
+    """
+    from rvc.configs.config import Config
+    from rvc.infer.model_cache import load_voice_model
+    from rvc.lib.utils import EMBEDDING_MODELS, load_audio, load_embedding
+    from rvc.lib.utils import mel_distance
+
+    config = Config()
+    model = load_voice_model(model_path, config, backend="torch")
+    embedder = load_embedding(embedder_model, native=True).float().cpu().eval()
+    onnx_embedder = OnnxEmbedder(embedder, EMBEDDING_MODELS[embedder_model], config)
+    onnx_synthesizer = load_onnx_synthesizer(
+        model_path, model.net_g, model.if_f0, config
+    )
+
+    audio = load_audio(input_path, 16000)
+    source = torch.from_numpy(audio).float().unsqueeze(0)
+    padding_mask = torch.zeros(source.shape, dtype=torch.bool)
+    output_layer = 9 if model.version == "v1" else 12
+
+    with torch.no_grad():
+        reference, _ = embedder.extract_features(
+            source=source, padding_mask=padding_mask, output_layer=output_layer
+        )
+        features, _ = onnx_embedder.extract_features(source, padding_mask, output_layer)
+        embedder_difference = (features.cpu() - reference).abs().max().item()
+
+        if model.version == "v1":
+            reference = embedder.final_proj(reference)
+        phone = F.interpolate(reference.permute(0, 2, 1), scale_factor=2).permute(
+            0, 2, 1
+        )
+        p_len = min(phone.shape[1], audio.shape[0] // model.vc.window)
+        phone = phone[:, :p_len]
+        args = [
+            phone,
+            torch.tensor([p_len]),
+            torch.tensor([sid]),
+            torch.randn(1, onnx_synthesizer.inter_channels, p_len) * 0.66666,
+        ]
+        if model.if_f0 == 1:
+            pitch, pitchf = model.vc.get_f0(
+                input_path, audio, p_len, 0, "pm", 3, 128, "False", use_cache=False
+            )
+            args += [
+                torch.from_numpy(pitch[:p_len]).long().unsqueeze(0),
+                torch.from_numpy(pitchf[:p_len]).float().unsqueeze(0),
+            ]
+
+        synthesizer = SynthesizerExport(exportable_copy(model.net_g), model.if_f0)
+        expected = synthesizer(*args)[0, 0].numpy()
+        output = onnx_synthesizer.run(*args)[0, 0].numpy()
+    distance = mel_distance(expected, output, model.tgt_sr)
+
+    passed = (
+        embedder_difference <= EMBEDDER_TOLERANCE
+        and distance <= MEL_DISTANCE_TOLERANCE
+    )
+    print(f"Embedder max difference: {embedder_difference:.2e}")
+    print(f"Synthesizer mel distance: {distance:.3f} dB")
+    print("ONNX backend matches torch" if passed else "ONNX backend does not match torch")
+    return {
+        "embedder_difference": embedder_difference,
+        "mel_distance": distance,
+        "passed": passed,
+    }
@@ -4,26 +4,29 @@ import torch.nn.functional as F
 import torchcrepe
 from torch import Tensor
 import scipy.signal as signal
-import pyworld, os, faiss, librosa, torchcrepe
+import pyworld, os, librosa, torchcrepe
 from scipy import signal
-from functools import lru_cache
 import random
-import gc
 import re
+from concurrent.futures import ThreadPoolExecutor
 
 now_dir = os.getcwd()
 sys.path.append(now_dir)
 
-from rvc.lib.FCPEF0Predictor import FCPEF0Predictor
+from rvc.lib.predictors import crepe_lock, use_predictor
+from rvc.lib.metrics import metrics
+from rvc.infer.index_cache import index_cache
+from rvc.infer.analysis_cache import analysis_cache
 
 bh, ah = signal.butter(N=5, Wn=48, btype="high", fs=16000)
 
-input_audio_path2wav = {}
+# Voicing threshold of the neural pitch estimators
+F0_THRESHOLD = 0.03
 
+hybrid_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="f0")
 
-@lru_cache
-def cache_harvest_f0(input_audio_path, fs, f0max, f0min, frame_period):
-    audio = input_audio_path2wav[input_audio_path]
+
+def harvest_f0(audio, fs, f0max, f0min, frame_period):
     f0, t = pyworld.harvest(
         audio,
         fs=fs,
@@ -76,6 +79,11 @@ class VC(object):
         self.t_center = self.sr * self.x_center
         self.t_max = self.sr * self.x_max
         self.device = config.device
+        self.batch_memory = config.batch_memory_mb * 1024 * 1024
+        self.peak_memory = None
+        self.cache_features = config.analysis_cache_features
+        self.rmvpe_chunk_frames = config.rmvpe_chunk_frames or None
+        self.backend = config.backend
         self.ref_freqs = [
             65.41,
             82.41,
@@ -109,12 +117,39 @@ class VC(object):
 
     def autotune_f0(self, f0):
         # Autotunes the given fundamental frequency (f0) to the nearest musical note.
-        autotuned_f0 = np.zeros_like(f0)
-        for i, freq in enumerate(f0):
-            # Find the closest note
-            closest_note = min(self.note_dict, key=lambda x: abs(x - freq))
-            autotuned_f0[i] = closest_note
-        return autotuned_f0
+        notes = np.asarray(self.note_dict)
+        upper = np.clip(np.searchsorted(notes, f0), 1, len(notes) - 1)
+        lower = upper - 1
+        # On a tie the lower note wins, like min() over the ascending note list
+        closest = np.where(
+            f0 - notes[lower] <= notes[upper] - f0, notes[lower], notes[upper]
+        )
+        closest[np.isnan(f0)] = notes[0]
+        return closest.astype(f0.dtype, copy=False)
+
+    def find_split_points(self, audio):
+        """Quietest points near every t_center samples, where long inputs are split"""
+        audio_pad = np.pad(audio, (self.window // 2, self.window // 2), mode="reflect")
+        # Sum of every window of self.window samples as a cumulative sum difference,
+        # in float64 since the cancellation error of a float32 running sum over
+        # minutes of audio exceeds the sums of quiet windows
+        n = audio.shape[0]
+        cumsum = np.concatenate([[0.0], np.cumsum(audio_pad, dtype=np.float64)])
+        audio_sum = np.abs(cumsum[self.window : self.window + n] - cumsum[:n])
+
+        centers = np.arange(self.t_center, n, self.t_center)
+        if centers.shape[0] == 0:
+            return []
+        # Windows past the end of the audio are cut short, inf padding keeps them out
+        padded = np.pad(audio_sum, (0, self.t_query), constant_values=np.inf)
+        windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * self.t_query)
+        offsets = np.argmin(windows[centers - self.t_query], axis=1)
+        return list(centers - self.t_query + offsets)
+
+    def sync_device(self):
+        """Wait for queued CUDA kernels, so stage timers include them"""
+        if str(self.device).startswith("cuda"):
+            torch.cuda.synchronize(self.device)
 
     def get_optimal_torch_device(self, index: int = 0) -> torch.device:
         if torch.cuda.is_available():
@@ -140,17 +175,18 @@ class VC(object):
         if audio.ndim == 2 and audio.shape[0] > 1:
             audio = torch.mean(audio, dim=0, keepdim=True).detach()
         audio = audio.detach()
-        pitch: Tensor = torchcrepe.predict(
-            audio,
-            self.sr,
-            hop_length,
-            f0_min,
-            f0_max,
-            model,
-            batch_size=hop_length * 2,
-            device=torch_device,
-            pad=True,
-        )
+        with crepe_lock:
+            pitch: Tensor = torchcrepe.predict(
+                audio,
+                self.sr,
+                hop_length,
+                f0_min,
+                f0_max,
+                model,
+                batch_size=hop_length * 2,
+                device=torch_device,
+                pad=True,
+            )
         p_len = p_len or x.shape[0] // hop_length
         source = np.array(pitch.squeeze(0).cpu().float().numpy())
         source[source < 0.001] = np.nan
@@ -171,23 +207,51 @@ class VC(object):
     ):
         batch_size = 512
         audio = torch.tensor(np.copy(x))[None].float()
-        f0, pd = torchcrepe.predict(
-            audio,
-            self.sr,
-            self.window,
-            f0_min,
-            f0_max,
-            model,
-            batch_size=batch_size,
-            device=self.device,
-            return_periodicity=True,
-        )
+        with crepe_lock:
+            f0, pd = torchcrepe.predict(
+                audio,
+                self.sr,
+                self.window,
+                f0_min,
+                f0_max,
+                model,
+                batch_size=batch_size,
+                device=self.device,
+                return_periodicity=True,
+            )
         pd = torchcrepe.filter.median(pd, 3)
         f0 = torchcrepe.filter.mean(f0, 3)
         f0[pd < 0.1] = 0
         f0 = f0[0].cpu().numpy()
         return f0
 
+    def get_f0_hybrid_method(self, method, x, f0_min, f0_max, p_len, hop_length):
+        f0 = None
+        if method == "crepe":
+            f0 = self.get_f0_crepe_computation(
+                x, f0_min, f0_max, p_len, int(hop_length)
+            )
+        elif method == "rmvpe":
+            with use_predictor(
+                "rmvpe",
+                self.device,
+                self.is_half,
+                chunk_frames=self.rmvpe_chunk_frames,
+            ) as model_rmvpe:
+                f0 = model_rmvpe.infer_from_audio(x, thred=F0_THRESHOLD)
+            f0 = f0[1:]
+        elif method == "fcpe":
+            with use_predictor(
+                "fcpe",
+                self.device,
+                f0_min=int(f0_min),
+                f0_max=int(f0_max),
+                sampling_rate=self.sr,
+                threshold=F0_THRESHOLD,
+            ) as model_fcpe:
+                f0 = model_fcpe.compute_f0(x, p_len=p_len)
+        return f0
+
     def get_f0_hybrid_computation(
         self,
         methods_str,
@@ -200,39 +264,17 @@ class VC(object):
         methods_str = re.search("hybrid\[(.+)\]", methods_str)
         if methods_str:
             methods = [method.strip() for method in methods_str.group(1).split("+")]
-        f0_computation_stack = []
         print(f"Calculating f0 pitch estimations for methods {str(methods)}")
         x = x.astype(np.float32)
         x /= np.quantile(np.abs(x), 0.999)
-        for method in methods:
-            f0 = None
-            if method == "crepe":
-                f0 = self.get_f0_crepe_computation(
-                    x, f0_min, f0_max, p_len, int(hop_length)
-                )
-            elif method == "rmvpe":
-                if hasattr(self, "model_rmvpe") == False:
-                    from rvc.lib.rmvpe import RMVPE
-
-                    self.model_rmvpe = RMVPE(
-                        "rmvpe.pt", is_half=self.is_half, device=self.device
-                    )
-                f0 = self.model_rmvpe.infer_from_audio(x, thred=0.03)
-                f0 = f0[1:]
-            elif method == "fcpe":
-                self.model_fcpe = FCPEF0Predictor(
-                    "fcpe.pt",
-                    f0_min=int(f0_min),
-                    f0_max=int(f0_max),
-                    dtype=torch.float32,
-                    device=self.device,
-                    sampling_rate=self.sr,
-                    threshold=0.03,
-                )
-                f0 = self.model_fcpe.compute_f0(x, p_len=p_len)
-                del self.model_fcpe
-                gc.collect()
-            f0_computation_stack.append(f0)
+        # The estimators release the GIL, so they run side by side
+        futures = [
+            hybrid_executor.submit(
+                self.get_f0_hybrid_method, method, x, f0_min, f0_max, p_len, hop_length
+            )
+            for method in methods
+        ]
+        f0_computation_stack = [future.result() for future in futures]
 
         print(f"Calculating hybrid median f0 from the stack of {str(methods)}")
         f0_computation_stack = [fc for fc in f0_computation_stack if fc is not None]
@@ -254,13 +296,59 @@ class VC(object):
         hop_length,
         f0autotune,
         inp_f0=None,
+        use_cache=True,
+    ):
+        f0 = self.compute_f0(
+            input_audio_path,
+            x,
+            p_len,
+            f0_method,
+            filter_radius,
+            hop_length,
+            f0autotune,
+            use_cache,
+        )
+        return self.shift_f0(f0, f0_up_key, inp_f0)
+
+    def compute_f0(
+        self,
+        input_audio_path,
+        x,
+        p_len,
+        f0_method,
+        filter_radius,
+        hop_length,
+        f0autotune,
+        use_cache=True,
     ):
-        global input_audio_path2wav
+        """Pitch of x in Hz before any transposition, depends only on the input"""
+        f0 = None
+        if use_cache:
+            key = analysis_cache.key(
+                "f0",
+                x,
+                method=f0_method,
+                hop_length=hop_length,
+                threshold=F0_THRESHOLD,
+                filter_radius=filter_radius if f0_method == "harvest" else "",
+                p_len=p_len,
+            )
+            f0 = analysis_cache.get(key)
+
+        if f0 is None:
+            f0 = self.estimate_f0(x, p_len, f0_method, filter_radius, hop_length)
+            if use_cache:
+                analysis_cache.put(key, f0)
+
+        if f0autotune == "True":
+            f0 = self.autotune_f0(f0)
+
+        return f0
+
+    def estimate_f0(self, x, p_len, f0_method, filter_radius, hop_length):
         time_step = self.window / self.sr * 1000
         f0_min = 50
         f0_max = 1100
-        f0_mel_min = 1127 * np.log(1 + f0_min / 700)
-        f0_mel_max = 1127 * np.log(1 + f0_max / 700)
         if f0_method == "pm":
             f0 = (
                 parselmouth.Sound(x, self.sr)
@@ -278,8 +366,7 @@ class VC(object):
                     f0, [[pad_size, p_len - len(f0) - pad_size]], mode="constant"
                 )
         elif f0_method == "harvest":
-            input_audio_path2wav[input_audio_path] = x.astype(np.double)
-            f0 = cache_harvest_f0(input_audio_path, self.sr, f0_max, f0_min, 10)
+            f0 = harvest_f0(x.astype(np.double), self.sr, f0_max, f0_min, 10)
             if int(filter_radius) > 2:
                 f0 = signal.medfilt(f0, 3)
         elif f0_method == "dio":
@@ -301,28 +388,24 @@ class VC(object):
                 x, f0_min, f0_max, p_len, int(hop_length), "tiny"
             )
         elif f0_method == "rmvpe":
-            if hasattr(self, "model_rmvpe") == False:
-                from rvc.lib.rmvpe import RMVPE
-
-                self.model_rmvpe = RMVPE(
-                    "rmvpe.pt", is_half=self.is_half, device=self.device
-                )
-            f0 = self.model_rmvpe.infer_from_audio(x, thred=0.03)
+            with use_predictor(
+                "rmvpe",
+                self.device,
+                self.is_half,
+                chunk_frames=self.rmvpe_chunk_frames,
+            ) as model_rmvpe:
+                f0 = model_rmvpe.infer_from_audio(x, thred=F0_THRESHOLD)
         elif f0_method == "fcpe":
-            self.model_fcpe = FCPEF0Predictor(
-                "fcpe.pt",
+            with use_predictor(
+                "fcpe",
+                self.device,
                 f0_min=int(f0_min),
                 f0_max=int(f0_max),
-                dtype=torch.float32,
-                device=self.device,
                 sampling_rate=self.sr,
-                threshold=0.03,
-            )
-            f0 = self.model_fcpe.compute_f0(x, p_len=p_len)
-            del self.model_fcpe
-            gc.collect()
+                threshold=F0_THRESHOLD,
+            ) as model_fcpe:
+                f0 = model_fcpe.compute_f0(x, p_len=p_len)
         elif "hybrid" in f0_method:
-            input_audio_path2wav[input_audio_path] = x.astype(np.double)
             f0 = self.get_f0_hybrid_computation(
                 f0_method,
                 x,
@@ -332,10 +415,15 @@ class VC(object):
                 hop_length,
             )
 
-        if f0autotune == "True":
-            f0 = self.autotune_f0(f0)
+        return f0
 
-        f0 *= pow(2, f0_up_key / 12)
+    def shift_f0(self, f0, f0_up_key, inp_f0=None):
+        """Transposes f0 by f0_up_key semitones, returns (coarse pitch, f0)"""
+        f0_min = 50
+        f0_max = 1100
+        f0_mel_min = 1127 * np.log(1 + f0_min / 700)
+        f0_mel_max = 1127 * np.log(1 + f0_max / 700)
+        f0 = f0 * pow(2, f0_up_key / 12)
         tf0 = self.sr // self.window
         if inp_f0 is not None:
             delta_t = np.round(
@@ -359,20 +447,23 @@ class VC(object):
 
         return f0_coarse, f0bak
 
-    def vc(
-        self,
-        model,
-        net_g,
-        sid,
-        audio0,
-        pitch,
-        pitchf,
-        index,
-        big_npy,
-        index_rate,
-        version,
-        protect,
-    ):
+    def extract_features(self, model, audio0, version, embedder_model=None):
+        """HuBERT features of audio0, depend only on the input and model version"""
+        key = None
+        if self.cache_features and embedder_model is not None:
+            key = analysis_cache.key(
+                "features",
+                audio0,
+                version=version,
+                embedder_model=embedder_model,
+                backend=self.backend,
+                is_half=self.is_half,
+            )
+            cached = analysis_cache.get(key)
+            if cached is not None:
+                feats = torch.from_numpy(cached).to(self.device)
+                return feats.half() if self.is_half else feats.float()
+
         feats = torch.from_numpy(audio0)
         if self.is_half:
             feats = feats.half()
@@ -389,10 +480,31 @@ class VC(object):
             "padding_mask": padding_mask,
             "output_layer": 9 if version == "v1" else 12,
         }
-        t0 = ttime()
-        with torch.no_grad():
+        with metrics.timer("hubert", self.sync_device), torch.no_grad():
             logits = model.extract_features(**inputs)
             feats = model.final_proj(logits[0]) if version == "v1" else logits[0]
+        if key is not None:
+            analysis_cache.put(key, feats.cpu().numpy())
+        return feats
+
+    def vc(
+        self,
+        model,
+        net_g,
+        sid,
+        audio0,
+        pitch,
+        pitchf,
+        index,
+        big_npy,
+        index_rate,
+        version,
+        protect,
+        feats=None,
+    ):
+        t0 = ttime()
+        if feats is None:
+            feats = self.extract_features(model, audio0, version)
         if protect < 0.5 and pitch != None and pitchf != None:
             feats0 = feats.clone()
         if (
@@ -404,10 +516,11 @@ class VC(object):
             if self.is_half:
                 npy = npy.astype("float32")
 
-            score, ix = index.search(npy, k=8)
-            weight = np.square(1 / score)
-            weight /= weight.sum(axis=1, keepdims=True)
-            npy = np.sum(big_npy[ix] * np.expand_dims(weight, axis=2), axis=1)
+            with metrics.timer("index_search"):
+                score, ix = index.search(npy, k=8)
+                weight = np.square(1 / score)
+                weight /= weight.sum(axis=1, keepdims=True)
+                npy = np.sum(big_npy[ix] * np.expand_dims(weight, axis=2), axis=1)
 
             if self.is_half:
                 npy = npy.astype("float16")
@@ -437,7 +550,7 @@ class VC(object):
             feats = feats * pitchff + feats0 * (1 - pitchff)
             feats = feats.to(feats0.dtype)
         p_len = torch.tensor([p_len], device=self.device).long()
-        with torch.no_grad():
+        with metrics.timer("synthesis", self.sync_device), torch.no_grad():
             if pitch != None and pitchf != None:
                 audio1 = (
                     (net_g.infer(feats, p_len, pitch, pitchf, sid)[0][0, 0])
@@ -449,63 +562,189 @@ class VC(object):
                 audio1 = (
                     (net_g.infer(feats, p_len, sid)[0][0, 0]).data.cpu().float().numpy()
                 )
-        del feats, p_len, padding_mask
-        if torch.cuda.is_available():
-            torch.cuda.empty_cache()
+        del feats, p_len
         t2 = ttime()
         return audio1
 
-    def pipeline(
+    def chunk_memory(self, net_g, frames):
+        # Rough peak activation size for one chunk of the given number of f0 frames:
+        # generator activations at every upsampling stage, HuBERT convolution
+        # features and attention scores
+        element_size = 2 if self.is_half else 4
+        channels = net_g.upsample_initial_channel
+        decoder = channels
+        length = 1
+        for i, rate in enumerate(net_g.upsample_rates):
+            length *= rate
+            decoder += channels // 2 ** (i + 1) * length
+        hubert = 512 * 32 * frames + 12 * (frames // 2) ** 2
+        return element_size * (4 * decoder * frames + hubert)
+
+    def plan_batches(self, net_g, chunks):
+        """Groups chunk indices into batches that fit in the memory ceiling"""
+        if self.batch_memory <= 0 or len(chunks) == 1:
+            return [[i] for i in range(len(chunks))]
+
+        ceiling = self.batch_memory
+        if str(self.device).startswith("cuda"):
+            free, _ = torch.cuda.mem_get_info(torch.device(self.device))
+            ceiling = min(ceiling, int(free * 0.8))
+
+        order = sorted(range(len(chunks)), key=lambda i: -chunks[i].shape[0])
+        batches = []
+        for i in order:
+            batch = batches[-1] if batches else None
+            # Padding changes the GroupNorm statistics of HuBERT, so only chunks
+            # of nearly the same length share a batch
+            if (
+                batch is not None
+                and chunks[i].shape[0] >= 0.9 * chunks[batch[0]].shape[0]
+                and (len(batch) + 1)
+                * self.chunk_memory(net_g, chunks[batch[0]].shape[0] // self.window)
+                <= ceiling
+            ):
+                batch.append(i)
+            else:
+                batches.append([i])
+        return batches
+
+    def vc_batch(
         self,
         model,
         net_g,
         sid,
+        chunks,
+        pitches,
+        pitchfs,
+        index,
+        big_npy,
+        index_rate,
+        version,
+        protect,
+    ):
+        """Same as vc for several chunks padded to a common length in one forward pass"""
+        batch_size = len(chunks)
+        lengths = [chunk.shape[0] for chunk in chunks]
+        feats = torch.zeros(batch_size, max(lengths))
+        padding_mask = torch.ones(batch_size, max(lengths), dtype=torch.bool)
+        for i, chunk in enumerate(chunks):
+            chunk = torch.from_numpy(chunk)
+            if chunk.dim() == 2:
+                chunk = chunk.mean(-1)
+            feats[i, : lengths[i]] = chunk
+            padding_mask[i, : lengths[i]] = False
+        feats = feats.half() if self.is_half else feats.float()
+
+        inputs = {
+            "source": feats.to(self.device),
+            "padding_mask": padding_mask.to(self.device),
+            "output_layer": 9 if version == "v1" else 12,
+        }
+        with metrics.timer("hubert", self.sync_device), torch.no_grad():
+            logits = model.extract_features(**inputs)
+            feats = model.final_proj(logits[0]) if version == "v1" else logits[0]
+        if logits[1] is not None:
+            feat_lengths = (~logits[1]).sum(-1).tolist()
+        else:
+            feat_lengths = [feats.shape[1]] * batch_size
+
+        use_protect = protect < 0.5 and pitches is not None
+        if use_protect:
+            feats0 = feats.clone()
+        if index is not None and big_npy is not None and index_rate != 0:
+            npy = torch.cat(
+                [feats[i, : feat_lengths[i]] for i in range(batch_size)]
+            ).cpu().numpy()
+            if self.is_half:
+                npy = npy.astype("float32")
+
+            # One search for the frames of all chunks
+            with metrics.timer("index_search"):
+                score, ix = index.search(npy, k=8)
+                weight = np.square(1 / score)
+                weight /= weight.sum(axis=1, keepdims=True)
+                npy = np.sum(big_npy[ix] * np.expand_dims(weight, axis=2), axis=1)
+
+            if self.is_half:
+                npy = npy.astype("float16")
+            npy = torch.from_numpy(npy).to(self.device)
+            retrieved = torch.zeros_like(feats)
+            offset = 0
+            for i in range(batch_size):
+                retrieved[i, : feat_lengths[i]] = npy[offset : offset + feat_lengths[i]]
+                offset += feat_lengths[i]
+            feats = retrieved * index_rate + (1 - index_rate) * feats
+
+        feats = F.interpolate(feats.permute(0, 2, 1), scale_factor=2).permute(0, 2, 1)
+        if use_protect:
+            feats0 = F.interpolate(feats0.permute(0, 2, 1), scale_factor=2).permute(
+                0, 2, 1
+            )
+
+        p_lens = [
+            min(lengths[i] // self.window, feat_lengths[i] * 2) for i in range(batch_size)
+        ]
+        if pitches is not None:
+            p_lens = [min(p_len, pitch.shape[1]) for p_len, pitch in zip(p_lens, pitches)]
+        max_len = max(p_lens)
+        feats = feats[:, :max_len]
+
+        pitch = pitchf = None
+        if pitches is not None:
+            pitch = torch.ones(batch_size, max_len, dtype=torch.long, device=self.device)
+            pitchf = torch.zeros(batch_size, max_len, device=self.device)
+            for i in range(batch_size):
+                pitch[i, : p_lens[i]] = pitches[i][0, : p_lens[i]]
+                pitchf[i, : p_lens[i]] = pitchfs[i][0, : p_lens[i]]
+
+        if use_protect:
+            feats0 = feats0[:, :max_len]
+            pitchff = pitchf.clone()
+            pitchff[pitchf > 0] = 1
+            pitchff[pitchf < 1] = protect
+            pitchff = pitchff.unsqueeze(-1)
+            feats = feats * pitchff + feats0 * (1 - pitchff)
+            feats = feats.to(feats0.dtype)
+
+        p_len = torch.tensor(p_lens, device=self.device).long()
+        sids = sid.expand(batch_size)
+        with metrics.timer("synthesis", self.sync_device), torch.no_grad():
+            if pitch is not None:
+                audio1 = net_g.infer(feats, p_len, pitch, pitchf, sids)[0][:, 0]
+            else:
+                audio1 = net_g.infer(feats, p_len, sids)[0][:, 0]
+            audio1 = audio1.data.cpu().float().numpy()
+
+        upp = audio1.shape[1] // max_len
+        outputs = [audio1[i, : p_lens[i] * upp] for i in range(batch_size)]
+        del feats, p_len, padding_mask
+        return outputs
+
+    def analyze(
+        self,
         audio,
         input_audio_path,
-        f0_up_key,
         f0_method,
-        file_index,
-        index_rate,
-        if_f0,
         filter_radius,
-        tgt_sr,
-        resample_sr,
-        rms_mix_rate,
-        version,
-        protect,
         hop_length,
         f0autotune,
         f0_file=None,
+        cache_features=False,
+        embedder_model=None,
     ):
-        if file_index != "" and os.path.exists(file_index) == True and index_rate != 0:
-            try:
-                index = faiss.read_index(file_index)
-                big_npy = index.reconstruct_n(0, index.ntotal)
-            except Exception as error:
-                print(error)
-                index = big_npy = None
-        else:
-            index = big_npy = None
+        """Target independent analysis of the input shared by every voice.
+
+        The raw f0 curve is computed on first use by a model with pitch and
+        kept. With cache_features the HuBERT features of every chunk are
+        kept as well, per model version, so several voices can be rendered
+        from one analysis.
+        """
         audio = signal.filtfilt(bh, ah, audio)
-        audio_pad = np.pad(audio, (self.window // 2, self.window // 2), mode="reflect")
         opt_ts = []
-        if audio_pad.shape[0] > self.t_max:
-            audio_sum = np.zeros_like(audio)
-            for i in range(self.window):
-                audio_sum += audio_pad[i : i - self.window]
-            for t in range(self.t_center, audio.shape[0], self.t_center):
-                opt_ts.append(
-                    t
-                    - self.t_query
-                    + np.where(
-                        np.abs(audio_sum[t - self.t_query : t + self.t_query])
-                        == np.abs(audio_sum[t - self.t_query : t + self.t_query]).min()
-                    )[0][0]
-                )
+        if audio.shape[0] + self.window > self.t_max:
+            opt_ts = self.find_split_points(audio)
         s = 0
-        audio_opt = []
         t = None
-        t1 = ttime()
         audio_pad = np.pad(audio, (self.t_pad, self.t_pad), mode="reflect")
         p_len = audio_pad.shape[0] // self.window
         inp_f0 = None
@@ -519,19 +758,103 @@ class VC(object):
                 inp_f0 = np.array(inp_f0, dtype="float32")
             except Exception as error:
                 print(error)
+
+        # (audio start, audio end, pitch start, pitch end) of every chunk
+        segments = []
+        for t in opt_ts:
+            t = t // self.window * self.window
+            segments.append(
+                (
+                    s,
+                    t + self.t_pad2 + self.window,
+                    s // self.window,
+                    (t + self.t_pad2) // self.window,
+                )
+            )
+            s = t
+        segments.append(
+            (t, None, t // self.window if t is not None else None, None)
+        )
+
+        return {
+            "audio": audio,
+            "audio_pad": audio_pad,
+            "p_len": p_len,
+            "segments": segments,
+            "chunks": [audio_pad[start:end] for start, end, _, _ in segments],
+            "input_audio_path": input_audio_path,
+            "f0_method": f0_method,
+            "filter_radius": filter_radius,
+            "hop_length": hop_length,
+            "f0autotune": f0autotune,
+            "inp_f0": inp_f0,
+            "f0": None,
+            "cache_features": cache_features,
+            "embedder_model": embedder_model,
+            "features": {},
+        }
+
+    def analysis_f0(self, analysis):
+        if analysis["f0"] is None:
+            with metrics.timer("f0"):
+                analysis["f0"] = self.compute_f0(
+                    analysis["input_audio_path"],
+                    analysis["audio_pad"],
+                    analysis["p_len"],
+                    analysis["f0_method"],
+                    analysis["filter_radius"],
+                    analysis["hop_length"],
+                    analysis["f0autotune"],
+                )
+        return analysis["f0"]
+
+    def analysis_features(self, model, analysis, version):
+        if version not in analysis["features"]:
+            analysis["features"][version] = [
+                self.extract_features(
+                    model, chunk, version, analysis["embedder_model"]
+                )
+                for chunk in analysis["chunks"]
+            ]
+        return analysis["features"][version]
+
+    def synthesize(
+        self,
+        model,
+        net_g,
+        sid,
+        analysis,
+        f0_up_key,
+        file_index,
+        index_rate,
+        if_f0,
+        tgt_sr,
+        resample_sr,
+        rms_mix_rate,
+        version,
+        protect,
+    ):
+        """Render one voice from an analysis made by analyze"""
+        if file_index != "" and os.path.exists(file_index) == True and index_rate != 0:
+            try:
+                index, big_npy = index_cache.get(file_index)
+            except Exception as error:
+                print(error)
+                index = big_npy = None
+        else:
+            index = big_npy = None
+        track_memory = str(self.device).startswith("cuda")
+        if track_memory:
+            torch.cuda.reset_peak_memory_stats(self.device)
+        audio = analysis["audio"]
+        p_len = analysis["p_len"]
+        segments = analysis["segments"]
+        chunks = analysis["chunks"]
         sid = torch.tensor(sid, device=self.device).unsqueeze(0).long()
         pitch, pitchf = None, None
         if if_f0 == 1:
-            pitch, pitchf = self.get_f0(
-                input_audio_path,
-                audio_pad,
-                p_len,
-                f0_up_key,
-                f0_method,
-                filter_radius,
-                hop_length,
-                f0autotune,
-                inp_f0,
+            pitch, pitchf = self.shift_f0(
+                self.analysis_f0(analysis), f0_up_key, analysis["inp_f0"]
             )
             pitch = pitch[:p_len]
             pitchf = pitchf[:p_len]
@@ -539,87 +862,139 @@ class VC(object):
                 pitchf = pitchf.astype(np.float32)
             pitch = torch.tensor(pitch, device=self.device).unsqueeze(0).long()
             pitchf = torch.tensor(pitchf, device=self.device).unsqueeze(0).float()
-        t2 = ttime()
-        for t in opt_ts:
-            t = t // self.window * self.window
-            if if_f0 == 1:
-                audio_opt.append(
+            pitches = [pitch[:, start:end] for _, _, start, end in segments]
+            pitchfs = [pitchf[:, start:end] for _, _, start, end in segments]
+        else:
+            pitches = pitchfs = [None] * len(segments)
+
+        if analysis["cache_features"] or (
+            self.cache_features and analysis["embedder_model"] is not None
+        ):
+            features = self.analysis_features(model, analysis, version)
+            batches = [[i] for i in range(len(chunks))]
+        else:
+            features = [None] * len(chunks)
+            batches = self.plan_batches(net_g, chunks)
+
+        # Trimmed chunk outputs are written in order into one target rate buffer,
+        # batches may finish out of order so later chunks wait in pending
+        frame_out = self.t_pad_tgt * self.window // self.t_pad
+        audio_opt = np.empty(
+            sum(chunk.shape[0] // self.window for chunk in chunks) * frame_out,
+            dtype=np.float32,
+        )
+        written = 0
+        next_chunk = 0
+        pending = {}
+        for batch in batches:
+            if len(batch) == 1:
+                i = batch[0]
+                outputs = [
                     self.vc(
                         model,
                         net_g,
                         sid,
-                        audio_pad[s : t + self.t_pad2 + self.window],
-                        pitch[:, s // self.window : (t + self.t_pad2) // self.window],
-                        pitchf[:, s // self.window : (t + self.t_pad2) // self.window],
+                        chunks[i],
+                        pitches[i],
+                        pitchfs[i],
                         index,
                         big_npy,
                         index_rate,
                         version,
                         protect,
-                    )[self.t_pad_tgt : -self.t_pad_tgt]
-                )
+                        feats=features[i],
+                    )
+                ]
             else:
-                audio_opt.append(
-                    self.vc(
-                        model,
-                        net_g,
-                        sid,
-                        audio_pad[s : t + self.t_pad2 + self.window],
-                        None,
-                        None,
-                        index,
-                        big_npy,
-                        index_rate,
-                        version,
-                        protect,
-                    )[self.t_pad_tgt : -self.t_pad_tgt]
-                )
-            s = t
-        if if_f0 == 1:
-            audio_opt.append(
-                self.vc(
+                outputs = self.vc_batch(
                     model,
                     net_g,
                     sid,
-                    audio_pad[t:],
-                    pitch[:, t // self.window :] if t is not None else pitch,
-                    pitchf[:, t // self.window :] if t is not None else pitchf,
+                    [chunks[i] for i in batch],
+                    [pitches[i] for i in batch] if if_f0 == 1 else None,
+                    [pitchfs[i] for i in batch] if if_f0 == 1 else None,
                     index,
                     big_npy,
                     index_rate,
                     version,
                     protect,
-                )[self.t_pad_tgt : -self.t_pad_tgt]
-            )
-        else:
-            audio_opt.append(
-                self.vc(
-                    model,
-                    net_g,
-                    sid,
-                    audio_pad[t:],
-                    None,
-                    None,
-                    index,
-                    big_npy,
-                    index_rate,
-                    version,
-                    protect,
-                )[self.t_pad_tgt : -self.t_pad_tgt]
-            )
-        audio_opt = np.concatenate(audio_opt)
-        if rms_mix_rate != 1:
-            audio_opt = change_rms(audio, 16000, audio_opt, tgt_sr, rms_mix_rate)
-        if resample_sr >= 16000 and tgt_sr != resample_sr:
-            audio_opt = librosa.resample(
-                audio_opt, orig_sr=tgt_sr, target_sr=resample_sr
-            )
-        audio_max = np.abs(audio_opt).max() / 0.99
-        max_int16 = 32768
-        if audio_max > 1:
-            max_int16 /= audio_max
-        audio_opt = (audio_opt * max_int16).astype(np.int16)
+                )
+            for i, output in zip(batch, outputs):
+                pending[i] = output[self.t_pad_tgt : -self.t_pad_tgt]
+            while next_chunk in pending:
+                output = pending.pop(next_chunk)
+                if written + output.shape[0] > audio_opt.shape[0]:
+                    audio_opt = np.concatenate(
+                        [audio_opt[:written], np.empty_like(output)]
+                    )
+                audio_opt[written : written + output.shape[0]] = output
+                written += output.shape[0]
+                next_chunk += 1
+        with metrics.timer("resample"):
+            audio_opt = audio_opt[:written]
+            if rms_mix_rate != 1:
+                audio_opt = change_rms(audio, 16000, audio_opt, tgt_sr, rms_mix_rate)
+            if resample_sr >= 16000 and tgt_sr != resample_sr:
+                audio_opt = librosa.resample(
+                    audio_opt, orig_sr=tgt_sr, target_sr=resample_sr
+                )
+            audio_max = np.abs(audio_opt).max() / 0.99
+            max_int16 = 32768
+            if audio_max > 1:
+                max_int16 /= audio_max
+            audio_opt = (audio_opt * max_int16).astype(np.int16)
         del pitch, pitchf, sid
-        if torch.cuda.is_available():
-            torch.cuda.empty_cache()
+        # The CUDA cache is only flushed when a model is evicted, see ModelCache
+        if track_memory:
+            self.peak_memory = torch.cuda.max_memory_allocated(self.device)
+            print(f"Peak allocated CUDA memory: {self.peak_memory / 1024**2:.0f} MB")
         return audio_opt
+
+    def pipeline(
+        self,
+        model,
+        net_g,
+        sid,
+        audio,
+        input_audio_path,
+        f0_up_key,
+        f0_method,
+        file_index,
+        index_rate,
+        if_f0,
+        filter_radius,
+        tgt_sr,
+        resample_sr,
+        rms_mix_rate,
+        version,
+        protect,
+        hop_length,
+        f0autotune,
+        f0_file=None,
+        embedder_model=None,
+    ):
+        analysis = self.analyze(
+            audio,
+            input_audio_path,
+            f0_method,
+            filter_radius,
+            hop_length,
+            f0autotune,
+            f0_file=f0_file,
+            embedder_model=embedder_model,
+        )
+        return self.synthesize(
+            model,
+            net_g,
+            sid,
+            analysis,
+            f0_up_key,
+            file_index,
+            index_rate,
+            if_f0,
+            tgt_sr,
+            resample_sr,
+            rms_mix_rate,
+            version,
+            protect,
+        )
@@ -0,0 +1,204 @@
+import os
+import copy
+import time
+import uuid
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+QUANTIZED_SUFFIX = ".int8.pt"
+# Parts of net_g that get quantized, the vocoder (net_g.dec) stays in fp32
+# since int8 weights there are directly audible
+SYNTHESIZER_SCOPES = ("enc_p", "flow")
+
+
+def quantized_path(source_path):
+    return os.path.splitext(source_path)[0] + QUANTIZED_SUFFIX
+
+
+class LinearConv1d(nn.Module):
+    """Conv1d computed as a Linear over sliding windows, so dynamic quantization applies to it"""
+
+    def __init__(self, conv):
+        super().__init__()
+        self.kernel_size = conv.kernel_size[0]
+        self.padding = conv.padding[0]
+        # Reading weight also resolves weight norm parametrizations
+        weight = conv.weight.detach()
+        self.linear = nn.Linear(
+            weight.shape[1] * self.kernel_size,
+            weight.shape[0],
+            bias=conv.bias is not None,
+        )
+        self.linear.weight.data = weight.reshape(weight.shape[0], -1).clone()
+        if conv.bias is not None:
+            self.linear.bias.data = conv.bias.detach().clone()
+
+    def forward(self, x):
+        if self.padding:
+            x = F.pad(x, (self.padding, self.padding))
+        if self.kernel_size > 1:
+            # [b, c, t, k] windows flattened channel major, like the conv weight
+            x = x.unfold(2, self.kernel_size, 1).transpose(1, 2).flatten(2)
+        else:
+            x = x.transpose(1, 2)
+        return self.linear(x).transpose(1, 2)
+
+
+def is_linearizable(module):
+    return (
+        isinstance(module, nn.Conv1d)
+        and module.stride == (1,)
+        and module.dilation == (1,)
+        and module.groups == 1
+        and module.padding_mode == "zeros"
+        and not isinstance(module.padding, str)
+    )
+
+
+def linearize_convs(module):
+    """Replaces the Conv1d layers of module that LinearConv1d can express, in place"""
+    for name, child in module.named_children():
+        if is_linearizable(child):
+            setattr(module, name, LinearConv1d(child))
+        else:
+            linearize_convs(child)
+    return module
+
+
+def quantize_linear(module, inplace=False):
+    return torch.ao.quantization.quantize_dynamic(
+        module, {nn.Linear}, dtype=torch.qint8, inplace=inplace
+    )
+
+
+def load_quantized(source_path, modules):
+    """Quantizes modules, a dict of CPU modules by name, in place.
+
+    Only the quantized state dicts are cached next to source_path. The
+    quantized structure always comes from the current code, so a cache
+    written for another structure fails to load and is rewritten.
+    """
+    quantized = {
+        name: quantize_linear(linearize_convs(module), inplace=True).eval()
+        for name, module in modules.items()
+    }
+
+    path = quantized_path(source_path)
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(
+        source_path
+    ):
+        try:
+            state = torch.load(path, map_location="cpu", weights_only=True)
+            for name, module in quantized.items():
+                module.load_state_dict(state[name])
+            return quantized
+        except Exception as error:
+            print(f"Could not read {path}, quantizing again: {error}")
+
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        torch.save(
+            {name: module.state_dict() for name, module in quantized.items()}, tmp_path
+        )
+        os.replace(tmp_path, path)
+    except OSError as error:
+        print(f"Could not write {path}: {error}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return quantized
+
+
+def load_quantized_synthesizer(weight_root, net_g):
+    """Dynamic int8 quantization of the text encoder and flow of a CPU net_g, in place"""
+    quantized = load_quantized(
+        weight_root, {scope: getattr(net_g, scope) for scope in SYNTHESIZER_SCOPES}
+    )
+    for scope, module in quantized.items():
+        setattr(net_g, scope, module)
+    return net_g
+
+
+def load_quantized_embedder(embedder, model_path):
+    return load_quantized(model_path, {"embedder": embedder})["embedder"]
+
+
+def check_quantization(
+    input_paths, model_path, embedder_model="contentvec", f0_method="rmvpe", sid=0
+):
+    """Mel distance and speedup of the int8 mode against fp32 on reference audio.
+
+    Both runs of each file use the same random seed, so the distance is due
+    to quantization alone.
+    """
+    from rvc.configs.config import Config
+    from rvc.infer.model_cache import load_voice_model
+    from rvc.lib.utils import EMBEDDING_MODELS, load_audio, load_embedding
+    from rvc.lib.utils import mel_distance
+
+    config = Config()
+    if config.device != "cpu":
+        raise RuntimeError("Quantized inference runs on CPU only")
+
+    model = load_voice_model(model_path, config, backend="torch")
+    quantized = load_voice_model(model_path, config, backend="int8")
+    embedder = load_embedding(embedder_model, native=config.native_embedder)
+    embedder = embedder.float().eval()
+    quantized_embedder = load_quantized_embedder(
+        copy.deepcopy(embedder), EMBEDDING_MODELS[embedder_model]
+    )
+    sid = torch.tensor(sid).unsqueeze(0).long()
+
+    results = []
+    for input_path in input_paths:
+        audio = load_audio(input_path, 16000)
+        # Estimate f0 up front so it is not timed for only one of the runs
+        model.vc.analyze(audio, input_path, f0_method, 3, 128, "False")
+        outputs = []
+        times = []
+        for hubert_model, net_g in (
+            (embedder, model.net_g),
+            (quantized_embedder, quantized.net_g),
+        ):
+            torch.manual_seed(0)
+            start = time.perf_counter()
+            output = model.vc.pipeline(
+                hubert_model,
+                net_g,
+                sid,
+                audio,
+                input_path,
+                0,
+                f0_method,
+                "",
+                0,
+                model.if_f0,
+                3,
+                model.tgt_sr,
+                0,
+                1,
+                model.version,
+                0.33,
+                128,
+                "False",
+            )
+            times.append(time.perf_counter() - start)
+            outputs.append(output.astype(np.float32) / 32768)
+
+        distance = mel_distance(outputs[0], outputs[1], model.tgt_sr)
+        speedup = times[0] / times[1]
+        print(
+            f"{input_path}: mel distance {distance:.3f} dB, "
+            f"fp32 {times[0]:.2f}s, int8 {times[1]:.2f}s ({speedup:.2f}x)"
+        )
+        results.append(
+            {"input_path": input_path, "mel_distance": distance, "speedup": speedup}
+        )
+
+    if results:
+        print(
+            f"Mean mel distance {np.mean([r['mel_distance'] for r in results]):.3f} dB, "
+            f"mean speedup {np.mean([r['speedup'] for r in results]):.2f}x"
+        )
+    return results
@@ -0,0 +1,253 @@
+import os
+import sys
+import contextlib
+import numpy as np
+import torch
+from scipy import signal
+
+now_dir = os.getcwd()
+sys.path.append(now_dir)
+
+from rvc.infer.pipeline import bh, ah
+from rvc.infer.index_cache import index_cache
+from rvc.lib.metrics import metrics
+
+
+class StreamingVC:
+    """Converts audio that arrives in blocks of 16 kHz samples.
+
+    Every block is converted together with the preceding context_time
+    seconds of input, so HuBERT and the pitch estimator see enough audio
+    without padding the input with x_pad seconds. Consecutive outputs
+    overlap by crossfade_time seconds and are crossfaded, which adds
+    crossfade_time to the latency of block_time plus processing time.
+    """
+
+    def __init__(
+        self,
+        hubert_model,
+        net_g,
+        vc,
+        tgt_sr,
+        if_f0,
+        version,
+        sid=0,
+        f0_up_key=0,
+        f0_method="rmvpe",
+        file_index="",
+        index_rate=0.3,
+        protect=0.33,
+        hop_length=128,
+        filter_radius=3,
+        f0autotune="False",
+        block_time=0.5,
+        context_time=1.0,
+        crossfade_time=0.05,
+    ):
+        self.hubert_model = hubert_model
+        self.net_g = net_g
+        self.vc = vc
+        self.tgt_sr = tgt_sr
+        self.if_f0 = if_f0
+        self.version = version
+        self.f0_up_key = int(f0_up_key)
+        self.f0_method = f0_method
+        self.index_rate = float(index_rate)
+        self.protect = float(protect)
+        self.hop_length = hop_length
+        self.filter_radius = filter_radius
+        self.f0autotune = f0autotune
+        self.sid = torch.tensor(sid, device=vc.device).unsqueeze(0).long()
+
+        self.index = self.big_npy = None
+        if file_index and os.path.exists(file_index) and self.index_rate != 0:
+            self.index, self.big_npy = index_cache.get(file_index)
+
+        window = vc.window
+        self.block_size = max(1, round(block_time * vc.sr / window)) * window
+        self.context_size = round(context_time * vc.sr / window) * window
+        self.crossfade_size = max(1, round(crossfade_time * vc.sr / window)) * window
+        # Output samples per f0 frame, an integer for all model sample rates
+        self.frame_out = tgt_sr // (vc.sr // window)
+        self.block_out = self.block_size // window * self.frame_out
+        self.crossfade_out = self.crossfade_size // window * self.frame_out
+
+        fade_in = np.sin(0.5 * np.pi * np.linspace(0, 1, self.crossfade_out)) ** 2
+        self.fade_in = fade_in.astype(np.float32)
+        self.fade_out = 1 - self.fade_in
+
+        self.reset()
+
+    def reset(self):
+        self.buffer = np.zeros(
+            self.context_size + self.crossfade_size + self.block_size, dtype=np.float32
+        )
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.tail = np.zeros(self.crossfade_out, dtype=np.float32)
+        # The first output starts crossfade_size before the first input sample
+        self.skip = self.crossfade_out
+
+    def _convert_buffer(self):
+        vc = self.vc
+        audio = signal.filtfilt(bh, ah, self.buffer)
+        # Edge frames come out shorter than the input, pad past the end so the
+        # converted audio covers the whole buffer
+        audio = np.pad(audio, (0, vc.window * 4), mode="reflect")
+        p_len = audio.shape[0] // vc.window
+
+        pitch = pitchf = None
+        if self.if_f0 == 1:
+            with metrics.timer("f0"):
+                pitch, pitchf = vc.get_f0(
+                    "stream",
+                    audio,
+                    p_len,
+                    self.f0_up_key,
+                    self.f0_method,
+                    self.filter_radius,
+                    self.hop_length,
+                    self.f0autotune,
+                    use_cache=False,
+                )
+            pitch = pitch[:p_len]
+            pitchf = pitchf[:p_len]
+            if vc.device == "mps":
+                pitchf = pitchf.astype(np.float32)
+            pitch = torch.tensor(pitch, device=vc.device).unsqueeze(0).long()
+            pitchf = torch.tensor(pitchf, device=vc.device).unsqueeze(0).float()
+
+        converted = vc.vc(
+            self.hubert_model,
+            self.net_g,
+            self.sid,
+            audio,
+            pitch,
+            pitchf,
+            self.index,
+            self.big_npy,
+            self.index_rate,
+            self.version,
+            self.protect,
+        )
+
+        start = self.context_size // vc.window * self.frame_out
+        end = start + self.crossfade_out + self.block_out
+        segment = converted[start:end]
+        if segment.shape[0] < end - start:
+            segment = np.pad(segment, (0, end - start - segment.shape[0]))
+        return segment
+
+    def _process_block(self, block, length=None):
+        """Convert one block_size block, returns output for its first length samples"""
+        self.buffer = np.concatenate([self.buffer[self.block_size :], block])
+        segment = self._convert_buffer()
+
+        output = segment[: self.block_out].copy()
+        output[: self.crossfade_out] = (
+            self.tail * self.fade_out + output[: self.crossfade_out] * self.fade_in
+        )
+        self.tail = segment[self.block_out :]
+
+        if length is not None:
+            output = np.concatenate([output, self.tail])
+            output = output[: self.crossfade_out + length // self.vc.window * self.frame_out]
+
+        if self.skip:
+            skipped = min(self.skip, output.shape[0])
+            output = output[skipped:]
+            self.skip -= skipped
+        return np.clip(output, -1.0, 1.0)
+
+    def feed(self, samples):
+        """Add 16 kHz float samples, yields converted blocks at tgt_sr"""
+        samples = np.clip(np.asarray(samples, dtype=np.float32).reshape(-1), -1.0, 1.0)
+        self.pending = np.concatenate([self.pending, samples])
+
+        while self.pending.shape[0] >= self.block_size:
+            block = self.pending[: self.block_size]
+            self.pending = self.pending[self.block_size :]
+            with metrics.timer("stream_block"):
+                output = self._process_block(block)
+            yield output
+
+    def flush(self):
+        """Convert what is left of the input, returns the end of the output"""
+        length = self.pending.shape[0]
+        block = np.pad(self.pending, (0, self.block_size - length))
+        output = self._process_block(block, length)
+        self.reset()
+        return output
+
+    def stream(self, blocks):
+        """Generator converting an iterable of 16 kHz sample blocks"""
+        for block in blocks:
+            yield from self.feed(block)
+        yield self.flush()
+
+
+def read_pcm_blocks(file, block_size):
+    """16-bit mono PCM blocks from a binary file, as float samples"""
+    while True:
+        data = file.read(block_size * 2)
+        if not data:
+            return
+        yield np.frombuffer(data[: len(data) // 2 * 2], dtype=np.int16).astype(
+            np.float32
+        ) / 32768.0
+
+
+def stream_pipeline(
+    f0up_key,
+    filter_radius,
+    index_rate,
+    protect,
+    hop_length,
+    f0method,
+    model_path,
+    index_path,
+    f0autotune,
+    embedder_model,
+    block_time,
+    context_time,
+    crossfade_time,
+    output=None,
+):
+    """Convert 16 kHz 16-bit mono PCM from stdin to PCM at the model rate on stdout.
+
+    output is the binary file the PCM goes to, sys.stdout by default.
+    """
+    from rvc.infer import infer
+
+    stdin = sys.stdin.buffer
+    stdout = output or sys.stdout.buffer
+
+    # stdout carries the audio, log messages go to stderr
+    with contextlib.redirect_stdout(sys.stderr):
+        infer.get_vc(model_path, 0)
+        if not infer.hubert_model:
+            infer.load_hubert(embedder_model)
+
+        streamer = StreamingVC(
+            infer.hubert_model,
+            infer.net_g,
+            infer.vc,
+            infer.tgt_sr,
+            infer.cpt.get("f0", 1),
+            infer.version,
+            f0_up_key=f0up_key,
+            f0_method=f0method,
+            file_index=index_path,
+            index_rate=index_rate,
+            protect=protect,
+            hop_length=hop_length,
+            filter_radius=filter_radius,
+            f0autotune=f0autotune,
+            block_time=float(block_time),
+            context_time=float(context_time),
+            crossfade_time=float(crossfade_time),
+        )
+        print(f"Streaming: input 16000 Hz, output {infer.tgt_sr} Hz, 16-bit mono PCM")
+
+        for block in streamer.stream(read_pcm_blocks(stdin, streamer.block_size)):
+            stdout.write((block * 32767).astype(np.int16).tobytes())
+            stdout.flush()
@@ -0,0 +1,66 @@
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Least recently used cache bounded by the total size of its entries.
+
+    The most recently added entry is always kept, even if it alone exceeds
+    the budget, so a single oversized item can still be used.
+    """
+
+    def __init__(self, max_bytes, on_evict=None):
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self.total_bytes = 0
+        self.entries = OrderedDict()
+        self.lock = threading.RLock()
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.entries
+
+    def __len__(self):
+        with self.lock:
+            return len(self.entries)
+
+    def keys(self):
+        with self.lock:
+            return list(self.entries.keys())
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key not in self.entries:
+                return default
+            self.entries.move_to_end(key)
+            return self.entries[key][0]
+
+    def put(self, key, value, size):
+        with self.lock:
+            if key in self.entries:
+                self.pop(key)
+            self.entries[key] = (value, size)
+            self.total_bytes += size
+            self.shrink()
+
+    def pop(self, key):
+        with self.lock:
+            if key not in self.entries:
+                return None
+            value, size = self.entries.pop(key)
+            self.total_bytes -= size
+        if self.on_evict is not None:
+            self.on_evict(key, value)
+        return value
+
+    def shrink(self, max_bytes=None):
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+        with self.lock:
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                self.pop(next(iter(self.entries)))
+
+    def clear(self):
+        with self.lock:
+            for key in list(self.entries.keys()):
+                self.pop(key)
@@ -0,0 +1,320 @@
+import ast
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from rvc.lib.model_file import (
+    load_weights,
+    model_file_path,
+    read_metadata,
+    resolve_model_file,
+    save_model_file,
+)
+
+# Settings of the fairseq HuBERT base checkpoints (hubert_base.pt, contentvec_base.pt)
+EMBEDDER_CONFIG = {
+    "conv_feature_layers": [(512, 10, 5)] + [(512, 3, 2)] * 4 + [(512, 2, 2)] * 2,
+    "encoder_layers": 12,
+    "encoder_embed_dim": 768,
+    "encoder_ffn_embed_dim": 3072,
+    "encoder_attention_heads": 12,
+    "conv_pos": 128,
+    "conv_pos_groups": 16,
+    "final_dim": 256,
+}
+# Settings the embedder below does not implement, with the only supported value
+UNSUPPORTED_CONFIG = {
+    "extractor_mode": "default",
+    "layer_norm_first": False,
+    "conv_bias": False,
+    "activation_fn": "gelu",
+}
+
+
+class Fp32GroupNorm(nn.GroupNorm):
+    def forward(self, input):
+        output = F.group_norm(
+            input.float(),
+            self.num_groups,
+            self.weight.float(),
+            self.bias.float(),
+            self.eps,
+        )
+        return output.type_as(input)
+
+
+class SamePad(nn.Module):
+    def __init__(self, kernel_size):
+        super().__init__()
+        self.remove = 1 if kernel_size % 2 == 0 else 0
+
+    def forward(self, x):
+        return x[:, :, : -self.remove] if self.remove else x
+
+
+class ConvFeatureExtractor(nn.Module):
+    def __init__(self, conv_layers):
+        super().__init__()
+        self.conv_layers = nn.ModuleList()
+        in_dim = 1
+        for i, (dim, kernel_size, stride) in enumerate(conv_layers):
+            block = [nn.Conv1d(in_dim, dim, kernel_size, stride=stride, bias=False)]
+            block.append(nn.Dropout(0.0))
+            if i == 0:
+                block.append(Fp32GroupNorm(dim, dim, affine=True))
+            block.append(nn.GELU())
+            self.conv_layers.append(nn.Sequential(*block))
+            in_dim = dim
+
+    def forward(self, x):
+        x = x.unsqueeze(1)
+        for conv in self.conv_layers:
+            x = conv(x)
+        return x
+
+
+class SelfAttention(nn.Module):
+    def __init__(self, embed_dim, num_heads):
+        super().__init__()
+        self.num_heads = num_heads
+        self.k_proj = nn.Linear(embed_dim, embed_dim)
+        self.v_proj = nn.Linear(embed_dim, embed_dim)
+        self.q_proj = nn.Linear(embed_dim, embed_dim)
+        self.out_proj = nn.Linear(embed_dim, embed_dim)
+
+    def forward(self, x, padding_mask=None):
+        batch, length, dim = x.shape
+
+        def heads(projection):
+            return projection(x).view(batch, length, self.num_heads, -1).transpose(1, 2)
+
+        attn_mask = None
+        if padding_mask is not None:
+            attn_mask = ~padding_mask[:, None, None, :]
+        x = F.scaled_dot_product_attention(
+            heads(self.q_proj), heads(self.k_proj), heads(self.v_proj), attn_mask
+        )
+        return self.out_proj(x.transpose(1, 2).reshape(batch, length, dim))
+
+
+class EncoderLayer(nn.Module):
+    def __init__(self, embed_dim, ffn_embed_dim, num_heads):
+        super().__init__()
+        self.self_attn = SelfAttention(embed_dim, num_heads)
+        self.self_attn_layer_norm = nn.LayerNorm(embed_dim)
+        self.fc1 = nn.Linear(embed_dim, ffn_embed_dim)
+        self.fc2 = nn.Linear(ffn_embed_dim, embed_dim)
+        self.final_layer_norm = nn.LayerNorm(embed_dim)
+
+    def forward(self, x, padding_mask=None):
+        x = self.self_attn_layer_norm(x + self.self_attn(x, padding_mask))
+        x = self.final_layer_norm(x + self.fc2(F.gelu(self.fc1(x))))
+        return x
+
+
+class Encoder(nn.Module):
+    def __init__(self, config):
+        super().__init__()
+        embed_dim = config["encoder_embed_dim"]
+        self.pos_conv = nn.Sequential(
+            nn.Conv1d(
+                embed_dim,
+                embed_dim,
+                kernel_size=config["conv_pos"],
+                padding=config["conv_pos"] // 2,
+                groups=config["conv_pos_groups"],
+            ),
+            SamePad(config["conv_pos"]),
+            nn.GELU(),
+        )
+        self.layers = nn.ModuleList(
+            EncoderLayer(
+                embed_dim,
+                config["encoder_ffn_embed_dim"],
+                config["encoder_attention_heads"],
+            )
+            for _ in range(config["encoder_layers"])
+        )
+        self.layer_norm = nn.LayerNorm(embed_dim)
+
+    def forward(self, x, padding_mask=None, output_layer=None):
+        if padding_mask is not None:
+            x = x.masked_fill(padding_mask.unsqueeze(-1), 0)
+        x = x + self.pos_conv(x.transpose(1, 2)).transpose(1, 2)
+        x = self.layer_norm(x)
+        for layer in self.layers[:output_layer]:
+            x = layer(x, padding_mask)
+        return x
+
+
+def feature_length(conv_feature_layers, length):
+    """Number of feature frames for length samples"""
+    for _, kernel_size, stride in conv_feature_layers:
+        length = (length - kernel_size) // stride + 1
+    return length
+
+
+class HubertEmbedder(nn.Module):
+    """Inference only HuBERT, the parts of the fairseq model used for features.
+
+    extract_features and final_proj behave like the fairseq HubertModel
+    methods of the same name, so the model is a drop-in replacement for
+    feature extraction.
+    """
+
+    def __init__(self, config, normalize=False):
+        super().__init__()
+        self.normalize = normalize
+        self.conv_feature_layers = config["conv_feature_layers"]
+        embed_dim = config["encoder_embed_dim"]
+        conv_dim = config["conv_feature_layers"][-1][0]
+        self.feature_extractor = ConvFeatureExtractor(config["conv_feature_layers"])
+        self.layer_norm = nn.LayerNorm(conv_dim)
+        self.post_extract_proj = nn.Linear(conv_dim, embed_dim)
+        self.encoder = Encoder(config)
+        # Like fairseq, a final_dim of 0 keeps the encoder dimension
+        final_dim = config["final_dim"] if config["final_dim"] > 0 else embed_dim
+        self.final_proj = nn.Linear(embed_dim, final_dim)
+
+    def feature_length(self, length):
+        return feature_length(self.conv_feature_layers, length)
+
+    @staticmethod
+    def frame_padding_mask(padding_mask, frames):
+        """A frame is padding when all the samples it covers are"""
+        extra = padding_mask.size(1) % frames
+        if extra > 0:
+            padding_mask = padding_mask[:, :-extra]
+        return padding_mask.view(padding_mask.size(0), frames, -1).all(-1)
+
+    def encode(self, source, frame_padding_mask=None, output_layer=None):
+        features = self.feature_extractor(source).transpose(1, 2)
+        features = self.layer_norm(features)
+        return self.encoder(
+            self.post_extract_proj(features), frame_padding_mask, output_layer
+        )
+
+    def extract_features(self, source, padding_mask=None, output_layer=None):
+        if padding_mask is not None:
+            frames = self.feature_length(source.size(1))
+            padding_mask = self.frame_padding_mask(padding_mask, frames)
+        return self.encode(source, padding_mask, output_layer), padding_mask
+
+
+def checkpoint_config(checkpoint):
+    """Model settings and task normalize flag of a fairseq HuBERT checkpoint"""
+    if checkpoint.get("cfg") is not None:
+        model_cfg = dict(checkpoint["cfg"]["model"])
+        normalize = checkpoint["cfg"]["task"]["normalize"]
+    else:
+        model_cfg = vars(checkpoint["args"])
+        normalize = model_cfg.get("normalize", False)
+
+    for name, value in UNSUPPORTED_CONFIG.items():
+        if name in model_cfg and model_cfg[name] != value:
+            raise ValueError(f"Unsupported embedder setting {name}={model_cfg[name]}")
+
+    config = {}
+    for name, default in EMBEDDER_CONFIG.items():
+        value = model_cfg.get(name, default)
+        if name == "conv_feature_layers" and isinstance(value, str):
+            value = eval_conv_layers(value)
+        config[name] = value
+    return config, bool(normalize)
+
+
+def eval_conv_layers(spec):
+    """Layer list of a fairseq conv_feature_layers string like "[(512, 10, 5)] * 2" """
+    layers = []
+    for part in spec.split("+"):
+        part = part.strip()
+        repeat = 1
+        if "*" in part.rsplit("]", 1)[-1]:
+            part, repeat = part.rsplit("*", 1)
+            repeat = int(repeat)
+        layers += [tuple(layer) for layer in ast.literal_eval(part.strip())] * repeat
+    return layers
+
+
+def convert_embedder(model_path, output_path=None):
+    """Writes the weights and settings of a fairseq HuBERT checkpoint to a model file"""
+    output_path = output_path or model_file_path(model_path)
+    checkpoint = torch.load(model_path, map_location="cpu")
+    config, normalize = checkpoint_config(checkpoint)
+    state = checkpoint["model"]
+
+    # The positional convolution uses weight norm, store the resulting weight
+    prefix = "encoder.pos_conv.0."
+    if prefix + "weight_g" in state:
+        g, v = state[prefix + "weight_g"], state[prefix + "weight_v"]
+    else:
+        g = state[prefix + "parametrizations.weight.original0"]
+        v = state[prefix + "parametrizations.weight.original1"]
+    state = dict(state)
+    state[prefix + "weight"] = torch._weight_norm(v, g, 2)
+
+    expected = HubertEmbedder(config).state_dict()
+    weights = {name: state[name] for name in expected}
+
+    save_model_file(output_path, weights, {"config": config, "normalize": normalize})
+    print(f"Converted embedder {model_path} to {output_path}")
+    return output_path
+
+
+def load_embedder(model_path):
+    """HubertEmbedder for a fairseq checkpoint, converted on first use"""
+    model_file = resolve_model_file(model_path)
+    if model_file is None:
+        model_file = convert_embedder(model_path)
+
+    metadata = read_metadata(model_file)
+    config = dict(metadata["config"])
+    config["conv_feature_layers"] = [tuple(layer) for layer in config["conv_feature_layers"]]
+    model = HubertEmbedder(config, normalize=metadata["normalize"])
+    model.load_state_dict(load_weights(model_file))
+    return model
+
+
+def load_fairseq_embedder(model_path):
+    """The fairseq HubertModel, with the normalize flag of its task"""
+    import logging
+    from fairseq import checkpoint_utils
+
+    logging.getLogger("fairseq").setLevel(logging.WARNING)
+    models, saved_cfg, _ = checkpoint_utils.load_model_ensemble_and_task(
+        [model_path], suffix=""
+    )
+    model = models[0]
+    model.normalize = saved_cfg.task.normalize
+    return model
+
+
+def check_embedder(model_path, device="cpu", seconds=3, tolerance=1e-3):
+    """Largest difference between the features of this embedder and fairseq's"""
+    embedder = load_embedder(model_path).to(device).eval()
+    reference = load_fairseq_embedder(model_path).to(device).eval()
+
+    generator = torch.Generator().manual_seed(0)
+    source = (torch.rand(2, 16000 * seconds, generator=generator) * 2 - 1) * 0.5
+    padding_mask = torch.zeros(source.shape, dtype=torch.bool)
+    # The second item is half padding, like a short chunk in a batch
+    padding_mask[1, source.shape[1] // 2 :] = True
+    source = source.masked_fill(padding_mask, 0).to(device)
+    padding_mask = padding_mask.to(device)
+
+    difference = 0.0
+    with torch.no_grad():
+        for output_layer in (9, 12):
+            outputs = []
+            for model in (embedder, reference):
+                x, mask = model.extract_features(
+                    source=source, padding_mask=padding_mask, output_layer=output_layer
+                )
+                if output_layer == 9:
+                    x = model.final_proj(x)
+                outputs.append(x.masked_fill(mask.unsqueeze(-1), 0))
+            difference = max(difference, (outputs[0] - outputs[1]).abs().max().item())
+
+    status = "matches" if difference <= tolerance else "does not match"
+    print(f"Embedder {model_path} {status} fairseq, max difference {difference:.2e}")
+    return difference
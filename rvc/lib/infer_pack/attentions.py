@@ -287,6 +287,16 @@ class MultiHeadAttention(nn.Module):
         return ret
 
     def _get_relative_embeddings(self, relative_embeddings, length):
+        if torch.onnx.is_in_onnx_export():
+            # The length is traced, so pad by it unconditionally instead of
+            # branching on it, which keeps the exported graph valid for any length
+            padded_relative_embeddings = F.pad(
+                relative_embeddings,
+                commons.convert_pad_shape([[0, 0], [length, length], [0, 0]]),
+            )
+            start = self.window_size + 1
+            return padded_relative_embeddings[:, start : start + 2 * length - 1]
+
         pad_length = max(length - (self.window_size + 1), 0)
         slice_start_position = max((self.window_size + 1) - length, 0)
         slice_end_position = slice_start_position + 2 * length - 1
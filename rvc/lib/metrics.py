@@ -0,0 +1,106 @@
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+    300.0,
+)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+
+class StageMetrics:
+    """Per stage latency histograms rendered in Prometheus text format"""
+
+    def __init__(self, name="rvc_stage_duration_seconds"):
+        self.name = name
+        self.histograms = {}
+        self.lock = threading.Lock()
+        self._local = threading.local()
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            if stage not in self.histograms:
+                self.histograms[stage] = Histogram()
+            self.histograms[stage].observe(seconds)
+
+        captured = getattr(self._local, "captured", None)
+        if captured is not None:
+            captured.append((stage, seconds))
+
+    @contextmanager
+    def timer(self, stage, sync=None):
+        """Time the block, sync is called before the clock stops, e.g. to wait
+        for asynchronous GPU work queued by the block"""
+        start = time.perf_counter()
+        try:
+            yield
+            if sync is not None:
+                sync()
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    @contextmanager
+    def capture(self):
+        """Collect observations made by the current thread, e.g. to pass them to another process"""
+        previous = getattr(self._local, "captured", None)
+        self._local.captured = captured = []
+        try:
+            yield captured
+        finally:
+            self._local.captured = previous
+
+    def observe_many(self, observations):
+        for stage, seconds in observations:
+            self.observe(stage, seconds)
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} Time spent in each processing stage.",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self.lock:
+            for stage, histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(
+                        f'{self.name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}'
+                    )
+                lines.append(
+                    f'{self.name}_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}'
+                )
+                lines.append(f'{self.name}_sum{{stage="{stage}"}} {histogram.sum}')
+                lines.append(f'{self.name}_count{{stage="{stage}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+
+metrics = StageMetrics()
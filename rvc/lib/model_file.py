@@ -0,0 +1,171 @@
+import os
+import json
+import uuid
+import struct
+import numpy as np
+import torch
+
+# The layout is the safetensors one: an 8 byte little endian header size, a
+# JSON header describing every tensor and the metadata, then the raw tensor
+# data. Files can be read with the safetensors package as well.
+MODEL_FILE_SUFFIX = ".safetensors"
+
+DTYPES = {
+    "F64": (torch.float64, np.float64),
+    "F32": (torch.float32, np.float32),
+    "F16": (torch.float16, np.float16),
+    "I64": (torch.int64, np.int64),
+    "I32": (torch.int32, np.int32),
+    "I16": (torch.int16, np.int16),
+    "I8": (torch.int8, np.int8),
+    "U8": (torch.uint8, np.uint8),
+    "BOOL": (torch.bool, np.bool_),
+}
+TORCH_DTYPES = {torch_dtype: name for name, (torch_dtype, _) in DTYPES.items()}
+
+
+def model_file_path(pth_path):
+    """Path of the mapped companion of a .pth file"""
+    return os.path.splitext(pth_path)[0] + MODEL_FILE_SUFFIX
+
+
+def resolve_model_file(path):
+    """The model file to read for path, None if there is no up to date one"""
+    if path.endswith(MODEL_FILE_SUFFIX):
+        return path
+
+    model_file = model_file_path(path)
+    if os.path.exists(model_file) and os.path.getmtime(model_file) >= os.path.getmtime(
+        path
+    ):
+        return model_file
+    return None
+
+
+def read_header(path):
+    with open(path, "rb") as file:
+        (size,) = struct.unpack("<Q", file.read(8))
+        header = json.loads(file.read(size))
+    return header, 8 + size
+
+
+def read_metadata(path):
+    """Checkpoint fields other than the weights, without reading any tensor data"""
+    header, _ = read_header(path)
+    metadata = header.get("__metadata__", {})
+    return {key: json.loads(value) for key, value in metadata.items()}
+
+
+def load_weights(path):
+    """Tensors of the file as views of one copy-on-write memory map.
+
+    Nothing is read until a tensor is used, and processes mapping the same
+    file share its pages through the page cache.
+    """
+    header, data_start = read_header(path)
+    data = np.memmap(path, dtype=np.uint8, mode="c")
+
+    weights = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        torch_dtype, np_dtype = DTYPES[info["dtype"]]
+        start, end = info["data_offsets"]
+        start += data_start
+        end += data_start
+        array = data[start:end]
+        if start % np.dtype(np_dtype).itemsize:
+            # Misaligned tensor written by another tool, copy it out
+            array = array.copy()
+        array = array.view(np_dtype).reshape(info["shape"])
+        weights[name] = torch.from_numpy(array)
+    return weights
+
+
+def save_model_file(path, weights, metadata):
+    """Writes weights and JSON serializable metadata to path atomically"""
+    # Largest elements first keeps every tensor aligned to its element size
+    names = sorted(
+        weights, key=lambda name: (-weights[name].element_size(), name)
+    )
+    tensors = {}
+    header = {}
+    offset = 0
+    for name in names:
+        tensor = weights[name].detach().cpu().contiguous()
+        if tensor.dtype not in TORCH_DTYPES:
+            tensor = tensor.float()
+        size = tensor.numel() * tensor.element_size()
+        header[name] = {
+            "dtype": TORCH_DTYPES[tensor.dtype],
+            "shape": list(tensor.shape),
+            "data_offsets": [offset, offset + size],
+        }
+        tensors[name] = tensor
+        offset += size
+    header["__metadata__"] = {
+        key: json.dumps(value, default=str) for key, value in metadata.items()
+    }
+
+    header = json.dumps(header, separators=(",", ":")).encode()
+    header += b" " * (-len(header) % 8)
+
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, "wb") as file:
+            file.write(struct.pack("<Q", len(header)))
+            file.write(header)
+            for name in names:
+                file.write(tensors[name].numpy().tobytes())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_checkpoint(path, weights=True):
+    """Voice model checkpoint as a dict, read from its model file when there is one"""
+    model_file = resolve_model_file(path)
+    if model_file is None:
+        cpt = torch.load(path, map_location="cpu")
+        if not weights:
+            cpt.pop("weight", None)
+        return cpt
+
+    cpt = read_metadata(model_file)
+    if weights:
+        cpt["weight"] = load_weights(model_file)
+    return cpt
+
+
+def convert_checkpoint(pth_path, output_path=None):
+    """Writes the model file for a .pth voice model, returns its path"""
+    output_path = output_path or model_file_path(pth_path)
+    cpt = torch.load(pth_path, map_location="cpu")
+    if "weight" not in cpt:
+        raise ValueError(f"{pth_path} is not a voice model")
+
+    metadata = {key: value for key, value in cpt.items() if key != "weight"}
+    save_model_file(output_path, cpt["weight"], metadata)
+    return output_path
+
+
+def convert_checkpoints(path):
+    """Converts a .pth file, or every voice model .pth directly inside a folder"""
+    if os.path.isdir(path):
+        pth_paths = [
+            os.path.join(path, name)
+            for name in sorted(os.listdir(path))
+            if name.endswith(".pth")
+        ]
+    else:
+        pth_paths = [path]
+
+    converted = []
+    for pth_path in pth_paths:
+        try:
+            converted.append(convert_checkpoint(pth_path))
+            print(f"Converted {pth_path} to {converted[-1]}")
+        except Exception as error:
+            print(f"Skipping {pth_path}: {error}")
+    return converted
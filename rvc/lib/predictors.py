@@ -0,0 +1,50 @@
+import threading
+from contextlib import contextmanager
+
+import torch
+
+# torchcrepe keeps a single global model, so crepe calls run one at a time
+crepe_lock = threading.Lock()
+
+_predictors = {}
+_lock = threading.Lock()
+
+
+def _load_predictor(kind, device, is_half, params):
+    if kind == "rmvpe":
+        from rvc.lib.rmvpe import RMVPE
+
+        return RMVPE("rmvpe.pt", is_half=is_half, device=device, **dict(params))
+    elif kind == "fcpe":
+        from rvc.lib.FCPEF0Predictor import FCPEF0Predictor
+
+        return FCPEF0Predictor(
+            "fcpe.pt", dtype=torch.float32, device=device, **dict(params)
+        )
+    raise ValueError(f"Unknown pitch predictor: {kind}")
+
+
+@contextmanager
+def use_predictor(kind, device, is_half=False, **params):
+    """Pitch predictor loaded once per process for the given device and settings.
+
+    The predictor is locked while in use, so different threads can share it.
+    """
+    key = (kind, str(device), is_half, tuple(sorted(params.items())))
+    with _lock:
+        entry = _predictors.get(key)
+        if entry is None:
+            print(f"Loading {kind} pitch predictor on {device}")
+            entry = (_load_predictor(kind, device, is_half, key[3]), threading.Lock())
+            _predictors[key] = entry
+
+    predictor, lock = entry
+    with lock:
+        yield predictor
+
+
+def clear_predictors():
+    with _lock:
+        _predictors.clear()
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
@@ -321,8 +321,16 @@ class MelSpectrogram(torch.nn.Module):
 
 
 class RMVPE:
-    def __init__(self, model_path, is_half, device=None):
+    def __init__(
+        self, model_path, is_half, device=None, chunk_frames=None, context_frames=160
+    ):
         self.resample_kernel = {}
+        # With chunk_frames set, long inputs go through the network chunk_frames
+        # mel frames at a time, with context_frames of extra mel on both sides of
+        # every chunk. The BiGRU then sees less context at chunk edges, so f0
+        # there can differ slightly from whole clip inference
+        self.chunk_frames = chunk_frames
+        self.context_frames = context_frames
         model = E2E(4, 1, (2, 2))
         ckpt = torch.load(model_path, map_location="cpu")
         model.load_state_dict(ckpt)
@@ -351,6 +359,23 @@ class RMVPE:
             hidden = self.model(mel)
             return hidden[:, :n_frames]
 
+    def mel2hidden_chunked(self, mel):
+        n_frames = mel.shape[-1]
+        if (
+            self.chunk_frames is None
+            or n_frames <= self.chunk_frames + 2 * self.context_frames
+        ):
+            return self.mel2hidden(mel).cpu()
+
+        hidden = []
+        for start in range(0, n_frames, self.chunk_frames):
+            end = min(start + self.chunk_frames, n_frames)
+            left = max(0, start - self.context_frames)
+            right = min(n_frames, end + self.context_frames)
+            chunk = self.mel2hidden(mel[..., left:right])
+            hidden.append(chunk[:, start - left : end - left].cpu())
+        return torch.cat(hidden, dim=1)
+
     def decode(self, hidden, thred=0.03):
         cents_pred = self.to_local_average_cents(hidden, thred=thred)
         f0 = 10 * (2 ** (cents_pred / 1200))
@@ -360,26 +385,20 @@ class RMVPE:
     def infer_from_audio(self, audio, thred=0.03):
         audio = torch.from_numpy(audio).float().to(self.device).unsqueeze(0)
         mel = self.mel_extractor(audio, center=True)
-        hidden = self.mel2hidden(mel)
-        hidden = hidden.squeeze(0).cpu().numpy()
+        hidden = self.mel2hidden_chunked(mel)
+        hidden = hidden.squeeze(0).numpy()
         if self.is_half == True:
             hidden = hidden.astype("float32")
         f0 = self.decode(hidden, thred=thred)
         return f0
 
     def to_local_average_cents(self, salience, thred=0.05):
+        # Weighted average of the 9 bins around the peak of every frame
         center = np.argmax(salience, axis=1)
         salience = np.pad(salience, ((0, 0), (4, 4)))
-        center += 4
-        todo_salience = []
-        todo_cents_mapping = []
-        starts = center - 4
-        ends = center + 5
-        for idx in range(salience.shape[0]):
-            todo_salience.append(salience[:, starts[idx] : ends[idx]][idx])
-            todo_cents_mapping.append(self.cents_mapping[starts[idx] : ends[idx]])
-        todo_salience = np.array(todo_salience)
-        todo_cents_mapping = np.array(todo_cents_mapping)
+        window = center[:, None] + np.arange(9)[None, :]
+        todo_salience = np.take_along_axis(salience, window, axis=1)
+        todo_cents_mapping = self.cents_mapping[window]
         product_sum = np.sum(todo_salience * todo_cents_mapping, 1)
         weight_sum = np.sum(todo_salience, 1)
         devided = product_sum / weight_sum
@@ -0,0 +1,1009 @@
+import os
+import json
+import argparse
+
+# Get TTS Voices
+with open(os.path.join(os.path.dirname(__file__), "tts_voices.json"), "r") as f:
+    voices_data = json.load(f)
+
+locales = list({voice["Locale"] for voice in voices_data})
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run the main.py script with specific parameters."
+    )
+    subparsers = parser.add_subparsers(
+        title="subcommands", dest="mode", help="Choose a mode"
+    )
+
+    # Parser for 'infer' mode
+    infer_parser = subparsers.add_parser("infer", help="Run inference")
+    infer_parser.add_argument(
+        "--f0up_key",
+        type=str,
+        help="Value for f0up_key",
+        choices=[str(i) for i in range(-24, 25)],
+        default="0",
+    )
+    infer_parser.add_argument(
+        "--filter_radius",
+        type=str,
+        help="Value for filter_radius",
+        choices=[str(i) for i in range(11)],
+        default="3",
+    )
+    infer_parser.add_argument(
+        "--index_rate",
+        type=str,
+        help="Value for index_rate",
+        choices=[str(i / 10) for i in range(11)],
+        default="0.3",
+    )
+    infer_parser.add_argument(
+        "--rms_mix_rate",
+        type=str,
+        help="Value for rms_mix_rate",
+        choices=[str(i / 10) for i in range(11)],
+        default="1",
+    )
+    infer_parser.add_argument(
+        "--protect",
+        type=str,
+        help="Value for protect",
+        choices=[str(i / 10) for i in range(6)],
+        default="0.33",
+    )
+    infer_parser.add_argument(
+        "--hop_length",
+        type=str,
+        help="Value for hop_length",
+        choices=[str(i) for i in range(1, 513)],
+        default="128",
+    )
+    infer_parser.add_argument(
+        "--f0method",
+        type=str,
+        help="Value for f0method",
+        choices=[
+            "pm",
+            "harvest",
+            "dio",
+            "crepe",
+            "crepe-tiny",
+            "rmvpe",
+            "fcpe",
+            "hybrid[crepe+rmvpe]",
+            "hybrid[crepe+fcpe]",
+            "hybrid[rmvpe+fcpe]",
+            "hybrid[crepe+rmvpe+fcpe]",
+        ],
+        default="rmvpe",
+    )
+    infer_parser.add_argument("--input_path", type=str, help="Input path")
+    infer_parser.add_argument("--output_path", type=str, help="Output path")
+    infer_parser.add_argument("--pth_path", type=str, help="Path to the .pth file")
+    infer_parser.add_argument(
+        "--index_path",
+        type=str,
+        help="Path to the .index file",
+    )
+    infer_parser.add_argument(
+        "--split_audio",
+        type=str,
+        help="Enable split audio",
+        choices=["True", "False"],
+        default="False",
+    )
+    infer_parser.add_argument(
+        "--f0autotune",
+        type=str,
+        help="Enable autotune",
+        choices=["True", "False"],
+        default="False",
+    )
+    infer_parser.add_argument(
+        "--clean_audio",
+        type=str,
+        help="Enable clean audio",
+        choices=["True", "False"],
+        default="False",
+    )
+    infer_parser.add_argument(
+        "--clean_strength",
+        type=str,
+        help="Value for clean_strength",
+        choices=[str(i / 10) for i in range(11)],
+        default="0.7",
+    )
+    infer_parser.add_argument(
+        "--export_format",
+        type=str,
+        help="Export format",
+        choices=["WAV", "MP3", "FLAC", "OGG", "M4A"],
+        default="WAV",
+    )
+    infer_parser.add_argument(
+        "--embedder_model",
+        type=str,
+        help="Embedder model",
+        choices=["contentvec", "hubert"],
+        default="hubert",
+    )
+    infer_parser.add_argument(
+        "--upscale_audio",
+        type=str,
+        help="Enable audio upscaling",
+        choices=["True", "False"],
+        default="False",
+    )
+
+    # Parser for 'multi_infer' mode
+    multi_infer_parser = subparsers.add_parser(
+        "multi_infer", help="Run inference of one input with several models"
+    )
+    multi_infer_parser.add_argument(
+        "--f0up_keys",
+        type=str,
+        nargs="+",
+        help="Value for f0up_key of every model, or one value for all",
+        choices=[str(i) for i in range(-24, 25)],
+        default=["0"],
+    )
+    multi_infer_parser.add_argument(
+        "--filter_radius",
+        type=str,
+        help="Value for filter_radius",
+        choices=[str(i) for i in range(11)],
+        default="3",
+    )
+    multi_infer_parser.add_argument(
+        "--index_rate",
+        type=str,
+        help="Value for index_rate",
+        choices=[str(i / 10) for i in range(11)],
+        default="0.3",
+    )
+    multi_infer_parser.add_argument(
+        "--rms_mix_rate",
+        type=str,
+        help="Value for rms_mix_rate",
+        choices=[str(i / 10) for i in range(11)],
+        default="1",
+    )
+    multi_infer_parser.add_argument(
+        "--protect",
+        type=str,
+        help="Value for protect",
+        choices=[str(i / 10) for i in range(6)],
+        default="0.33",
+    )
+    multi_infer_parser.add_argument(
+        "--hop_length",
+        type=str,
+        help="Value for hop_length",
+        choices=[str(i) for i in range(1, 513)],
+        default="128",
+    )
+    multi_infer_parser.add_argument(
+        "--f0method",
+        type=str,
+        help="Value for f0method",
+        choices=[
+            "pm",
+            "harvest",
+            "dio",
+            "crepe",
+            "crepe-tiny",
+            "rmvpe",
+            "fcpe",
+            "hybrid[crepe+rmvpe]",
+            "hybrid[crepe+fcpe]",
+            "hybrid[rmvpe+fcpe]",
+            "hybrid[crepe+rmvpe+fcpe]",
+        ],
+        default="rmvpe",
+    )
+    multi_infer_parser.add_argument("--input_path", type=str, help="Input path")
+    multi_infer_parser.add_argument(
+        "--output_folder", type=str, help="Output folder"
+    )
+    multi_infer_parser.add_argument(
+        "--pth_paths", type=str, nargs="+", help="Paths to the .pth files"
+    )
+    multi_infer_parser.add_argument(
+        "--index_paths",
+        type=str,
+        nargs="*",
+        help="Paths to the .index files, in the same order as the .pth files",
+        default=[],
+    )
+    multi_infer_parser.add_argument(
+        "--f0autotune",
+        type=str,
+        help="Enable autotune",
+        choices=["True", "False"],
+        default="False",
+    )
+    multi_infer_parser.add_argument(
+        "--export_format",
+        type=str,
+        help="Export format",
+        choices=["WAV", "MP3", "FLAC", "OGG", "M4A"],
+        default="WAV",
+    )
+    multi_infer_parser.add_argument(
+        "--embedder_model",
+        type=str,
+        help="Embedder model",
+        choices=["contentvec", "hubert"],
+        default="hubert",
+    )
+
+    # Parser for 'stream' mode
+    stream_parser = subparsers.add_parser(
+        "stream",
+        help="Convert 16 kHz 16-bit mono PCM from stdin to PCM at the model rate on stdout",
+    )
+    stream_parser.add_argument(
+        "--f0up_key",
+        type=str,
+        help="Value for f0up_key",
+        choices=[str(i) for i in range(-24, 25)],
+        default="0",
+    )
+    stream_parser.add_argument(
+        "--filter_radius",
+        type=str,
+        help="Value for filter_radius",
+        choices=[str(i) for i in range(11)],
+        default="3",
+    )
+    stream_parser.add_argument(
+        "--index_rate",
+        type=str,
+        help="Value for index_rate",
+        choices=[str(i / 10) for i in range(11)],
+        default="0.3",
+    )
+    stream_parser.add_argument(
+        "--protect",
+        type=str,
+        help="Value for protect",
+        choices=[str(i / 10) for i in range(6)],
+        default="0.33",
+    )
+    stream_parser.add_argument(
+        "--hop_length",
+        type=str,
+        help="Value for hop_length",
+        choices=[str(i) for i in range(1, 513)],
+        default="128",
+    )
+    stream_parser.add_argument(
+        "--f0method",
+        type=str,
+        help="Value for f0method",
+        choices=[
+            "pm",
+            "harvest",
+            "dio",
+            "crepe",
+            "crepe-tiny",
+            "rmvpe",
+            "fcpe",
+            "hybrid[crepe+rmvpe]",
+            "hybrid[crepe+fcpe]",
+            "hybrid[rmvpe+fcpe]",
+            "hybrid[crepe+rmvpe+fcpe]",
+        ],
+        default="rmvpe",
+    )
+    stream_parser.add_argument("--pth_path", type=str, help="Path to the .pth file")
+    stream_parser.add_argument(
+        "--index_path",
+        type=str,
+        help="Path to the .index file",
+        default="",
+    )
+    stream_parser.add_argument(
+        "--f0autotune",
+        type=str,
+        help="Enable autotune",
+        choices=["True", "False"],
+        default="False",
+    )
+    stream_parser.add_argument(
+        "--embedder_model",
+        type=str,
+        help="Embedder model",
+        choices=["contentvec", "hubert"],
+        default="hubert",
+    )
+    stream_parser.add_argument(
+        "--block_time",
+        type=float,
+        help="Seconds of input converted at a time",
+        default=0.5,
+    )
+    stream_parser.add_argument(
+        "--context_time",
+        type=float,
+        help="Seconds of previous input used as context",
+        default=1.0,
+    )
+    stream_parser.add_argument(
+        "--crossfade_time",
+        type=float,
+        help="Seconds of crossfade between converted blocks",
+        default=0.05,
+    )
+
+    # Parser for 'batch_infer' mode
+    batch_infer_parser = subparsers.add_parser(
+        "batch_infer", help="Run batch inference"
+    )
+    batch_infer_parser.add_argument(
+        "--f0up_key",
+        type=str,
+        help="Value for f0up_key",
+        choices=[str(i) for i in range(-24, 25)],
+        default="0",
+    )
+    batch_infer_parser.add_argument(
+        "--filter_radius",
+        type=str,
+        help="Value for filter_radius",
+        choices=[str(i) for i in range(11)],
+        default="3",
+    )
+    batch_infer_parser.add_argument(
+        "--index_rate",
+        type=str,
+        help="Value for index_rate",
+        choices=[str(i / 10) for i in range(11)],
+        default="0.3",
+    )
+    batch_infer_parser.add_argument(
+        "--rms_mix_rate",
+        type=str,
+        help="Value for rms_mix_rate",
+        choices=[str(i / 10) for i in range(11)],
+        default="1",
+    )
+    batch_infer_parser.add_argument(
+        "--protect",
+        type=str,
+        help="Value for protect",
+        choices=[str(i / 10) for i in range(6)],
+        default="0.33",
+    )
+    batch_infer_parser.add_argument(
+        "--hop_length",
+        type=str,
+        help="Value for hop_length",
+        choices=[str(i) for i in range(1, 513)],
+        default="128",
+    )
+    batch_infer_parser.add_argument(
+        "--f0method",
+        type=str,
+        help="Value for f0method",
+        choices=[
+            "pm",
+            "harvest",
+            "dio",
+            "crepe",
+            "crepe-tiny",
+            "rmvpe",
+            "fcpe",
+            "hybrid[crepe+rmvpe]",
+            "hybrid[crepe+fcpe]",
+            "hybrid[rmvpe+fcpe]",
+            "hybrid[crepe+rmvpe+fcpe]",
+        ],
+        default="rmvpe",
+    )
+    batch_infer_parser.add_argument("--input_folder", type=str, help="Input folder")
+    batch_infer_parser.add_argument("--output_folder", type=str, help="Output folder")
+    batch_infer_parser.add_argument(
+        "--pth_path", type=str, help="Path to the .pth file"
+    )
+    batch_infer_parser.add_argument(
+        "--index_path",
+        type=str,
+        help="Path to the .index file",
+    )
+    batch_infer_parser.add_argument(
+        "--split_audio",
+        type=str,
+        help="Enable split audio",
+        choices=["True", "False"],
+        default="False",
+    )
+    batch_infer_parser.add_argument(
+        "--f0autotune",
+        type=str,
+        help="Enable autotune",
+        choices=["True", "False"],
+        default="False",
+    )
+    batch_infer_parser.add_argument(
+        "--clean_audio",
+        type=str,
+        help="Enable clean audio",
+        choices=["True", "False"],
+        default="False",
+    )
+    batch_infer_parser.add_argument(
+        "--clean_strength",
+        type=str,
+        help="Value for clean_strength",
+        choices=[str(i / 10) for i in range(11)],
+        default="0.7",
+    )
+    batch_infer_parser.add_argument(
+        "--export_format",
+        type=str,
+        help="Export format",
+        choices=["WAV", "MP3", "FLAC", "OGG", "M4A"],
+        default="WAV",
+    )
+    batch_infer_parser.add_argument(
+        "--embedder_model",
+        type=str,
+        help="Embedder model",
+        choices=["contentvec", "hubert"],
+        default="hubert",
+    )
+    batch_infer_parser.add_argument(
+        "--upscale_audio",
+        type=str,
+        help="Enable audio upscaling",
+        choices=["True", "False"],
+        default="False",
+    )
+
+    # Parser for 'tts' mode
+    tts_parser = subparsers.add_parser("tts", help="Run TTS")
+    tts_parser.add_argument(
+        "--tts_text",
+        type=str,
+        help="Text to be synthesized",
+    )
+    tts_parser.add_argument(
+        "--tts_voice",
+        type=str,
+        help="Voice to be used",
+        choices=locales,
+    )
+    tts_parser.add_argument(
+        "--f0up_key",
+        type=str,
+        help="Value for f0up_key",
+        choices=[str(i) for i in range(-24, 25)],
+        default="0",
+    )
+    tts_parser.add_argument(
+        "--filter_radius",
+        type=str,
+        help="Value for filter_radius",
+        choices=[str(i) for i in range(11)],
+        default="3",
+    )
+    tts_parser.add_argument(
+        "--index_rate",
+        type=str,
+        help="Value for index_rate",
+        choices=[str(i / 10) for i in range(11)],
+        default="0.3",
+    )
+    tts_parser.add_argument(
+        "--rms_mix_rate",
+        type=str,
+        help="Value for rms_mix_rate",
+        choices=[str(i / 10) for i in range(11)],
+        default="1",
+    )
+    tts_parser.add_argument(
+        "--protect",
+        type=str,
+        help="Value for protect",
+        choices=[str(i / 10) for i in range(6)],
+        default="0.33",
+    )
+    tts_parser.add_argument(
+        "--hop_length",
+        type=str,
+        help="Value for hop_length",
+        choices=[str(i) for i in range(1, 513)],
+        default="128",
+    )
+    tts_parser.add_argument(
+        "--f0method",
+        type=str,
+        help="Value for f0method",
+        choices=[
+            "pm",
+            "harvest",
+            "dio",
+            "crepe",
+            "crepe-tiny",
+            "rmvpe",
+            "fcpe",
+            "hybrid[crepe+rmvpe]",
+            "hybrid[crepe+fcpe]",
+            "hybrid[rmvpe+fcpe]",
+            "hybrid[crepe+rmvpe+fcpe]",
+        ],
+        default="rmvpe",
+    )
+    tts_parser.add_argument("--output_tts_path", type=str, help="Output tts path")
+    tts_parser.add_argument("--output_rvc_path", type=str, help="Output rvc path")
+    tts_parser.add_argument("--pth_path", type=str, help="Path to the .pth file")
+    tts_parser.add_argument(
+        "--index_path",
+        type=str,
+        help="Path to the .index file",
+    )
+    tts_parser.add_argument(
+        "--split_audio",
+        type=str,
+        help="Enable split audio",
+        choices=["True", "False"],
+        default="False",
+    )
+    tts_parser.add_argument(
+        "--f0autotune",
+        type=str,
+        help="Enable autotune",
+        choices=["True", "False"],
+        default="False",
+    )
+    tts_parser.add_argument(
+        "--clean_audio",
+        type=str,
+        help="Enable clean audio",
+        choices=["True", "False"],
+        default="False",
+    )
+    tts_parser.add_argument(
+        "--clean_strength",
+        type=str,
+        help="Value for clean_strength",
+        choices=[str(i / 10) for i in range(11)],
+        default="0.7",
+    )
+    tts_parser.add_argument(
+        "--export_format",
+        type=str,
+        help="Export format",
+        choices=["WAV", "MP3", "FLAC", "OGG", "M4A"],
+        default="WAV",
+    )
+    tts_parser.add_argument(
+        "--embedder_model",
+        type=str,
+        help="Embedder model",
+        choices=["contentvec", "hubert"],
+        default="hubert",
+    )
+    tts_parser.add_argument(
+        "--upscale_audio",
+        type=str,
+        help="Enable audio upscaling",
+        choices=["True", "False"],
+        default="False",
+    )
+
+    # Parser for 'preprocess' mode
+    preprocess_parser = subparsers.add_parser("preprocess", help="Run preprocessing")
+    preprocess_parser.add_argument("--model_name", type=str, help="Name of the model")
+    preprocess_parser.add_argument(
+        "--dataset_path",
+        type=str,
+        help="Path to the dataset",
+    )
+    preprocess_parser.add_argument(
+        "--sampling_rate",
+        type=str,
+        help="Sampling rate",
+        choices=["32000", "40000", "48000"],
+    )
+
+    # Parser for 'extract' mode
+    extract_parser = subparsers.add_parser("extract", help="Run extract")
+    extract_parser.add_argument(
+        "--model_name",
+        type=str,
+        help="Name of the model",
+    )
+    extract_parser.add_argument(
+        "--rvc_version",
+        type=str,
+        help="Version of the model",
+        choices=["v1", "v2"],
+        default="v2",
+    )
+    extract_parser.add_argument(
+        "--f0method",
+        type=str,
+        help="Value for f0method",
+        choices=[
+            "pm",
+            "harvest",
+            "dio",
+            "crepe",
+            "crepe-tiny",
+            "rmvpe",
+        ],
+        default="rmvpe",
+    )
+    extract_parser.add_argument(
+        "--hop_length",
+        type=str,
+        help="Value for hop_length",
+        choices=[str(i) for i in range(1, 513)],
+        default="128",
+    )
+    extract_parser.add_argument(
+        "--sampling_rate",
+        type=str,
+        help="Sampling rate",
+        choices=["32000", "40000", "48000"],
+    )
+    extract_parser.add_argument(
+        "--embedder_model",
+        type=str,
+        help="Embedder model",
+        choices=["contentvec", "hubert"],
+        default="hubert",
+    )
+
+    # Parser for 'train' mode
+    train_parser = subparsers.add_parser("train", help="Run training")
+    train_parser.add_argument(
+        "--model_name",
+        type=str,
+        help="Name of the model",
+    )
+    train_parser.add_argument(
+        "--rvc_version",
+        type=str,
+        help="Version of the model",
+        choices=["v1", "v2"],
+        default="v2",
+    )
+    train_parser.add_argument(
+        "--save_every_epoch",
+        type=str,
+        help="Save every epoch",
+        choices=[str(i) for i in range(1, 101)],
+    )
+    train_parser.add_argument(
+        "--save_only_latest",
+        type=str,
+        help="Save weight only at last epoch",
+        choices=["True", "False"],
+        default="False",
+    )
+    train_parser.add_argument(
+        "--save_every_weights",
+        type=str,
+        help="Save weight every epoch",
+        choices=["True", "False"],
+        default="True",
+    )
+    train_parser.add_argument(
+        "--total_epoch",
+        type=str,
+        help="Total epoch",
+        choices=[str(i) for i in range(1, 10001)],
+        default="1000",
+    )
+    train_parser.add_argument(
+        "--sampling_rate",
+        type=str,
+        help="Sampling rate",
+        choices=["32000", "40000", "48000"],
+    )
+    train_parser.add_argument(
+        "--batch_size",
+        type=str,
+        help="Batch size",
+        choices=[str(i) for i in range(1, 51)],
+        default="8",
+    )
+    train_parser.add_argument(
+        "--gpu",
+        type=str,
+        help="GPU number",
+        default="0",
+    )
+    train_parser.add_argument(
+        "--pitch_guidance",
+        type=str,
+        help="Pitch guidance",
+        choices=["True", "False"],
+        default="True",
+    )
+    train_parser.add_argument(
+        "--pretrained",
+        type=str,
+        help="Pretrained",
+        choices=["True", "False"],
+        default="True",
+    )
+    train_parser.add_argument(
+        "--custom_pretrained",
+        type=str,
+        help="Custom pretrained",
+        choices=["True", "False"],
+        default="False",
+    )
+    train_parser.add_argument(
+        "--g_pretrained_path",
+        type=str,
+        nargs="?",
+        default=None,
+        help="Path to the pretrained G file",
+    )
+    train_parser.add_argument(
+        "--d_pretrained_path",
+        type=str,
+        nargs="?",
+        default=None,
+        help="Path to the pretrained D file",
+    )
+    train_parser.add_argument(
+        "--overtraining_detector",
+        type=str,
+        help="Overtraining detector",
+        choices=["True", "False"],
+        default="False",
+    )
+    train_parser.add_argument(
+        "--overtraining_threshold",
+        type=str,
+        help="Overtraining threshold",
+        choices=[str(i) for i in range(1, 101)],
+        default="50",
+    )
+
+    # Parser for 'index' mode
+    index_parser = subparsers.add_parser("index", help="Generate index file")
+    index_parser.add_argument(
+        "--model_name",
+        type=str,
+        help="Name of the model",
+    )
+    index_parser.add_argument(
+        "--rvc_version",
+        type=str,
+        help="Version of the model",
+        choices=["v1", "v2"],
+        default="v2",
+    )
+
+    # Parser for 'model_extract' mode
+    model_extract_parser = subparsers.add_parser("model_extract", help="Extract model")
+    model_extract_parser.add_argument(
+        "--pth_path",
+        type=str,
+        help="Path to the .pth file",
+    )
+    model_extract_parser.add_argument(
+        "--model_name",
+        type=str,
+        help="Name of the model",
+    )
+    model_extract_parser.add_argument(
+        "--sampling_rate",
+        type=str,
+        help="Sampling rate",
+        choices=["40000", "48000"],
+    )
+    model_extract_parser.add_argument(
+        "--pitch_guidance",
+        type=str,
+        help="Pitch guidance",
+        choices=["True", "False"],
+    )
+    model_extract_parser.add_argument(
+        "--rvc_version",
+        type=str,
+        help="Version of the model",
+        choices=["v1", "v2"],
+        default="v2",
+    )
+    model_extract_parser.add_argument(
+        "--epoch",
+        type=str,
+        help="Epochs of the model",
+        choices=[str(i) for i in range(1, 10001)],
+    )
+    model_extract_parser.add_argument(
+        "--step",
+        type=str,
+        help="Steps of the model",
+    )
+
+    # Parser for 'model_information' mode
+    model_information_parser = subparsers.add_parser(
+        "model_information", help="Print model information"
+    )
+    model_information_parser.add_argument(
+        "--pth_path",
+        type=str,
+        help="Path to the .pth file",
+    )
+
+    # Parser for 'model_blender' mode
+    model_blender_parser = subparsers.add_parser(
+        "model_blender", help="Fuse two models"
+    )
+    model_blender_parser.add_argument(
+        "--model_name",
+        type=str,
+        help="Name of the model",
+    )
+    model_blender_parser.add_argument(
+        "--pth_path_1",
+        type=str,
+        help="Path to the first .pth file",
+    )
+    model_blender_parser.add_argument(
+        "--pth_path_2",
+        type=str,
+        help="Path to the second .pth file",
+    )
+    model_blender_parser.add_argument(
+        "--ratio",
+        type=str,
+        help="Value for blender ratio",
+        choices=[str(i / 10) for i in range(11)],
+        default="0.5",
+    )
+
+    # Parser for 'model_convert' mode
+    model_convert_parser = subparsers.add_parser(
+        "model_convert", help="Convert .pth models to memory mapped .safetensors"
+    )
+    model_convert_parser.add_argument(
+        "--pth_path",
+        type=str,
+        help="Path to a .pth file or a folder of .pth files",
+        default="logs",
+    )
+
+    # Parser for 'embedder_convert' mode
+    embedder_convert_parser = subparsers.add_parser(
+        "embedder_convert", help="Convert an embedder so it loads without fairseq"
+    )
+    embedder_convert_parser.add_argument(
+        "--embedder_model",
+        type=str,
+        help="Embedder model",
+        choices=["contentvec", "hubert"],
+        default="contentvec",
+    )
+    embedder_convert_parser.add_argument(
+        "--check",
+        type=str,
+        help="Compare the converted embedder with fairseq (requires fairseq)",
+        choices=["True", "False"],
+        default="False",
+    )
+
+    # Parser for 'onnx_check' mode
+    onnx_check_parser = subparsers.add_parser(
+        "onnx_check", help="Compare the onnxruntime backend with torch"
+    )
+    onnx_check_parser.add_argument(
+        "--input_path",
+        type=str,
+        help="Path to the input audio file",
+    )
+    onnx_check_parser.add_argument(
+        "--pth_path",
+        type=str,
+        help="Path to the .pth file",
+    )
+    onnx_check_parser.add_argument(
+        "--embedder_model",
+        type=str,
+        help="Embedder model",
+        choices=["contentvec", "hubert"],
+        default="contentvec",
+    )
+
+    # Parser for 'quantize_check' mode
+    quantize_check_parser = subparsers.add_parser(
+        "quantize_check", help="Compare int8 quantized inference with fp32"
+    )
+    quantize_check_parser.add_argument(
+        "--input_paths",
+        type=str,
+        nargs="+",
+        help="Paths to the reference audio files",
+    )
+    quantize_check_parser.add_argument(
+        "--pth_path",
+        type=str,
+        help="Path to the .pth file",
+    )
+    quantize_check_parser.add_argument(
+        "--embedder_model",
+        type=str,
+        help="Embedder model",
+        choices=["contentvec", "hubert"],
+        default="contentvec",
+    )
+    quantize_check_parser.add_argument(
+        "--f0method",
+        type=str,
+        help="Value for f0method",
+        choices=["pm", "harvest", "dio", "crepe", "crepe-tiny", "rmvpe", "fcpe"],
+        default="rmvpe",
+    )
+
+    # Parser for 'tensorboard' mode
+    subparsers.add_parser("tensorboard", help="Run tensorboard")
+
+    # Parser for 'download' mode
+    download_parser = subparsers.add_parser("download", help="Download models")
+    download_parser.add_argument(
+        "--model_link",
+        type=str,
+        help="Link of the model",
+    )
+
+    # Parser for 'prerequisites' mode
+    prerequisites_parser = subparsers.add_parser(
+        "prerequisites", help="Install prerequisites"
+    )
+    prerequisites_parser.add_argument(
+        "--pretraineds_v1",
+        type=str,
+        choices=["True", "False"],
+        default="True",
+        help="Download pretrained models for v1",
+    )
+    prerequisites_parser.add_argument(
+        "--pretraineds_v2",
+        type=str,
+        choices=["True", "False"],
+        default="True",
+        help="Download pretrained models for v2",
+    )
+    prerequisites_parser.add_argument(
+        "--models",
+        type=str,
+        choices=["True", "False"],
+        default="True",
+        help="Donwload models",
+    )
+    prerequisites_parser.add_argument(
+        "--exe",
+        type=str,
+        choices=["True", "False"],
+        default="True",
+        help="Download executables",
+    )
+
+    # Parser for 'audio_analyzer' mode
+    audio_analyzer = subparsers.add_parser("audio_analyzer", help="Run audio analyzer")
+    audio_analyzer.add_argument(
+        "--input_path",
+        type=str,
+        help="Path to the input audio file",
+    )
+
+    # Parser for 'api' mode
+    api_parser = subparsers.add_parser("api", help="Run the API")
+    api_parser.add_argument(
+        "--host", type=str, help="Host address", default="127.0.0.1"
+    )
+    api_parser.add_argument("--port", type=str, help="Port", default="8000")
+
+    return parser.parse_args(argv)
@@ -1,26 +1,135 @@
 import ffmpeg
+import librosa
+import math
 import numpy as np
+import soundfile as sf
 import re
+from scipy import signal
 import unicodedata
-from fairseq import checkpoint_utils
 
-import logging
+from rvc.lib.embedder import load_embedder, load_fairseq_embedder
 
-logging.getLogger("fairseq").setLevel(logging.WARNING)
+
+# Containers decoded in process by libsndfile, everything else goes through ffmpeg
+SOUNDFILE_FORMATS = ("WAV", "WAVEX", "FLAC", "OGG", "AIFF")
+
+
+def load_audio_soundfile(file, sampling_rate):
+    """Decode with libsndfile and resample in process, None if the file is not supported"""
+    info = sf.info(file)
+    # ffmpeg mixes more than two channels with its own matrix, leave those to it
+    if info.format not in SOUNDFILE_FORMATS or info.channels > 2:
+        return None
+
+    audio, rate = sf.read(file, dtype="float32", always_2d=True)
+    # ffmpeg downmixes stereo to float mono as (L + R) / sqrt(2), unnormalized
+    if audio.shape[1] == 2:
+        audio = audio.sum(axis=1) * np.float32(np.sqrt(0.5))
+    else:
+        audio = audio[:, 0]
+    if rate != sampling_rate:
+        divisor = math.gcd(rate, sampling_rate)
+        audio = signal.resample_poly(
+            audio, sampling_rate // divisor, rate // divisor
+        ).astype(np.float32)
+    return audio
+
+
+def load_audio_ffmpeg(file, sampling_rate):
+    out, _ = (
+        ffmpeg.input(file, threads=0)
+        .output("-", format="f32le", acodec="pcm_f32le", ac=1, ar=sampling_rate)
+        .run(cmd=["ffmpeg", "-nostdin"], capture_stdout=True, capture_stderr=True)
+    )
+    return np.frombuffer(out, np.float32).flatten()
 
 
 def load_audio(file, sampling_rate):
+    file = file.strip(" ").strip('"').strip("\n").strip('"').strip(" ")
+    try:
+        audio = load_audio_soundfile(file, sampling_rate)
+    except Exception:
+        audio = None
+
+    if audio is None:
+        try:
+            audio = load_audio_ffmpeg(file, sampling_rate)
+        except Exception as error:
+            raise RuntimeError(f"Failed to load audio: {error}")
+
+    return audio
+
+
+# Sample rates lossy and lossless export formats are written at
+COMMON_SAMPLE_RATES = [8000, 11025, 12000, 16000, 22050, 24000, 32000, 44100, 48000]
+
+# Formats soundfile cannot write are piped into ffmpeg
+FFMPEG_FORMATS = {
+    "MP3": {"format": "mp3", "acodec": "libmp3lame"},
+    "M4A": {"format": "ipod", "acodec": "aac"},
+}
+
+
+def encode_audio(audio, sampling_rate, output_path, export_format="WAV"):
+    """Write audio in export_format without intermediate files.
+
+    WAV is written as is. Other formats are resampled once to the closest
+    common sample rate and written with soundfile, or streamed into ffmpeg
+    through a pipe for codecs soundfile does not support.
+    """
+    export_format = export_format.upper()
+    if export_format == "WAV":
+        sf.write(output_path, audio, sampling_rate, format="WAV")
+        return output_path
+
+    if np.issubdtype(audio.dtype, np.integer):
+        audio = audio.astype(np.float32) / -np.iinfo(audio.dtype).min
+    else:
+        audio = audio.astype(np.float32, copy=False)
+
+    target_sr = min(COMMON_SAMPLE_RATES, key=lambda x: abs(x - sampling_rate))
+    if target_sr != sampling_rate:
+        audio = librosa.resample(audio, orig_sr=sampling_rate, target_sr=target_sr)
+
+    if export_format not in FFMPEG_FORMATS:
+        sf.write(output_path, audio, target_sr, format=export_format.lower())
+        return output_path
+
     try:
-        file = file.strip(" ").strip('"').strip("\n").strip('"').strip(" ")
-        out, _ = (
-            ffmpeg.input(file, threads=0)
-            .output("-", format="f32le", acodec="pcm_f32le", ac=1, ar=sampling_rate)
-            .run(cmd=["ffmpeg", "-nostdin"], capture_stdout=True, capture_stderr=True)
+        (
+            ffmpeg.input("pipe:", format="f32le", ac=1, ar=target_sr)
+            .output(output_path, **FFMPEG_FORMATS[export_format])
+            .overwrite_output()
+            .run(
+                cmd=["ffmpeg", "-nostdin"],
+                input=audio.tobytes(),
+                capture_stdout=True,
+                capture_stderr=True,
+            )
         )
-    except Exception as error:
-        raise RuntimeError(f"Failed to load audio: {error}")
+    except ffmpeg.Error as error:
+        raise RuntimeError(f"Failed to encode audio: {error.stderr.decode()}")
+    return output_path
 
-    return np.frombuffer(out, np.float32).flatten()
+
+def mel_distance(reference, audio, sampling_rate, n_mels=80):
+    """Mean absolute difference in dB between the log mel spectrograms of two signals"""
+    length = min(reference.shape[0], audio.shape[0])
+    mels = [
+        librosa.power_to_db(
+            librosa.feature.melspectrogram(
+                y=np.asarray(samples[:length], dtype=np.float32),
+                sr=sampling_rate,
+                n_fft=2048,
+                hop_length=512,
+                n_mels=n_mels,
+            ),
+            amin=1e-10,
+            top_db=None,
+        )
+        for samples in (reference, audio)
+    ]
+    return float(np.mean(np.abs(mels[0] - mels[1])))
 
 
 def format_title(title):
@@ -33,18 +142,33 @@ def format_title(title):
     return formatted_title
 
 
-def load_embedding(embedder_model):
-    embedding_list = {
-        "contentvec": "contentvec_base.pt",
-        "hubert": "hubert_base.pt",
-    }
+EMBEDDING_MODELS = {
+    "contentvec": "contentvec_base.pt",
+    "hubert": "hubert_base.pt",
+}
 
-    model_path = embedding_list[embedder_model]
 
-    models = checkpoint_utils.load_model_ensemble_and_task(
-        [model_path],
-        suffix="",
-    )
+def load_embedding(embedder_model, native=False):
+    """The embedder model, fairseq's unless native asks for HubertEmbedder.
+
+    Without fairseq installed HubertEmbedder is used either way, and a
+    native embedder that cannot be loaded falls back to fairseq.
+    """
+    model_path = EMBEDDING_MODELS[embedder_model]
+
+    if not native:
+        try:
+            model = load_fairseq_embedder(model_path)
+        except ImportError as error:
+            print(f"fairseq is not available, loading {model_path} without it: {error}")
+            native = True
+
+    if native:
+        try:
+            model = load_embedder(model_path)
+        except Exception as error:
+            print(f"Could not load {model_path} without fairseq, using fairseq: {error}")
+            model = load_fairseq_embedder(model_path)
 
     print(f"Embedding model {embedder_model} loaded successfully.")
-    return models
+    return model
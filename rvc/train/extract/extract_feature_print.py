@@ -40,8 +40,9 @@ def read_wave(wav_path, normalize=False):
 
 
 print("Starting feature extraction...")
-models, saved_cfg, task = load_embedding(embedder_model)
-model = models[0]
+model = load_embedding(
+    embedder_model, native=os.environ.get("RVC_NATIVE_EMBEDDER", "False") == "True"
+)
 model = model.to(device)
 if device not in ["mps", "cpu"]:
     model = model.half()
@@ -66,7 +67,7 @@ else:
                     if os.path.exists(out_file_path):
                         continue
 
-                    feats = read_wave(wav_file_path, normalize=saved_cfg.task.normalize)
+                    feats = read_wave(wav_file_path, normalize=model.normalize)
                     padding_mask = torch.BoolTensor(feats.shape).fill_(False)
                     inputs = {
                         "source": feats.to(device),
@@ -4,7 +4,7 @@ import faiss
 import numpy as np
 from sklearn.cluster import MiniBatchKMeans
 from multiprocessing import cpu_count
-from control_api.rvc_service import rvc_service
+from control_api.model_registry import model_registry
 
 print("extract_index.py current work dir:", os.getcwd())
 
@@ -82,7 +82,7 @@ try:
 
     faiss.write_index(index_added, index_filepath_added)
 
-    rvc_service.add_model_info(
+    model_registry.add_model_info(
         model_name=exp_dir.rsplit('/', maxsplit=1)[-1],
         index_path=os.path.join(exp_dir, index_filename_added)
     )
@@ -2,6 +2,8 @@ import os
 import torch
 from collections import OrderedDict
 
+from rvc.lib.model_file import load_checkpoint
+
 
 def extract(ckpt):
     a = ckpt["model"]
@@ -17,8 +19,8 @@ def extract(ckpt):
 def model_blender(name, path1, path2, ratio):
     try:
         message = f"Model {path1} and {path2} are merged with alpha {ratio}."
-        ckpt1 = torch.load(path1, map_location="cpu")
-        ckpt2 = torch.load(path2, map_location="cpu")
+        ckpt1 = load_checkpoint(path1)
+        ckpt2 = load_checkpoint(path2)
         cfg = ckpt1["config"]
         cfg_f0 = ckpt1["f0"]
         cfg_version = ckpt1["version"]
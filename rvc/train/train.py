@@ -26,6 +26,7 @@ import torch.distributed as dist
 import torch.multiprocessing as mp
 
 from control_api.rvc_service import rvc_service
+from control_api.model_registry import model_registry
 
 
 now_dir = os.getcwd()
@@ -605,6 +606,11 @@ def train_and_evaluate(rank, epoch, hps, nets, optims, scaler, loaders, writers,
                     lowest_value["value"], lowest_value["epoch"], lowest_value["step"]
                 )
             )
+            # os._exit skips atexit, send the coalesced epoch updates first
+            try:
+                rvc_service.callback_client.flush()
+            except Exception as e:
+                logger.error(f"Error flushing model info: {e}", exc_info=True)
             os._exit(2333333)
 
     if rank == 0:
@@ -637,7 +643,7 @@ def train_and_evaluate(rank, epoch, hps, nets, optims, scaler, loaders, writers,
         save_filename = "{}_{}e_{}s.pth".format(hps.name, epoch, global_step)
 
         try:
-            rvc_service.add_model_info(
+            model_registry.add_model_info(
                 model_name=hps.name.rsplit('/', maxsplit=1)[-1],
                 pth_path=os.path.join("logs", save_filename)
             )
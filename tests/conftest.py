@@ -0,0 +1,12 @@
+import pytest
+
+
+@pytest.fixture
+def voice_model_path(tmp_path):
+    """Path of a random v2 voice model .pth in a fresh directory"""
+    torch = pytest.importorskip("torch")
+    from benchmarks.model_load import voice_model_checkpoint
+
+    path = tmp_path / "voice.pth"
+    torch.save(voice_model_checkpoint(), path)
+    return str(path)
@@ -0,0 +1,67 @@
+import shutil
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from rvc.lib.utils import load_audio, load_audio_ffmpeg, load_audio_soundfile
+
+pytestmark = pytest.mark.skipif(
+    shutil.which("ffmpeg") is None, reason="compares against the ffmpeg binary"
+)
+
+# Resampling filters differ in their transition band and in how they start
+# and end, so band limited content is compared away from the edges
+TOLERANCE = 1e-3
+EDGE = 160
+
+
+def tones(sampling_rate, seconds=3, channels=1):
+    t = np.arange(int(sampling_rate * seconds)) / sampling_rate
+    audio = (
+        0.3 * np.sin(2 * np.pi * 220 * t)
+        + 0.1 * np.sin(2 * np.pi * 1500 * t)
+        + 0.05 * np.sin(2 * np.pi * 5000 * t)
+    )
+    if channels == 2:
+        audio = np.stack([audio, -0.5 * audio], axis=1)
+    return audio
+
+
+@pytest.mark.parametrize(
+    "name, sampling_rate, channels, subtype",
+    [
+        ("mono.wav", 16000, 1, "PCM_16"),
+        ("stereo.wav", 16000, 2, "PCM_16"),
+        ("stereo.wav", 44100, 2, "PCM_16"),
+        ("mono.wav", 48000, 1, "PCM_24"),
+        ("mono.wav", 22050, 1, "FLOAT"),
+        ("mono.flac", 44100, 1, "PCM_16"),
+        ("stereo.ogg", 48000, 2, "VORBIS"),
+    ],
+)
+def test_soundfile_matches_ffmpeg(tmp_path, name, sampling_rate, channels, subtype):
+    path = str(tmp_path / name)
+    sf.write(path, tones(sampling_rate, channels=channels), sampling_rate, subtype=subtype)
+
+    audio = load_audio_soundfile(path, 16000)
+    expected = load_audio_ffmpeg(path, 16000)
+
+    assert audio.dtype == np.float32
+    assert audio.shape == expected.shape
+    if sampling_rate == 16000:
+        np.testing.assert_allclose(audio, expected, rtol=0, atol=1e-6)
+    else:
+        difference = np.abs(audio - expected)[EDGE:-EDGE]
+        assert difference.max() <= TOLERANCE
+
+
+def test_other_formats_go_through_ffmpeg(tmp_path):
+    import ffmpeg
+
+    wav_path = str(tmp_path / "voice.wav")
+    path = str(tmp_path / "voice.mp3")
+    sf.write(wav_path, tones(44100), 44100)
+    ffmpeg.input(wav_path).output(path).run(quiet=True)
+
+    np.testing.assert_array_equal(load_audio(path, 16000), load_audio_ffmpeg(path, 16000))
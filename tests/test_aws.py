@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("pydantic_settings")
+
+# Sets the settings environment before aws is imported
+from benchmarks.s3_download import S3Stub, client_for, start_stub
+
+import aws
+from aws import AWSService
+from config import settings
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    server = start_stub()
+    monkeypatch.setattr(aws, "s3", client_for(server))
+    monkeypatch.setattr(S3Stub, "bytes_per_second", 1024**3)
+    monkeypatch.setattr(S3Stub, "objects", {})
+    yield S3Stub.objects
+    server.shutdown()
+
+
+@pytest.mark.parametrize("size", [300 * 1024, 5 * 1024 * 1024 + 17])
+def test_download_file(tmp_path, monkeypatch, stub, size):
+    # Objects from 1 MB on are fetched in 1 MB ranges
+    monkeypatch.setattr(settings, "s3_download_threshold", 1024 * 1024)
+    monkeypatch.setattr(settings, "s3_download_part_size", 1024 * 1024)
+    data = os.urandom(size)
+    stub["voices/model.pth"] = data
+    path = tmp_path / "models" / "model.pth"
+
+    etag = AWSService.download_file("https://bucket/voices/model.pth", str(path))
+
+    assert path.read_bytes() == data
+    assert etag == S3Stub.etag(data)
+    assert path.stat().st_mode & 0o777 == 0o666 & ~aws.UMASK
+    assert os.listdir(path.parent) == ["model.pth"]
+
+
+def test_failed_download_leaves_nothing(tmp_path, stub):
+    path = tmp_path / "missing.pth"
+    with pytest.raises(Exception):
+        AWSService.download_file("https://bucket/voices/missing.pth", str(path))
+    assert os.listdir(tmp_path) == []
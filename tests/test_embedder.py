@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from rvc.lib.embedder import check_embedder
+from rvc.lib.utils import EMBEDDING_MODELS
+
+
+def random_fairseq_checkpoint(path, final_dim=256, seed=0):
+    """A fairseq HuBERT base checkpoint with random weights, written to path"""
+    from omegaconf import OmegaConf
+    from fairseq.models.hubert.hubert import HubertConfig, HubertModel
+    from fairseq.tasks.hubert_pretraining import (
+        HubertPretrainingConfig,
+        HubertPretrainingTask,
+    )
+
+    label_dir = os.path.dirname(path)
+    with open(os.path.join(label_dir, "dict.km.txt"), "w") as file:
+        file.writelines(f"{i} 1\n" for i in range(500))
+    task_cfg = HubertPretrainingConfig(
+        data=label_dir, label_dir=label_dir, labels=["km"]
+    )
+    model_cfg = HubertConfig(label_rate=50.0, final_dim=final_dim)
+    task = HubertPretrainingTask.setup_task(task_cfg)
+
+    torch.manual_seed(seed)
+    model = HubertModel(model_cfg, task_cfg, task.dictionaries)
+    # Freshly initialized weights are tiny, spread them like trained ones
+    with torch.no_grad():
+        for parameter in model.parameters():
+            parameter.normal_(0, 0.05)
+
+    cfg = {}
+    for name, value, fairseq_name in (
+        ("model", model_cfg, "hubert"),
+        ("task", task_cfg, "hubert_pretraining"),
+    ):
+        cfg[name] = OmegaConf.to_container(
+            OmegaConf.structured(value), resolve=True, enum_to_str=True
+        )
+        cfg[name]["_name"] = fairseq_name
+    torch.save(
+        {
+            "cfg": cfg,
+            "model": model.state_dict(),
+            "args": None,
+            "optimizer_history": [
+                {
+                    "criterion_name": "hubert",
+                    "optimizer_name": "adam",
+                    "lr_scheduler_state": {},
+                    "num_updates": 0,
+                }
+            ],
+            "extra_state": {"train_iterator": {}},
+        },
+        path,
+    )
+    return str(path)
+
+
+@pytest.mark.parametrize("final_dim", [256, 0])
+def test_random_embedder_matches_fairseq(tmp_path, final_dim):
+    pytest.importorskip("fairseq")
+    model_path = random_fairseq_checkpoint(tmp_path / "hubert.pt", final_dim)
+    assert check_embedder(model_path) <= 1e-3
+
+
+@pytest.mark.parametrize("model_path", sorted(EMBEDDING_MODELS.values()))
+def test_embedder_matches_fairseq(model_path):
+    pytest.importorskip("fairseq")
+    if not os.path.exists(model_path):
+        pytest.skip(f"{model_path} not found")
+    assert check_embedder(model_path) <= 1e-3
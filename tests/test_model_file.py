@@ -0,0 +1,26 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from rvc.configs.config import Config
+from rvc.infer.model_cache import load_voice_model
+from rvc.lib.model_file import convert_checkpoint, load_checkpoint
+
+
+def test_model_file_loads_like_pth(voice_model_path):
+    config = Config()
+    from_pth = load_voice_model(voice_model_path, config, backend="torch")
+    model_file = convert_checkpoint(voice_model_path)
+    expected = torch.load(voice_model_path, map_location="cpu")
+
+    assert load_checkpoint(model_file, weights=False) == {
+        key: value for key, value in expected.items() if key != "weight"
+    }
+
+    # The model file is newer than the .pth, so it is used for the same path
+    mapped = load_voice_model(voice_model_path, config, backend="torch")
+    assert mapped.size == from_pth.size
+    for (name, tensor), (_, mapped_tensor) in zip(
+        from_pth.net_g.state_dict().items(), mapped.net_g.state_dict().items()
+    ):
+        assert torch.equal(tensor, mapped_tensor), name
@@ -0,0 +1,121 @@
+import os
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("onnxruntime")
+
+from rvc.configs.config import Config
+from rvc.infer.model_cache import load_voice_model
+from rvc.infer.onnx_backend import (
+    EMBEDDER_TOLERANCE,
+    MEL_DISTANCE_TOLERANCE,
+    OnnxEmbedder,
+    OnnxSynthesizer,
+    check_onnx_parity,
+)
+from rvc.lib.embedder import EMBEDDER_CONFIG, HubertEmbedder
+from rvc.lib.utils import EMBEDDING_MODELS, mel_distance
+
+pytestmark = pytest.mark.skipif(
+    Config().device != "cpu", reason="compares against the fp32 CPU torch path"
+)
+
+
+def small_embedder(seed=0):
+    """HubertEmbedder with random weights and two encoder layers"""
+    config = dict(EMBEDDER_CONFIG, encoder_layers=2, encoder_ffn_embed_dim=768)
+    torch.manual_seed(seed)
+    return HubertEmbedder(config).eval()
+
+
+def voice(seconds, frequency=220, seed=0):
+    t = np.arange(int(seconds * 16000)) / 16000
+    audio = 0.3 * np.sin(2 * np.pi * frequency * t)
+    audio += 0.01 * np.random.default_rng(seed).standard_normal(t.shape[0])
+    return audio.astype(np.float32)
+
+
+def test_embedder_matches_torch(tmp_path):
+    embedder = small_embedder()
+    model_path = tmp_path / "embedder.pt"
+    model_path.touch()
+    onnx_embedder = OnnxEmbedder(embedder, str(model_path), Config())
+
+    source = torch.from_numpy(np.stack([voice(2), voice(2, 330, seed=1)]))
+    padding_mask = torch.zeros(source.shape, dtype=torch.bool)
+    # The second item is half padding, like a short chunk in a batch
+    padding_mask[1, source.shape[1] // 2 :] = True
+    with torch.no_grad():
+        for output_layer in (9, 12):
+            expected, expected_mask = embedder.extract_features(
+                source, padding_mask, output_layer
+            )
+            features, mask = onnx_embedder.extract_features(
+                source, padding_mask, output_layer
+            )
+            assert torch.equal(mask, expected_mask)
+            valid = ~mask.unsqueeze(-1)
+            difference = ((features - expected) * valid).abs().max().item()
+            assert difference <= EMBEDDER_TOLERANCE
+
+
+def test_synthesizer_in_vc_batch(voice_model_path):
+    config = Config()
+    model = load_voice_model(voice_model_path, config, backend="torch")
+    onnx_model = load_voice_model(voice_model_path, config, backend="onnx")
+    assert isinstance(onnx_model.net_g, OnnxSynthesizer)
+
+    vc = model.vc
+    vc.batch_memory = 1024**3
+    chunks = [voice(3), voice(2.9, 330, seed=1)]
+    # VC sizes batches from the generator settings, which OnnxSynthesizer carries
+    assert vc.plan_batches(onnx_model.net_g, chunks) == vc.plan_batches(
+        model.net_g, chunks
+    )
+    assert vc.chunk_memory(onnx_model.net_g, 300) == vc.chunk_memory(model.net_g, 300)
+
+    # A steady pitch with an unvoiced stretch, in the coarse and Hz forms of get_f0
+    pitches, pitchfs = [], []
+    for chunk in chunks:
+        pitchf = torch.full((1, chunk.shape[0] // vc.window), 220.0)
+        pitchf[:, 100:150] = 0
+        pitches.append(torch.where(pitchf > 0, 98, 1).long())
+        pitchfs.append(pitchf)
+
+    embedder = small_embedder()
+    outputs = []
+    for net_g in (model.net_g, onnx_model.net_g):
+        torch.manual_seed(0)
+        outputs.append(
+            vc.vc_batch(
+                embedder,
+                net_g,
+                torch.tensor([0]),
+                chunks,
+                pitches,
+                pitchfs,
+                None,
+                None,
+                0,
+                model.version,
+                0.33,
+            )
+        )
+
+    for expected, output in zip(*outputs):
+        assert output.shape == expected.shape
+        assert mel_distance(expected, output, model.tgt_sr) <= MEL_DISTANCE_TOLERANCE
+
+
+def test_check_onnx_parity(tmp_path, voice_model_path):
+    import soundfile as sf
+
+    embedder_path = EMBEDDING_MODELS["contentvec"]
+    if not os.path.exists(embedder_path):
+        pytest.skip(f"{embedder_path} not found")
+    input_path = str(tmp_path / "input.wav")
+    sf.write(input_path, voice(5), 16000)
+
+    assert check_onnx_parity(input_path, voice_model_path)["passed"]
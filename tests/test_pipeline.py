@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+
+from benchmarks.pipeline_numpy import (
+    autotune_f0_loop,
+    find_split_points_loop,
+    pipeline_settings,
+    random_audio,
+    random_f0,
+)
+from rvc.infer.pipeline import VC
+
+
+def test_autotune_matches_loop():
+    vc = pipeline_settings()
+    f0 = random_f0(20000)
+    # Exact notes, midpoints between notes and NaN frames
+    notes = np.asarray(vc.note_dict)
+    f0[:10] = notes[:10]
+    f0[10:20] = (notes[:10] + notes[1:11]) / 2
+    f0[20:25] = np.nan
+    assert np.array_equal(
+        VC.autotune_f0(vc, f0), autotune_f0_loop(vc, f0), equal_nan=True
+    )
+
+
+@pytest.mark.parametrize("seconds", [80, 200])
+def test_split_points_match_loop(seconds):
+    vc = pipeline_settings()
+    audio = random_audio(seconds, seed=seconds)
+    expected = find_split_points_loop(vc, audio)
+    assert len(expected) >= 2
+    assert VC.find_split_points(vc, audio) == expected
+
+
+def test_split_points_short_audio():
+    vc = pipeline_settings()
+    assert VC.find_split_points(vc, random_audio(10)) == []
@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from rvc.configs.config import Config
+from rvc.infer.model_cache import load_voice_model
+from rvc.infer.quantize import SYNTHESIZER_SCOPES, quantized_path
+
+pytestmark = pytest.mark.skipif(
+    Config().device != "cpu", reason="quantized inference runs on CPU only"
+)
+
+
+def synthesize(net_g, frames=200):
+    generator = torch.Generator().manual_seed(1)
+    phone = torch.randn(1, frames, 768, generator=generator)
+    pitch = torch.randint(1, 255, (1, frames), generator=generator)
+    pitchf = torch.rand(1, frames, generator=generator) * 400 + 100
+    torch.manual_seed(0)
+    with torch.no_grad():
+        return net_g.infer(
+            phone, torch.tensor([frames]), pitch, pitchf, torch.tensor([0])
+        )[0]
+
+
+def test_quantized_cache_holds_only_quantized_state(voice_model_path):
+    first = load_voice_model(voice_model_path, Config(), backend="int8")
+    path = quantized_path(voice_model_path)
+    assert os.path.exists(path)
+
+    # A plain state dict, readable without unpickling arbitrary objects
+    state = torch.load(path, map_location="cpu", weights_only=True)
+    assert set(state) == set(SYNTHESIZER_SCOPES)
+
+    second = load_voice_model(voice_model_path, Config(), backend="int8")
+    assert torch.equal(synthesize(first.net_g), synthesize(second.net_g))
+
+
+def test_unreadable_cache_is_rewritten(voice_model_path):
+    path = quantized_path(voice_model_path)
+    reference = load_voice_model(voice_model_path, Config(), backend="int8")
+    with open(path, "wb") as file:
+        file.write(b"not a checkpoint")
+    os.utime(voice_model_path, (0, 0))
+
+    model = load_voice_model(voice_model_path, Config(), backend="int8")
+    assert torch.equal(synthesize(reference.net_g), synthesize(model.net_g))
+    assert set(torch.load(path, weights_only=True)) == set(SYNTHESIZER_SCOPES)
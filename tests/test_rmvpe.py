@@ -0,0 +1,30 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+
+from benchmarks.rmvpe_decode import (
+    chunk_boundary_difference,
+    decoder,
+    random_salience,
+    to_local_average_cents_loop,
+)
+
+
+@pytest.mark.parametrize("thred", [0.03, 0.05, 0.5])
+def test_decode_matches_loop(thred):
+    rmvpe = decoder()
+    salience = random_salience(3000, seed=1)
+    # Peaks at both edges of the bin range exercise the padding
+    salience[0, 0] = salience[1, 359] = 2.0
+    expected = to_local_average_cents_loop(rmvpe, salience, thred=thred)
+    assert np.array_equal(rmvpe.to_local_average_cents(salience, thred=thred), expected)
+
+
+@pytest.mark.skipif(not os.path.exists("rmvpe.pt"), reason="rmvpe.pt not found")
+def test_chunked_inference_close_to_whole_clip():
+    max_cents, mismatched_voicing = chunk_boundary_difference("rmvpe.pt", seconds=70)
+    assert max_cents < 20
+    assert mismatched_voicing <= 2